@@ -1,110 +1,43 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 import json
 from datetime import datetime
 from calendar import month_name
 import io
-from church_records import CURRENCIES, CONVERSION_RATES
+from church_records import CURRENCIES, CONVERSION_RATES, convert_amounts, format_display_amounts
+from partner_records import load_partner_records, SPONSORSHIP_FIELDS, EXTERNAL_SPONSORSHIP_FIELDS
 
-def fetch_all_partner_records():
-    """Fetch all partner records for analytics"""
-    try:
-        conn = sqlite3.connect('partner_records.db')
-        
-        # Initialize empty list to store all records
-        all_records = []
-        
-        # Define table mappings
-        tables = {
-            'adult_partners': 'Adult Partner',
-            'children_partners': 'Child Partner',
-            'teenager_partners': 'Teenager Partner',
-            'external_partners': 'External Partner'
-        }
-        
-        # Fetch from all tables
-        for table_name, record_type in tables.items():
-            try:
-                query = f"SELECT id, record_data, submission_date FROM {table_name}"
-                df = pd.read_sql_query(query, conn)
-                if not df.empty:
-                    df['record_type'] = record_type
-                    all_records.append(df)
-            except:
-                continue
-        
-        conn.close()
-        
-        if not all_records:
-            return pd.DataFrame()
-            
-        # Combine all records
-        combined_df = pd.concat(all_records, ignore_index=True)
-        
-        # Parse JSON data
-        def parse_record_data(record_data):
-            if isinstance(record_data, str):
-                return json.loads(record_data)
-            return record_data
-            
-        # Extract fields from JSON
-        combined_df['record_data'] = combined_df['record_data'].apply(parse_record_data)
-        
-        # Extract common fields
-        for field in ['title', 'first_name', 'surname', 'church', 'group_name', 
-                     'kingschat_phone', 'email', 'zone', 'currency']:
-            combined_df[field] = combined_df['record_data'].apply(lambda x: x.get(field, ''))
-        
-        # Extract amount fields
-        combined_df['original_amount'] = combined_df['record_data'].apply(
-            lambda x: float(x.get('original_amount', 0))
-        )
-        combined_df['grand_total'] = combined_df['record_data'].apply(
-            lambda x: float(x.get('grand_total', 0))
-        )
-        
-        # Extract numeric fields with proper type conversion
-        numeric_fields = [
-            'total_wonder_challenge', 'total_rhapsody_languages',
-            'total_kiddies_products', 'total_teevo', 'total_braille_nolb',
-            'total_youth_aglow', 'total_local_distribution',
-            'total_subscriptions_dubais'
-        ]
-        
-        for field in numeric_fields:
-            combined_df[field] = combined_df['record_data'].apply(
-                lambda x: float(x.get(field, 0))
-            )
-        
-        # Format amount display
-        combined_df['Display Amount'] = combined_df.apply(
-            lambda row: f"{row['original_amount']:,.2f} {row['currency']} "
-                      f"({row['grand_total']:,.2f} ESPEES)",
-            axis=1
-        )
-        
-        return combined_df
-        
-    except Exception as e:
-        st.error(f"Error fetching partner records: {e}")
-        return pd.DataFrame()
+# Fields the dashboard reads, besides id, record_type and submission_date
+ANALYTICS_COLUMNS = [
+    'zone', 'title', 'first_name', 'surname', 'currency', 'original_amount', 'grand_total',
+    *SPONSORSHIP_FIELDS, *EXTERNAL_SPONSORSHIP_FIELDS, 'quantity_sponsored_retail'
+]
 
 def analytics_dashboard(key_prefix=""):
     """Main analytics dashboard function"""
     st.title("Partner Records Analytics")
     
     # Currency selection with unique key
-    available_currencies = ['ESPEES'] + list(CONVERSION_RATES.keys())
     display_currency = st.selectbox(
         "Display amounts in:",
-        available_currencies,
+        CURRENCIES,
         key=f"{key_prefix}_currency_selector"
     )
     
-    partners_df = fetch_all_partner_records()
+    partners_df = load_partner_records(columns=ANALYTICS_COLUMNS)
     
     if not partners_df.empty:
+        # Express ESPEES totals and each record's category amounts in the display currency
+        partners_df['converted_amount'] = convert_amounts(partners_df['grand_total'], 'ESPEES', display_currency)
+        for column in SPONSORSHIP_FIELDS + EXTERNAL_SPONSORSHIP_FIELDS:
+            partners_df[column] = convert_amounts(partners_df[column], partners_df['currency'], display_currency)
+        
+        # Format amount display
+        partners_df['Display Amount'] = format_display_amounts(
+            partners_df['original_amount'], partners_df['currency'],
+            partners_df['converted_amount'], display_currency
+        )
+        
         # Partner type selection with unique key
         partner_types = ["All Partners"] + sorted(partners_df['record_type'].unique().tolist())
         selected_partner_type = st.selectbox(
@@ -117,20 +50,17 @@ def analytics_dashboard(key_prefix=""):
         if selected_partner_type != "All Partners":
             partners_df = partners_df[partners_df['record_type'] == selected_partner_type]
         
-        # Use grand_total for filtering and display
-        partners_df['converted_amount'] = partners_df['grand_total']
-        
         # Filter by amount range
         col1, col2 = st.columns(2)
         with col1:
             min_amount = st.number_input(
-                f"Minimum Amount (ESPEES)",
+                f"Minimum Amount ({display_currency})",
                 value=0.0,
                 step=100.0
             )
         with col2:
             max_amount = st.number_input(
-                f"Maximum Amount (ESPEES)",
+                f"Maximum Amount ({display_currency})",
                 value=float(partners_df['converted_amount'].max()),
                 step=100.0
             )
@@ -235,14 +165,14 @@ def analytics_dashboard(key_prefix=""):
         
         with col5:
             st.metric(
-                f"Total Amount (ESPEES)",
-                f"{filtered_df['grand_total'].sum():,.2f}"
+                f"Total Amount ({display_currency})",
+                f"{filtered_df['converted_amount'].sum():,.2f}"
             )
         
         with col6:
-            avg_amount = filtered_df['grand_total'].sum() / len(filtered_df) if len(filtered_df) > 0 else 0
+            avg_amount = filtered_df['converted_amount'].sum() / len(filtered_df) if len(filtered_df) > 0 else 0
             st.metric(
-                f"Average Amount (ESPEES)",
+                f"Average Amount ({display_currency})",
                 f"{avg_amount:,.2f}"
             )
         
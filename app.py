@@ -9,115 +9,89 @@ import io
 import time
 import struct
 import re
-from partner_records import partner_records_ui, TITLE_OPTIONS, CURRENCIES
-from church_records import church_records_ui, fetch_church_partner_records, CONVERSION_RATES, set_display_currency, convert_to_espees
+from partner_records import (
+    partner_records_ui, TITLE_OPTIONS, CURRENCIES, PARTNER_TABLES, PARTNER_COLUMNS,
+    SPONSORSHIP_FIELDS, partner_column_values, get_partner_record, update_partner_record,
+    load_partner_records, load_partner_page, load_partner_rollup, load_partner_period_totals, run_partner_db_migrations,
+    init_partner_db as init_partner_records_db
+)
+from church_records import church_records_ui, CONVERSION_RATES, set_display_currency, convert_to_espees, convert_amounts, json_column, load_church_rollup, load_church_period_totals, format_display_amounts
 from calendar import month_name
-from analytics import analytics_dashboard, fetch_all_partner_records
+from periods import period_conditions
+from pagination import fetch_report_page, pagination_controls, fetch_page, PAGE_SIZES
+from search import search_records, match_condition, partner_typeahead, fts_query, RECORD_ID_PREFIXES
+from currency import load_conversion_rates
+from recompute import recompute_grand_totals
+from analytics import analytics_dashboard
 from record_templates import record_templates_ui
 from partner_analytics import partner_analytics_ui
 from partner_reports import partner_reports_ui
+from db import (
+    get_connection, transaction, run_migrations, cached_by_data_version,
+    init_databases, database_diagnostics, backup_database, restore_database,
+    remove_database, CONNECTION_PRAGMAS, JOURNAL_MODE
+)
+from users import get_user_details
+from zones import sync_zone_regions
 
 # Database initialization functions
 def init_partner_db():
     """Initialize the partner records database without dropping existing tables"""
     try:
-        conn = sqlite3.connect('partner_records.db')
-        c = conn.cursor()
-        
-        # Create tables if they don't exist (preserves existing data)
-        tables = {
-            'adult_partners': '''CREATE TABLE IF NOT EXISTS adult_partners
-                               (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                record_data TEXT NOT NULL,
-                                submission_date DATETIME NOT NULL)''',
-                                
-            'children_partners': '''CREATE TABLE IF NOT EXISTS children_partners
-                                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                   record_data TEXT NOT NULL,
-                                   submission_date DATETIME NOT NULL)''',
-                                   
-            'teenager_partners': '''CREATE TABLE IF NOT EXISTS teenager_partners
-                                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                   record_data TEXT NOT NULL,
-                                   submission_date DATETIME NOT NULL)''',
-                                   
-            'external_partners': '''CREATE TABLE IF NOT EXISTS external_partners
-                                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                   record_data TEXT NOT NULL,
-                                   submission_date DATETIME NOT NULL)'''
-        }
-        
-        # Create each table if it doesn't exist
-        for create_statement in tables.values():
-            c.execute(create_statement)
-        
-        # Add any necessary indices for performance
-        indices = [
-            'CREATE INDEX IF NOT EXISTS idx_adult_submission_date ON adult_partners(submission_date)',
-            'CREATE INDEX IF NOT EXISTS idx_children_submission_date ON children_partners(submission_date)',
-            'CREATE INDEX IF NOT EXISTS idx_teenager_submission_date ON teenager_partners(submission_date)',
-            'CREATE INDEX IF NOT EXISTS idx_external_submission_date ON external_partners(submission_date)'
-        ]
-        
-        for index in indices:
-            try:
-                c.execute(index)
-            except sqlite3.OperationalError as e:
-                if "already exists" not in str(e):
-                    raise e
-        
-        conn.commit()
+        # partner_records owns the schema: legacy tables are created for old
+        # databases and migrated into the unified partners table
+        init_partner_records_db()
     except Exception as e:
         st.error(f"Error initializing partner database: {e}")
-    finally:
-        conn.close()
 
 def init_db():
     try:
-        conn = sqlite3.connect('users.db')
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS users
-                     (username TEXT PRIMARY KEY,
-                      password TEXT,
-                      full_name TEXT,
-                      email TEXT,
-                      user_group TEXT,
-                      sub_group TEXT,
-                      region TEXT,
-                      zone TEXT)''')
-        conn.commit()
+        with transaction('users') as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS users
+                         (username TEXT PRIMARY KEY,
+                          password TEXT,
+                          full_name TEXT,
+                          email TEXT,
+                          user_group TEXT,
+                          sub_group TEXT,
+                          region TEXT,
+                          zone TEXT)''')
     except sqlite3.Error as e:
         st.error(f"An error occurred while initializing the users database: {e}")
-    finally:
-        conn.close()
 
     try:
-        conn = sqlite3.connect('reports.db')
-        c = conn.cursor()
-        # Create reports table if it doesn't exist
-        c.execute('''CREATE TABLE IF NOT EXISTS reports
-                     (id TEXT PRIMARY KEY,
-                      username TEXT,
-                      zone TEXT,
-                      year INTEGER,
-                      month INTEGER,
-                      report_data TEXT,
-                      submission_date DATETIME)''')
-        
-        # Create users table in reports.db if it doesn't exist
-        c.execute('''CREATE TABLE IF NOT EXISTS users
-                     (username TEXT PRIMARY KEY,
-                      full_name TEXT,
-                      email TEXT,
-                      user_group TEXT,
-                      sub_group TEXT,
-                      region TEXT,
-                      zone TEXT)''')
-        conn.commit()
+        with transaction('reports') as conn:
+            # Create reports table if it doesn't exist
+            conn.execute('''CREATE TABLE IF NOT EXISTS reports
+                         (id TEXT PRIMARY KEY,
+                          username TEXT,
+                          zone TEXT,
+                          year INTEGER,
+                          month INTEGER,
+                          report_data TEXT,
+                          submission_date DATETIME)''')
+            
+            # Create users table in reports.db if it doesn't exist
+            conn.execute('''CREATE TABLE IF NOT EXISTS users
+                         (username TEXT PRIMARY KEY,
+                          full_name TEXT,
+                          email TEXT,
+                          user_group TEXT,
+                          sub_group TEXT,
+                          region TEXT,
+                          zone TEXT)''')
+        
+        # Bring the schema up to date, then fill in regions from zones_data.json
+        # when it changed (not on every rerun)
+        applied = run_migrations('reports', 'reports')
+        if sync_zone_regions('reports', force=bool(applied)):
+            with transaction('reports') as conn:
+                conn.execute("""UPDATE reports SET region =
+                                    (SELECT region FROM zone_regions WHERE zone_regions.zone = reports.zone)
+                                WHERE region IS NOT
+                                    (SELECT region FROM zone_regions WHERE zone_regions.zone = reports.zone)""")
     except sqlite3.Error as e:
         st.error(f"An error occurred while initializing the reports database: {e}")
-    finally:
-        conn.close()
 
 # Add this function to get record_templates_ui
 def get_record_templates_ui():
@@ -156,20 +130,16 @@ def hash_password(password):
 # User registration
 def register_user(username, password, full_name, email, user_group, sub_group, region, zone):
     try:
-        conn = sqlite3.connect('users.db')
-        c = conn.cursor()
         hashed_password = hash_password(password)
-        c.execute("INSERT INTO users (username, password, full_name, email, user_group, sub_group, region, zone) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                  (username, hashed_password, full_name, email, user_group, sub_group, region, zone))
-        conn.commit()
+        with transaction('users') as conn:
+            conn.execute("INSERT INTO users (username, password, full_name, email, user_group, sub_group, region, zone) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      (username, hashed_password, full_name, email, user_group, sub_group, region, zone))
         return True
     except sqlite3.IntegrityError:
         return False
     except sqlite3.Error as e:
         st.error(f"An error occurred while registering the user: {e}")
         return False
-    finally:
-        conn.close()
 
 # User login
 def login_user(username, password):
@@ -182,12 +152,10 @@ def login_user(username, password):
         st.session_state.sub_group = "Admin"
         return True
 
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
+    c = get_connection('users').cursor()
     hashed_password = hash_password(password)
     c.execute("SELECT * FROM users WHERE username=? AND password=?", (username, hashed_password))
     user = c.fetchone()
-    conn.close()
     
     if user:
         st.session_state.logged_in = True
@@ -208,89 +176,66 @@ def login_user(username, password):
 
 # New function to fetch all users
 def fetch_all_users():
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
+    c = get_connection('users').cursor()
     c.execute("SELECT username, full_name, email, user_group, sub_group, region, zone FROM users")
     users = c.fetchall()
-    conn.close()
     return users
 
 # New function to update user
 def update_user(username, full_name, email, user_group, sub_group, region, zone):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("""UPDATE users SET full_name=?, email=?, user_group=?, sub_group=?, region=?, zone=?
-                 WHERE username=?""", (full_name, email, user_group, sub_group, region, zone, username))
-    conn.commit()
-    conn.close()
+    with transaction('users') as conn:
+        conn.execute("""UPDATE users SET full_name=?, email=?, user_group=?, sub_group=?, region=?, zone=?
+                     WHERE username=?""", (full_name, email, user_group, sub_group, region, zone, username))
 
 # New function to delete user
 def delete_user(username):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("DELETE FROM users WHERE username=?", (username,))
-    conn.commit()
-    conn.close()
+    with transaction('users') as conn:
+        conn.execute("DELETE FROM users WHERE username=?", (username,))
+
+def save_report_metrics(conn, report_id, report_json):
+    """Replace a report's report_metrics rows with the numeric values in its report_data"""
+    conn.execute("DELETE FROM report_metrics WHERE report_id = ?", (report_id,))
+    conn.execute("""INSERT INTO report_metrics (report_id, metric, value)
+                    SELECT ?, key, value FROM json_each(?)
+                    WHERE type IN ('integer', 'real', 'true', 'false')""", (report_id, report_json))
 
 # Update the save_report function to remove the table creation
 def save_report(username, zone, year, month, report_data):
     try:
-        conn = sqlite3.connect('reports.db')
-        c = conn.cursor()
         report_json = json.dumps(report_data)
         report_id = f"{year}-{month:02d}-{username}"
 
-        c.execute("""INSERT INTO reports (id, username, zone, year, month, report_data, submission_date)
-                     VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                  (report_id, username, zone, year, month, report_json, datetime.now()))
-        conn.commit()
+        with transaction('reports') as conn:
+            conn.execute("""INSERT INTO reports (id, username, zone, region, year, month, report_data, submission_date)
+                         VALUES (?, ?, ?, (SELECT region FROM zone_regions WHERE zone = ?), ?, ?, ?, ?)""",
+                      (report_id, username, zone, zone, year, month, report_json, datetime.now()))
+            save_report_metrics(conn, report_id, report_json)
         return True, "Report submitted successfully!"
     except sqlite3.IntegrityError:
         # Update existing report
-        c.execute("""UPDATE reports SET zone=?, report_data=?, submission_date=?
-                     WHERE id=? AND username=?""",
-                  (zone, report_json, datetime.now(), report_id, username))
-        conn.commit()
+        with transaction('reports') as conn:
+            conn.execute("""UPDATE reports SET zone=?, region=(SELECT region FROM zone_regions WHERE zone = ?),
+                         report_data=?, submission_date=?
+                         WHERE id=? AND username=?""",
+                      (zone, zone, report_json, datetime.now(), report_id, username))
+            save_report_metrics(conn, report_id, report_json)
         return True, "Existing report updated successfully!"
     except sqlite3.Error as e:
         return False, f"An error occurred while saving the report: {e}"
-    finally:
-        conn.close()
-
-# New function to get user details
-def get_user_details(username):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("SELECT user_group, sub_group, region, zone FROM users WHERE username=?", (username,))
-    user_details = c.fetchone()
-    conn.close()
-    return user_details
 
 # New function to fetch reports
 def fetch_reports(username=None, region=None):
-    conn_reports = sqlite3.connect('reports.db')
-    c_reports = conn_reports.cursor()
+    c_reports = get_connection('reports').cursor()
     if username:
         c_reports.execute("SELECT * FROM reports WHERE username=? ORDER BY id DESC", (username,))
         reports = c_reports.fetchall()
     elif region:
-        # Connect to users.db to get usernames in the region
-        conn_users = sqlite3.connect('users.db')
-        c_users = conn_users.cursor()
-        c_users.execute("SELECT username FROM users WHERE region=? AND user_group='RZM'", (region,))
-        usernames = [row[0] for row in c_users.fetchall()]
-        conn_users.close()
-        if usernames:
-            placeholders = ', '.join(['?'] * len(usernames))
-            query = f"SELECT * FROM reports WHERE username IN ({placeholders}) ORDER BY id DESC"
-            c_reports.execute(query, usernames)
-            reports = c_reports.fetchall()
-        else:
-            reports = []
+        # region is stored with each report (see migrations/reports_001_region.sql)
+        c_reports.execute("SELECT * FROM reports WHERE region=? ORDER BY id DESC", (region,))
+        reports = c_reports.fetchall()
     else:
         c_reports.execute("SELECT * FROM reports ORDER BY id DESC")
         reports = c_reports.fetchall()
-    conn_reports.close()
     return reports
 
 # Add this new function to generate time period options
@@ -310,86 +255,70 @@ def get_time_period_options():
     }
 
 # Add this new function to calculate report metrics
-def calculate_report_metrics(reports):
-    total_reports = len(reports)
-    metrics_sum = {}
-    for report in reports:
-        report_data = json.loads(report[5])  # Assuming report_data is at index 5
-        for key, value in report_data.items():
-            if key in metrics_sum:
-                metrics_sum[key] += int(value)
-            else:
-                metrics_sum[key] = int(value)
+def calculate_report_metrics(region=None, zone=None, period=None):
+    """Count reports and total each metric in SQL, optionally for one region, zone or
+    get_time_period_options() period.
+    
+    Returns (total_reports, {metric: total}) from the report_metrics rows kept by save_report().
+    """
+    conditions, params = period_conditions(period, 'reports') if period else ([], [])
+    for column, value in (('region', region), ('zone', zone)):
+        if value is not None:
+            conditions.append(f"reports.{column} = ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    
+    conn = get_connection('reports')
+    total_reports = conn.execute(f"SELECT COUNT(*) FROM reports {where}", params).fetchone()[0]
+    metrics = conn.execute(f"""SELECT metric, SUM(value) FROM report_metrics
+                               JOIN reports ON reports.id = report_metrics.report_id
+                               {where}
+                               GROUP BY metric ORDER BY metric""", params).fetchall()
+    metrics_sum = {metric: int(total) for metric, total in metrics}
     return total_reports, metrics_sum
 
 # Add these new functions
 def request_edit_permission(username, report_id, reason):
-    conn = sqlite3.connect('edit_requests.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS edit_requests
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  username TEXT,
-                  report_id TEXT,
-                  reason TEXT,
-                  status TEXT,
-                  request_date DATETIME,
-                  expiry_date DATETIME)''')
-    c.execute("INSERT INTO edit_requests (username, report_id, reason, status, request_date) VALUES (?, ?, ?, ?, ?)",
-              (username, report_id, reason, "Pending", datetime.now()))
-    conn.commit()
-    conn.close()
+    with transaction('edit_requests') as conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS edit_requests
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                      username TEXT,
+                      report_id TEXT,
+                      reason TEXT,
+                      status TEXT,
+                      request_date DATETIME,
+                      expiry_date DATETIME)''')
+        conn.execute("INSERT INTO edit_requests (username, report_id, reason, status, request_date) VALUES (?, ?, ?, ?, ?)",
+                  (username, report_id, reason, "Pending", datetime.now()))
 
 def get_edit_requests():
-    conn = sqlite3.connect('edit_requests.db')
-    c = conn.cursor()
+    c = get_connection('edit_requests').cursor()
     c.execute("SELECT * FROM edit_requests WHERE status='Pending'")
     requests = c.fetchall()
-    conn.close()
     return requests
 
 def update_edit_request(request_id, status, expiry_date=None):
-    conn = sqlite3.connect('edit_requests.db')
-    c = conn.cursor()
-    if expiry_date:
-        c.execute("UPDATE edit_requests SET status=?, expiry_date=? WHERE id=?", (status, expiry_date, request_id))
-    else:
-        c.execute("UPDATE edit_requests SET status=? WHERE id=?", (status, request_id))
-    conn.commit()
-    conn.close()
+    with transaction('edit_requests') as conn:
+        if expiry_date:
+            conn.execute("UPDATE edit_requests SET status=?, expiry_date=? WHERE id=?", (status, expiry_date, request_id))
+        else:
+            conn.execute("UPDATE edit_requests SET status=? WHERE id=?", (status, request_id))
 
 def check_edit_permission(username, report_id):
-    conn = sqlite3.connect('edit_requests.db')
-    c = conn.cursor()
+    c = get_connection('edit_requests').cursor()
     c.execute("SELECT * FROM edit_requests WHERE username=? AND report_id=? AND status='Approved' AND expiry_date > ?",
               (username, report_id, datetime.now()))
     permission = c.fetchone()
-    conn.close()
     return permission is not None
 
 # Add this new function to check if a report already exists
 def check_existing_report(username, year, month):
-    conn = sqlite3.connect('reports.db')
-    c = conn.cursor()
+    c = get_connection('reports').cursor()
     report_id = f"{year}-{month:02d}-{username}"
     c.execute("SELECT * FROM reports WHERE id=?", (report_id,))
     existing_report = c.fetchone()
-    conn.close()
     return existing_report is not None
 
-# Add this function to load saved conversion rates
-def load_conversion_rates():
-    try:
-        with open('conversion_rates.json', 'r') as f:
-            rates = json.load(f)
-            # Update the CONVERSION_RATES in church_records
-            for currency, rate in rates.items():
-                CONVERSION_RATES[currency] = rate
-    except FileNotFoundError:
-        # If file doesn't exist, use default rates
-        pass
-    except Exception as e:
-        st.error(f"Error loading conversion rates: {e}")
-
 # Main app
 def main():
     try:
@@ -559,8 +488,7 @@ def display_rzm_overview():
     st.subheader("RZM Overview")
     
     # Fetch all RZM users
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
+    c = get_connection('users').cursor()
     c.execute("""
         SELECT full_name, email, region, zone 
         FROM users 
@@ -568,7 +496,6 @@ def display_rzm_overview():
         ORDER BY region, zone
     """)
     rzms = c.fetchall()
-    conn.close()
     
     if not rzms:
         st.info("No RZMs registered in the system")
@@ -612,10 +539,11 @@ def debug_database_ui():
     st.header("Database Management")
     
     # Create tabs for different database operations
-    debug_tab1, debug_tab2, debug_tab3 = st.tabs([
+    debug_tab1, debug_tab2, debug_tab3, debug_tab4 = st.tabs([
         "View Records", 
         "Database Schema",
-        "Database Operations"
+        "Database Operations",
+        "Diagnostics"
     ])
     
     with debug_tab1:
@@ -637,8 +565,7 @@ def debug_database_ui():
             if st.button("Reinitialize Partner Records DB"):
                 try:
                     # Remove existing database
-                    if os.path.exists('partner_records.db'):
-                        os.remove('partner_records.db')
+                    remove_database('partner_records')
                     
                     # Initialize fresh database
                     from partner_records import init_partner_db
@@ -649,25 +576,13 @@ def debug_database_ui():
             
             if st.button("Run Partner Records Migration"):
                 try:
-                    # Read and execute migration SQL
-                    with open('migrations/add_grand_total_column.sql', 'r') as f:
-                        migration_sql = f.read()
-                    
-                    conn = sqlite3.connect('partner_records.db')
-                    c = conn.cursor()
-                    
-                    # Split and execute each statement
-                    for statement in migration_sql.split(';'):
-                        if statement.strip():
-                            try:
-                                c.execute(statement)
-                            except sqlite3.OperationalError as e:
-                                if "duplicate column" not in str(e).lower():
-                                    raise e
+                    # Apply any versioned migrations not yet run on this database
+                    applied = run_partner_db_migrations()
                     
-                    conn.commit()
-                    conn.close()
-                    st.success("Partner Records migration completed successfully!")
+                    if applied:
+                        st.success(f"Partner Records migration completed successfully! Applied versions: {applied}")
+                    else:
+                        st.success("Partner Records database is already up to date!")
                 except Exception as e:
                     st.error(f"Error running Partner Records migration: {e}")
         
@@ -677,8 +592,7 @@ def debug_database_ui():
             if st.button("Reinitialize Church Records DB"):
                 try:
                     # Remove existing database
-                    if os.path.exists('church_partners.db'):
-                        os.remove('church_partners.db')
+                    remove_database('church_partners')
                     
                     # Initialize fresh database
                     from church_records import init_church_db
@@ -689,28 +603,39 @@ def debug_database_ui():
             
             if st.button("Run Church Records Migration"):
                 try:
-                    # Read and execute migration SQL
-                    with open('migrations/init_church_db.sql', 'r') as f:
-                        migration_sql = f.read()
-                    
-                    conn = sqlite3.connect('church_partners.db')
-                    c = conn.cursor()
-                    
-                    # Split and execute each statement
-                    for statement in migration_sql.split(';'):
-                        if statement.strip():
-                            try:
-                                c.execute(statement)
-                            except sqlite3.OperationalError as e:
-                                if "duplicate column" not in str(e).lower():
-                                    raise e
-                    
-                    conn.commit()
-                    conn.close()
+                    # Recreate the table and replay the versioned migrations
+                    from church_records import run_church_db_migration
+                    success, message = run_church_db_migration()
+                    if not success:
+                        raise Exception(message)
                     st.success("Church Records migration completed successfully!")
                 except Exception as e:
                     st.error(f"Error running Church Records migration: {e}")
         
+        # Rewrite stored totals after conversion rates change
+        st.write("### Recompute ESPEES Totals")
+        st.caption("Recomputes original and ESPEES amounts of partner and church records "
+                   "with the rate in effect on each record's submission date.")
+        recompute_year = st.selectbox(
+            "Records submitted in",
+            ["All years"] + list(range(datetime.now().year, 2019, -1)),
+            key="recompute_year"
+        )
+        if st.button("Recompute Totals"):
+            try:
+                progress_bar = st.progress(0.0)
+                
+                def report(label, done, total):
+                    progress_bar.progress(done / total if total else 1.0, text=f"{label}: {done:,} of {total:,}")
+                
+                updated = recompute_grand_totals(
+                    year=None if recompute_year == "All years" else recompute_year,
+                    progress=report
+                )
+                st.success(", ".join(f"{label}: {count:,} updated" for label, count in updated.items()))
+            except Exception as e:
+                st.error(f"Error recomputing totals: {e}")
+        
         # Add backup/restore functionality
         st.write("### Backup and Restore")
         
@@ -721,15 +646,13 @@ def debug_database_ui():
                 try:
                     backup_time = datetime.now().strftime("%Y%m%d_%H%M%S")
                     
-                    # Backup partner records
+                    # Backup partner records (through SQLite, so WAL contents are included)
                     if os.path.exists('partner_records.db'):
-                        import shutil
-                        shutil.copy2('partner_records.db', f'backups/partner_records_{backup_time}.db')
+                        backup_database('partner_records', f'backups/partner_records_{backup_time}.db')
                     
                     # Backup church records
                     if os.path.exists('church_partners.db'):
-                        import shutil
-                        shutil.copy2('church_partners.db', f'backups/church_partners_{backup_time}.db')
+                        backup_database('church_partners', f'backups/church_partners_{backup_time}.db')
                     
                     st.success(f"Databases backed up successfully! Timestamp: {backup_time}")
                 except Exception as e:
@@ -748,14 +671,18 @@ def debug_database_ui():
                     
                     if st.button("Restore Selected Backup"):
                         try:
-                            import shutil
                             backup_path = os.path.join('backups', selected_backup)
                             
                             # Determine which database to restore
                             if 'partner_records' in selected_backup:
-                                shutil.copy2(backup_path, 'partner_records.db')
+                                restore_database('partner_records', backup_path)
+                                # Older backups still hold the per-type tables
+                                init_partner_db()
                             elif 'church_partners' in selected_backup:
-                                shutil.copy2(backup_path, 'church_partners.db')
+                                restore_database('church_partners', backup_path)
+                                # Older backups may predate the generated columns
+                                from church_records import init_church_db
+                                init_church_db()
                             
                             st.success("Database restored successfully!")
                         except Exception as e:
@@ -769,6 +696,20 @@ def debug_database_ui():
                         st.success("Backups directory created!")
                     except Exception as e:
                         st.error(f"Error creating backups directory: {e}")
+    
+    with debug_tab4:
+        st.subheader("Connection Settings")
+        
+        # Target settings, applied by init_databases() and to every new connection
+        st.write("### Configured")
+        st.json({'journal_mode': JOURNAL_MODE, **CONNECTION_PRAGMAS})
+        
+        # Values read back from each database
+        st.write("### Applied")
+        try:
+            st.dataframe(pd.DataFrame(database_diagnostics()), use_container_width=True)
+        except Exception as e:
+            st.error(f"Error reading database settings: {e}")
 
 # Add this function to handle database purging
 def purge_database_ui():
@@ -811,26 +752,20 @@ def purge_database_ui():
                 st.warning(f"Are you sure you want to purge {selected_partner_type}? Click again to confirm.")
             else:
                 try:
-                    conn = sqlite3.connect('partner_records.db')
-                    c = conn.cursor()
-                    
-                    if selected_partner_type == "All Partner Records":
-                        tables = ['adult_partners', 'children_partners', 'teenager_partners', 'external_partners']
-                        for table in tables:
-                            c.execute(f"DELETE FROM {table}")
-                    else:
-                        table_map = {
-                            'Adult Partners': 'adult_partners',
-                            'Child Partners': 'children_partners',
-                            'Teenager Partners': 'teenager_partners',
-                            'External Partners': 'external_partners'
-                        }
-                        table = table_map.get(selected_partner_type)
-                        if table:
-                            c.execute(f"DELETE FROM {table}")
+                    with transaction('partner_records') as conn:
+                        if selected_partner_type == "All Partner Records":
+                            conn.execute("DELETE FROM partners")
+                        else:
+                            type_map = {
+                                'Adult Partners': 'Adult Partner',
+                                'Child Partners': 'Child Partner',
+                                'Teenager Partners': 'Teenager Partner',
+                                'External Partners': 'External Partner'
+                            }
+                            record_type = type_map.get(selected_partner_type)
+                            if record_type:
+                                conn.execute("DELETE FROM partners WHERE record_type = ?", (record_type,))
                     
-                    conn.commit()
-                    conn.close()
                     st.success(f"Successfully purged {selected_partner_type}")
                     del st.session_state.confirm_purge_partner
                 except Exception as e:
@@ -861,25 +796,21 @@ def purge_database_ui():
                 st.warning(f"Are you sure you want to purge {selected_church_type}? Click again to confirm.")
             else:
                 try:
-                    conn = sqlite3.connect('church_partners.db')
-                    c = conn.cursor()
-                    
-                    if selected_church_type == "All Church Records":
-                        c.execute("DELETE FROM church_partner_records")
-                    else:
-                        record_type_map = {
-                            'Category A Churches': 'Category A',
-                            'Category B Churches': 'Category B',
-                            'Churches': 'Church',
-                            'Cell Records': 'Cell',
-                            'ROR Records': 'ROR'
-                        }
-                        record_type = record_type_map.get(selected_church_type)
-                        if record_type:
-                            c.execute("DELETE FROM church_partner_records WHERE record_type = ?", (record_type,))
+                    with transaction('church_partners') as conn:
+                        if selected_church_type == "All Church Records":
+                            conn.execute("DELETE FROM church_partner_records")
+                        else:
+                            record_type_map = {
+                                'Category A Churches': 'Category A',
+                                'Category B Churches': 'Category B',
+                                'Churches': 'Church',
+                                'Cell Records': 'Cell',
+                                'ROR Records': 'ROR'
+                            }
+                            record_type = record_type_map.get(selected_church_type)
+                            if record_type:
+                                conn.execute("DELETE FROM church_partner_records WHERE record_type = ?", (record_type,))
                     
-                    conn.commit()
-                    conn.close()
                     st.success(f"Successfully purged {selected_church_type}")
                     del st.session_state.confirm_purge_church
                 except Exception as e:
@@ -899,11 +830,8 @@ def purge_database_ui():
                 st.warning("Are you sure you want to purge all user records? Click again to confirm.")
             else:
                 try:
-                    conn = sqlite3.connect('users.db')
-                    c = conn.cursor()
-                    c.execute("DELETE FROM users WHERE username != 'admin'")
-                    conn.commit()
-                    conn.close()
+                    with transaction('users') as conn:
+                        conn.execute("DELETE FROM users WHERE username != 'admin'")
                     st.success("Successfully purged all user records (except admin)")
                     del st.session_state.confirm_purge_users
                 except Exception as e:
@@ -980,13 +908,13 @@ def view_reports_ui_readonly(user_zone):
             # Separate search for edit section
             st.subheader("Edit Financial Records")
             edit_search_term = st.text_input(
-                "Search Record to Edit (ID, Name, Title, Email, Church, Group, Zone, Phone)",
+                "Search Record to Edit (ID or AP_12-style ID, Name, Email, Phone)",
                 key="rzm_partner_edit_search"
             )
             
             edit_results_df = filtered_df
             if edit_search_term:
-                edit_results_df = apply_partner_search(filtered_df, edit_search_term)
+                edit_results_df = partner_edit_matches(edit_search_term, user_zone)
             
             if not edit_results_df.empty:
                 st.write("### Search Results")
@@ -1185,38 +1113,107 @@ def download_excel(df, filename):
 def delete_partner_record(record_id, record_type):
     """Delete a partner record from the appropriate table"""
     try:
-        conn = sqlite3.connect('partner_records.db')
-        c = conn.cursor()
+        if record_type not in PARTNER_TABLES:
+            return False, f"Invalid record type: {record_type}"
         
-        table_name = {
-            'Adult Partner': 'adult_partners',
-            'Child Partner': 'children_partners',
-            'Teenager Partner': 'teenager_partners',
-            'External Partner': 'external_partners'
-        }[record_type]
-        
-        c.execute(f"DELETE FROM {table_name} WHERE id = ?", (record_id,))
-        conn.commit()
+        with transaction('partner_records') as conn:
+            conn.execute("DELETE FROM partners WHERE id = ? AND record_type = ?", (record_id, record_type))
         return True, "Record deleted successfully!"
     except Exception as e:
         return False, f"Error deleting record: {e}"
-    finally:
-        conn.close()
 
 def delete_church_record(record_id):
     """Delete a church record"""
     try:
-        conn = sqlite3.connect('church_partners.db')
-        c = conn.cursor()
-        c.execute("DELETE FROM church_partner_records WHERE id = ?", (record_id,))
-        conn.commit()
+        with transaction('church_partners') as conn:
+            conn.execute("DELETE FROM church_partner_records WHERE id = ?", (record_id,))
         return True, "Record deleted successfully!"
     except Exception as e:
         return False, f"Error deleting record: {e}"
-    finally:
-        conn.close()
 
 # Add new function for full access dashboard
+# Drilldown levels below a region, with their labels
+DRILLDOWN_LEVELS = {'zone': 'Zone', 'group_name': 'Group', 'church': 'Church'}
+
+def display_region_drilldown(region=None):
+    """Show record counts and ESPEES totals by region, then by zone, group and church"""
+    st.subheader("Regional Rollup")
+    source = st.radio("Records", ["Partners", "Churches & Cells", "ROR"],
+                      horizontal=True, key="drilldown_source")
+    
+    def load_rollup(**filters):
+        if source == "Partners":
+            return load_partner_rollup(**filters)
+        return load_church_rollup(ror=(source == "ROR"), **filters)
+    
+    filters = {}
+    if region is None:
+        regions = load_rollup()
+        st.dataframe(regions.rename(columns={'region': 'Region'}), hide_index=True)
+        region = st.selectbox("Region", ["Select..."] + regions['region'].tolist(), key="drilldown_region")
+        if region == "Select...":
+            return
+    filters['region'] = region
+    
+    # Each level's totals, then a selector to drill into one of its rows
+    for level, label in DRILLDOWN_LEVELS.items():
+        rollup = load_rollup(**filters)
+        if rollup.empty:
+            st.info(f"No records found for {' / '.join(filters.values())}")
+            return
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            scope = list(filters.values())[-1] or 'Unassigned'
+            st.metric(f"Records in {scope}", int(rollup['record_count'].sum()))
+        with col2:
+            st.metric("Total ESPEES", f"{rollup['grand_total'].sum():,.2f}")
+        st.dataframe(rollup.rename(columns={level: label}), hide_index=True)
+        
+        if level == 'church':
+            return
+        selected = st.selectbox(label, ["Select..."] + rollup[level].tolist(), key=f"drilldown_{level}")
+        if selected == "Select...":
+            return
+        filters[level] = selected
+
+def display_period_totals(region=None):
+    """Show partner, church, ROR and report totals for one chosen period"""
+    st.subheader("Period Totals")
+    options = get_time_period_options()
+    col1, col2 = st.columns(2)
+    with col1:
+        period_type = st.selectbox("Period Type", list(options), key="period_type")
+    with col2:
+        period = st.selectbox("Period", options[period_type], key="period_value")
+    
+    # Each source is one indexed query on its year/quarter/month columns
+    partners = load_partner_period_totals(period, region=region)
+    churches = load_church_period_totals(period, region=region)
+    rors = load_church_period_totals(period, region=region, ror=True)
+    total_reports, metrics_sum = calculate_report_metrics(region=region, period=period)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Partner ESPEES", f"{partners['grand_total'].sum():,.2f}")
+    with col2:
+        st.metric("Church & Cell ESPEES", f"{churches['grand_total'].sum():,.2f}")
+    with col3:
+        st.metric("ROR ESPEES", f"{rors['grand_total'].sum():,.2f}")
+    with col4:
+        st.metric("Reports", total_reports)
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["Partners", "Churches & Cells", "ROR", "Report Metrics"])
+    with tab1:
+        st.dataframe(partners.rename(columns=lambda column: column.replace('total_', '').replace('_', ' ').title()),
+                     hide_index=True)
+    with tab2:
+        st.dataframe(churches, hide_index=True)
+    with tab3:
+        st.dataframe(rors, hide_index=True)
+    with tab4:
+        st.table(pd.DataFrame(list(metrics_sum.items()), columns=['Metric', 'Total']))
+
 def display_full_access_dashboard():
     try:
         st.write(f"Welcome, {st.session_state.username}!")
@@ -1241,22 +1238,26 @@ def display_full_access_dashboard():
                 st.dataframe(rzm_df)
 
                 # Display regional reports and metrics
-                reports = fetch_reports(region=region)
-                if reports:
-                    total_reports, metrics_sum = calculate_report_metrics(reports)
+                total_reports, metrics_sum = calculate_report_metrics(region=region)
+                if total_reports:
                     st.write(f"Total Reports Submitted in {region}: {total_reports}")
                     st.write("Metrics Summary:")
                     metrics_df = pd.DataFrame(list(metrics_sum.items()), columns=['Metric', 'Total'])
                     st.table(metrics_df)
+                
+                display_region_drilldown(region)
+                display_period_totals(region)
             else:
                 # Display admin/reporting dashboard content
-                reports = fetch_reports()
-                if reports:
-                    total_reports, metrics_sum = calculate_report_metrics(reports)
+                total_reports, metrics_sum = calculate_report_metrics()
+                if total_reports:
                     st.write(f"Total Reports Submitted: {total_reports}")
                     st.write("Overall Metrics Summary:")
                     metrics_df = pd.DataFrame(list(metrics_sum.items()), columns=['Metric', 'Total'])
                     st.table(metrics_df)
+                
+                display_region_drilldown()
+                display_period_totals()
 
         with tab2:
             partner_records_ui()
@@ -1389,13 +1390,16 @@ def view_church_sponsorship_reports(is_admin=False, user_zone=None):
     """View church sponsorship records reports with edit/delete for admin"""
     st.subheader("Church Sponsorship Reports")
     
-    # Display records in dataframe
-    filtered_df = get_filtered_church_records(user_zone)
-    if filtered_df.empty:
+    # Display one page of records in dataframe
+    page_df, total = fetch_report_page(
+        "church_report", lambda page, page_size: get_church_report_page(False, user_zone, None, page, page_size)
+    )
+    if total == 0:
         st.warning("No church sponsorship records found.")
         return
         
-    st.dataframe(filtered_df, use_container_width=True)
+    st.dataframe(page_df, use_container_width=True)
+    pagination_controls("church_report", total)
     
     # Add edit/delete section for admin
     if is_admin:
@@ -1405,17 +1409,12 @@ def view_church_sponsorship_reports(is_admin=False, user_zone=None):
         if 'delete_confirmations' not in st.session_state:
             st.session_state.delete_confirmations = {}
         
-        # Search across multiple fields
+        # Search across multiple fields, one page of results at a time
         search_term = st.text_input("Search by Church Name, Cell Name, Pastor, Leader, Group, or ID", key="church_search")
         if search_term:
-            search_df = filtered_df[
-                filtered_df['Church Name'].str.contains(search_term, case=False, na=False) |
-                filtered_df['Cell Name'].str.contains(search_term, case=False, na=False) |
-                filtered_df['Church Pastor'].str.contains(search_term, case=False, na=False) |
-                filtered_df['Cell Leader'].str.contains(search_term, case=False, na=False) |
-                filtered_df['Group'].str.contains(search_term, case=False, na=False) |
-                filtered_df['ID'].astype(str).str.contains(search_term)
-            ]
+            search_df, search_total = fetch_report_page(
+                "church_search", lambda page, page_size: get_church_report_page(False, user_zone, search_term, page, page_size)
+            )
             
             if not search_df.empty:
                 st.write("Search Results:")
@@ -1453,6 +1452,7 @@ def view_church_sponsorship_reports(is_admin=False, user_zone=None):
                                 if st.button("✗", key=f"cancel_{record_id}"):
                                     st.session_state.delete_confirmations[record_id] = False
                                     st.rerun()
+                pagination_controls("church_search", search_total)
             else:
                 st.info("No records found matching your search.")
 
@@ -1460,13 +1460,16 @@ def view_ror_reports(is_admin=False, user_zone=None):
     """View ROR outreach records reports with edit/delete for admin"""
     st.subheader("ROR Outreaches Reports")
     
-    # Display records in dataframe
-    filtered_df = get_filtered_ror_records(user_zone)
-    if filtered_df.empty:
+    # Display one page of records in dataframe
+    page_df, total = fetch_report_page(
+        "ror_report", lambda page, page_size: get_church_report_page(True, user_zone, None, page, page_size)
+    )
+    if total == 0:
         st.warning("No ROR outreach records found.")
         return
         
-    st.dataframe(filtered_df, use_container_width=True)
+    st.dataframe(page_df, use_container_width=True)
+    pagination_controls("ror_report", total)
     
     # Add edit/delete section for admin
     if is_admin:
@@ -1478,13 +1481,12 @@ def view_ror_reports(is_admin=False, user_zone=None):
         if 'delete_confirmations' not in st.session_state:
             st.session_state.delete_confirmations = {}
         
-        # Search by group name or ID
+        # Search by group name or ID, one page of results at a time
         search_term = st.text_input("Search by Group Name or ID", key="ror_report_search")
         if search_term:
-            search_df = filtered_df[
-                filtered_df['Group'].str.contains(search_term, case=False, na=False) |
-                filtered_df['ID'].astype(str).str.contains(search_term)
-            ]
+            search_df, search_total = fetch_report_page(
+                "ror_search", lambda page, page_size: get_church_report_page(True, user_zone, search_term, page, page_size)
+            )
             
             if not search_df.empty:
                 st.write("Search Results:")
@@ -1627,6 +1629,7 @@ def view_ror_reports(is_admin=False, user_zone=None):
                                 if cancel:
                                     st.session_state.edit_mode[record_id] = False
                                     st.rerun()
+                pagination_controls("ror_search", search_total)
             else:
                 st.info("No records found matching your search.")
 
@@ -1637,27 +1640,19 @@ def church_analytics_ui():
     # Use ESPEES as default currency
     display_currency = 'ESPEES'
     
-    # Fetch church records (excluding ROR)
-    records = fetch_church_partner_records()
-    church_records = [r for r in records if r[1] != "ROR"]
+    # Filter options come straight from the indexed record_type/zone_name columns
+    options_df = fetch_church_record_options()
     
-    if not church_records:
+    if options_df.empty:
         st.warning("No church sponsorship records found.")
         return
-        
-    # Process records into DataFrame
-    df = process_church_records(church_records, display_currency)
-    
-    if df.empty:
-        st.warning("No records found after processing.")
-        return
     
     # Add filters in columns
     col1, col2, col3 = st.columns(3)
     
     with col1:
         # Record type filter
-        record_types = ['All'] + sorted(df['Record Type'].unique().tolist())
+        record_types = ['All'] + sorted(options_df['record_type'].unique().tolist())
         selected_type = st.selectbox(
             "Filter by Record Type", 
             record_types,
@@ -1666,7 +1661,7 @@ def church_analytics_ui():
     
     with col2:
         # Zone filter
-        zones = ['All'] + sorted(df['Zone'].unique().tolist())
+        zones = ['All'] + sorted(options_df['zone_name'].unique().tolist())
         selected_zone = st.selectbox(
             "Filter by Zone", 
             zones,
@@ -1684,27 +1679,13 @@ def church_analytics_ui():
     # Add search filter with expanded functionality
     search_term = st.text_input("Search (Church Name, Pastor, Cell, Leader, Group, Zone)", key="church_analytics_search")
     
-    # Apply filters
-    filtered_df = df.copy()
-    if selected_type != 'All':
-        filtered_df = filtered_df[filtered_df['Record Type'] == selected_type]
-    if selected_zone != 'All':
-        filtered_df = filtered_df[filtered_df['Zone'] == selected_zone]
+    # Apply type and zone filters in SQL
+    filtered_df = fetch_church_analytics_records(selected_type, selected_zone)
+    
     if search_term:
-        # Search across multiple fields
-        filtered_df = filtered_df[
-            filtered_df['Church Name'].str.contains(search_term, case=False, na=False) |
-            filtered_df['Group'].str.contains(search_term, case=False, na=False) |
-            filtered_df['Zone'].str.contains(search_term, case=False, na=False) |
-            filtered_df.apply(lambda row: any(
-                str(val).lower().contains(search_term.lower())
-                for val in [
-                    row.get('Church Pastor', ''),
-                    row.get('Cell Name', ''),
-                    row.get('Cell Leader', '')
-                ]
-            ), axis=1)
-        ]
+        # Search across multiple fields through the full-text index
+        matches = search_records(search_term, types=filtered_df['Record Type'].unique().tolist())
+        filtered_df = filtered_df[filtered_df['ID'].isin([record_id for _, record_id in matches])]
     
     # Prepare display columns based on analysis type
     if analysis_type == "Quantity":
@@ -1715,10 +1696,9 @@ def church_analytics_ui():
             'Submission Date'
         ]
     else:  # Amount
-        filtered_df['Display Amount'] = filtered_df.apply(
-            lambda row: f"{row['Original Amount']:,.2f} {row['Currency']} "
-                       f"({row['Converted Amount']:,.2f} {display_currency})",
-            axis=1
+        filtered_df['Display Amount'] = format_display_amounts(
+            filtered_df['Original Amount'], filtered_df['Currency'],
+            filtered_df['Converted Amount'], display_currency
         )
         display_columns = [
             'Record Type', 'Zone', 'Church Name', 'Group',
@@ -1729,6 +1709,36 @@ def church_analytics_ui():
     st.subheader("Filtered Results")
     st.dataframe(filtered_df[display_columns], use_container_width=True)
 
+# ROR program fields in record_data and their display names
+ROR_PROGRAM_COLUMNS = {
+    'reachout_world_programs': 'Reachout Programs',
+    'rhapathon': 'Rhapathon',
+    'reachout_world_nations': 'World Nations',
+    'say_yes_to_kids': 'Say Yes to Kids',
+    'teevolution': 'Teevolution',
+    'youth_aglow': 'Youth Aglow',
+    'no_one_left_behind': 'No One Left Behind',
+    'penetrating_truth': 'Penetrating Truth',
+    'penetrating_languages': 'Penetrating Languages',
+    'adopt_a_street': 'Adopt a Street'
+}
+
+# Search words shorter than this don't select ROR programs by name
+PROGRAM_SEARCH_MIN_CHARS = 3
+
+def matching_programs(search_term, programs):
+    """Program names in which every word of search_term starts a word, e.g. 'say yes'
+    for 'Say Yes to Kids'; none when a word is shorter than PROGRAM_SEARCH_MIN_CHARS"""
+    if fts_query(search_term) is None:
+        return []
+    words = search_term.lower().split()
+    if any(len(word) < PROGRAM_SEARCH_MIN_CHARS for word in words):
+        return []
+    return [
+        program for program in programs
+        if all(any(name_word.startswith(word) for name_word in program.lower().split()) for word in words)
+    ]
+
 def ror_analytics_ui():
     """Dedicated ROR Analytics Interface"""
     st.title("ROR Outreaches Analytics")
@@ -1736,64 +1746,19 @@ def ror_analytics_ui():
     # Use ESPEES as default currency
     display_currency = 'ESPEES'
     
-    # Fetch ROR records
-    conn = sqlite3.connect('church_partners.db')
-    query = "SELECT * FROM church_partner_records WHERE record_type = 'ROR'"
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    # Zone options come straight from the indexed record_type/zone_name columns
+    zones_df = fetch_ror_zones()
     
-    if df.empty:
+    if zones_df.empty:
         st.warning("No ROR outreach records found.")
         return
     
-    # Process records
-    records_data = []
-    for _, row in df.iterrows():
-        record_data = json.loads(row['record_data'])
-        
-        # Extract base data
-        base_data = {
-            'Zone': record_data.get('zone_name', ''),
-            'Group': record_data.get('group_name', ''),
-            'Total Outreaches': int(record_data.get('total_outreaches', 0)),
-            'Original Amount': float(record_data.get('total_amount', 0)),
-            'Currency': record_data.get('currency', 'ESPEES'),
-            'Submission Date': row['submission_date'],
-            # Program-specific data
-            'Reachout Programs': int(record_data.get('reachout_world_programs', 0)),
-            'Rhapathon': int(record_data.get('rhapathon', 0)),
-            'World Nations': int(record_data.get('reachout_world_nations', 0)),
-            'Say Yes to Kids': int(record_data.get('say_yes_to_kids', 0)),
-            'Teevolution': int(record_data.get('teevolution', 0)),
-            'Youth Aglow': int(record_data.get('youth_aglow', 0)),
-            'No One Left Behind': int(record_data.get('no_one_left_behind', 0)),
-            'Penetrating Truth': int(record_data.get('penetrating_truth', 0)),
-            'Penetrating Languages': int(record_data.get('penetrating_languages', 0)),
-            'Adopt a Street': int(record_data.get('adopt_a_street', 0))
-        }
-        
-        # Convert amount to ESPEES
-        base_data['Converted Amount'] = convert_to_espees(
-            base_data['Original Amount'],
-            base_data['Currency']
-        )
-        
-        # Add formatted amount display
-        base_data['Amount'] = (
-            f"{base_data['Original Amount']:,.2f} {base_data['Currency']} "
-            f"({base_data['Converted Amount']:,.2f} {display_currency})"
-        )
-        
-        records_data.append(base_data)
-    
-    df = pd.DataFrame(records_data)
-    
     # Add filters
     col1, col2, col3 = st.columns(3)
     
     with col1:
         # Zone filter
-        zones = ['All'] + sorted(df['Zone'].unique().tolist())
+        zones = ['All'] + sorted(zones_df['zone_name'].tolist())
         selected_zone = st.selectbox(
             "Filter by Zone", 
             zones,
@@ -1831,10 +1796,18 @@ def ror_analytics_ui():
     # Add search filter with expanded functionality
     search_term = st.text_input("Search (Group Name, Zone, Programs)", key="ror_analytics_search")
     
-    # Apply filters
-    filtered_df = df.copy()
-    if selected_zone != 'All':
-        filtered_df = filtered_df[filtered_df['Zone'] == selected_zone]
+    # Apply the zone filter in SQL
+    filtered_df = fetch_ror_analytics_records(selected_zone)
+    
+    # Convert amount to ESPEES
+    filtered_df['Converted Amount'] = convert_amounts(filtered_df['Original Amount'], filtered_df['Currency'])
+    
+    # Add formatted amount display
+    filtered_df['Amount'] = format_display_amounts(
+        filtered_df['Original Amount'], filtered_df['Currency'],
+        filtered_df['Converted Amount'], display_currency
+    )
+    
     if search_term:
         # Search across multiple fields
         program_columns = [
@@ -1844,16 +1817,13 @@ def ror_analytics_ui():
             'Penetrating Languages', 'Adopt a Street'
         ]
         
+        # Group and zone come from the full-text index; a program name keeps the
+        # records that reached out with that program
+        matches = search_records(search_term, types=['ROR'])
+        matched_programs = matching_programs(search_term, program_columns)
         filtered_df = filtered_df[
-            filtered_df['Group'].str.contains(search_term, case=False, na=False) |
-            filtered_df['Zone'].str.contains(search_term, case=False, na=False) |
-            # Search in program names
-            filtered_df[program_columns].apply(
-                lambda row: any(
-                    col.lower().contains(search_term.lower())
-                    for col in program_columns
-                ), axis=1
-            )
+            filtered_df['ID'].isin([record_id for _, record_id in matches]) |
+            (filtered_df[matched_programs] > 0).any(axis=1)
         ]
     
     # Prepare display columns based on view and analysis type
@@ -1882,45 +1852,89 @@ def ror_analytics_ui():
     st.subheader("Filtered Results")
     st.dataframe(filtered_df[display_columns], use_container_width=True)
 
-def process_church_records(records, display_currency):
-    """Process church records into DataFrame"""
-    records_data = []
-    for record in records:
-        record_id, record_type, record_data, submission_date = record
-        if isinstance(record_data, str):
-            record_data = json.loads(record_data)
-            
-        # Extract common fields
-        base_data = {
-            'ID': record_id,
-            'Record Type': record_type,
-            'Zone': record_data.get('zone_name', ''),
-            'Group': record_data.get('group_name', ''),
-            'Church Name': record_data.get('church_name', ''),
-            'Total Quantity': int(record_data.get('total_quantity', 0)),
-            'Original Amount': float(record_data.get('total_amount', 0)),
-            'Currency': record_data.get('currency', 'ESPEES'),
-            'Submission Date': submission_date
-        }
-        
-        # Add product quantities
-        base_data.update({
-            'Kiddies Products': int(record_data.get('kiddies_products', 0)),
-            'Teevo': int(record_data.get('teevo', 0)),
-            'Braille': int(record_data.get('braille_nolb', 0)),
-            'Languages': int(record_data.get('languages', 0)),
-            'Youth Aglow': int(record_data.get('youth_aglow', 0))
-        })
-        
-        # Convert amount to display currency
-        base_data['Converted Amount'] = convert_to_espees(
-            base_data['Original Amount'],
-            base_data['Currency']
-        )
-        
-        records_data.append(base_data)
-    
-    return pd.DataFrame(records_data)
+@cached_by_data_version('church_partners')
+def fetch_church_record_options():
+    """Distinct record types and zones of church (non-ROR) records, for filter options"""
+    return pd.read_sql_query(
+        """SELECT DISTINCT record_type, COALESCE(zone_name, '') AS zone_name
+           FROM church_partner_records WHERE record_type != 'ROR'""",
+        get_connection('church_partners')
+    )
+
+@cached_by_data_version('church_partners')
+def fetch_ror_zones():
+    """Distinct zones of ROR records, for filter options"""
+    return pd.read_sql_query(
+        """SELECT DISTINCT COALESCE(zone_name, '') AS zone_name
+           FROM church_partner_records WHERE record_type = 'ROR'""",
+        get_connection('church_partners')
+    )
+
+@cached_by_data_version('church_partners')
+def fetch_ror_analytics_records(zone='All'):
+    """Fetch ROR records for analytics, filtered by zone in SQL"""
+    query = f"""SELECT id AS "ID",
+                       COALESCE(zone_name, '') AS "Zone",
+                       group_name AS "Group",
+                       {json_column('total_outreaches')},
+                       total_amount AS "Original Amount",
+                       currency AS "Currency",
+                       submission_date AS "Submission Date",
+                       {', '.join(json_column(field) for field in ROR_PROGRAM_COLUMNS)}
+                FROM church_partner_records
+                WHERE record_type = 'ROR'"""
+    params = []
+    if zone != 'All':
+        query += " AND zone_name = ?"
+        params.append(zone)
+    
+    df = pd.read_sql_query(query, get_connection('church_partners'), params=params)
+    return df.rename(columns={'total_outreaches': 'Total Outreaches', **ROR_PROGRAM_COLUMNS})
+
+@cached_by_data_version('church_partners')
+def read_church_analytics_records(record_type='All', zone='All'):
+    """Read church (non-ROR) records for analytics, filtered by type and zone in SQL"""
+    query = f"""SELECT id AS "ID",
+                       record_type AS "Record Type",
+                       COALESCE(zone_name, '') AS "Zone",
+                       group_name AS "Group",
+                       church_name AS "Church Name",
+                       {json_column('total_quantity')},
+                       total_amount AS "Original Amount",
+                       currency AS "Currency",
+                       submission_date AS "Submission Date",
+                       {json_column('kiddies_products')},
+                       {json_column('teevo')},
+                       {json_column('braille_nolb')},
+                       {json_column('languages')},
+                       {json_column('youth_aglow')}
+                FROM church_partner_records
+                WHERE record_type != 'ROR'"""
+    params = []
+    if record_type != 'All':
+        query += " AND record_type = ?"
+        params.append(record_type)
+    if zone != 'All':
+        query += " AND zone_name = ?"
+        params.append(zone)
+    
+    df = pd.read_sql_query(query, get_connection('church_partners'), params=params)
+    return df.rename(columns={
+        'total_quantity': 'Total Quantity',
+        'kiddies_products': 'Kiddies Products',
+        'teevo': 'Teevo',
+        'braille_nolb': 'Braille',
+        'languages': 'Languages',
+        'youth_aglow': 'Youth Aglow'
+    })
+
+def fetch_church_analytics_records(record_type='All', zone='All'):
+    """Fetch church (non-ROR) records for analytics with amounts converted at the current rates"""
+    df = read_church_analytics_records(record_type, zone)
+    
+    # Convert amount to display currency
+    df['Converted Amount'] = convert_amounts(df['Original Amount'], df['Currency'])
+    return df
 
 def filter_church_records(df, record_type, zone):
     """Apply filters to church records DataFrame"""
@@ -1992,10 +2006,8 @@ def display_amount_analysis(df, currency):
     
     # Display detailed records
     st.subheader("Detailed Records")
-    df['Display Amount'] = df.apply(
-        lambda row: f"{row['Original Amount']:,.2f} {row['Currency']} "
-                   f"({row['Converted Amount']:,.2f} {currency})",
-        axis=1
+    df['Display Amount'] = format_display_amounts(
+        df['Original Amount'], df['Currency'], df['Converted Amount'], currency
     )
     
     display_columns = ['Record Type', 'Zone', 'Church Name', 'Display Amount', 'Submission Date']
@@ -2004,54 +2016,15 @@ def display_amount_analysis(df, currency):
 def get_filtered_partner_records(user_zone=None):
     """Get filtered partner records"""
     try:
-        # Fetch all partner records
-        conn = sqlite3.connect('partner_records.db')
-        
-        # Create a list to store DataFrames from different tables
-        dfs = []
-        
-        # Query each partner table
-        tables = {
-            'adult_partners': 'Adult Partner',
-            'children_partners': 'Child Partner',
-            'teenager_partners': 'Teenager Partner',
-            'external_partners': 'External Partner'
-        }
-        
-        for table, record_type in tables.items():
-            query = f"SELECT * FROM {table}"
-            df = pd.read_sql_query(query, conn)
-            if not df.empty:
-                # Parse record_data JSON
-                df['record_data'] = df['record_data'].apply(json.loads)
-                
-                # Extract fields from record_data
-                df['title'] = df['record_data'].apply(lambda x: x.get('title', ''))
-                df['first_name'] = df['record_data'].apply(lambda x: x.get('first_name', ''))
-                df['surname'] = df['record_data'].apply(lambda x: x.get('surname', ''))
-                df['zone'] = df['record_data'].apply(lambda x: x.get('zone', ''))
-                df['currency'] = df['record_data'].apply(lambda x: x.get('currency', 'ESPEES'))
-                df['original_amount'] = df['record_data'].apply(lambda x: float(x.get('total_amount', 0)))
-                df['grand_total'] = df['record_data'].apply(lambda x: float(x.get('grand_total', 0)))
-                df['record_type'] = record_type
-                
-                # Filter by user zone if specified
-                if user_zone:
-                    df = df[df['zone'] == user_zone]
-                
-                dfs.append(df)
-        
-        conn.close()
+        # Filter by user zone if specified
+        combined_df = load_partner_records(zone=user_zone, columns=[
+            'title', 'first_name', 'surname', 'zone', 'currency', 'original_amount', 'grand_total'
+        ])
         
-        # Combine all DataFrames
-        if dfs:
-            combined_df = pd.concat(dfs, ignore_index=True)
-            
+        if not combined_df.empty:
             # Format display columns
-            combined_df['Amount'] = combined_df.apply(
-                lambda row: f"{float(row['original_amount']):,.2f} {row['currency']} "
-                          f"({float(row['grand_total']):,.2f} ESPEES)",
-                axis=1
+            combined_df['Amount'] = format_display_amounts(
+                combined_df['original_amount'], combined_df['currency'], combined_df['grand_total']
             )
             
             # Select display columns
@@ -2066,108 +2039,128 @@ def get_filtered_partner_records(user_zone=None):
         st.error(f"Error getting partner records: {e}")
         return pd.DataFrame()
 
+def church_report_query(ror, user_zone=None, search=None):
+    """SELECT and parameters for the church (ror=False) or ROR report tables"""
+    if ror:
+        query = f"""SELECT id AS "ID",
+                           COALESCE(zone_name, '') AS "Zone",
+                           group_name AS "Group",
+                           {json_column('total_outreaches')},
+                           total_amount, currency, grand_total,
+                           {', '.join(json_column(field) for field in ROR_PROGRAM_COLUMNS)},
+                           submission_date AS "Submission Date"
+                    FROM church_partner_records WHERE record_type = 'ROR'"""
+    else:
+        query = f"""SELECT id AS "ID",
+                           record_type AS "Record Type",
+                           COALESCE(zone_name, '') AS "Zone",
+                           group_name AS "Group",
+                           church_name AS "Church Name",
+                           {json_column('church_pastor', '')},
+                           {json_column('cell_name', '')},
+                           {json_column('cell_leader', '')},
+                           {json_column('total_quantity')},
+                           total_amount, currency, grand_total,
+                           submission_date AS "Submission Date"
+                    FROM church_partner_records WHERE record_type != 'ROR'"""
+    params = []
+    
+    # Filter by user zone if specified (uses idx_church_records_zone_type)
+    if user_zone:
+        query += " AND zone_name = ?"
+        params.append(user_zone)
+    if search and search.strip():
+        condition, search_params = match_condition('church_partners', search)
+        query += f" AND {condition}"
+        params.extend(search_params)
+    return query, params
+
+def format_church_report(df, ror):
+    """Shape church or ROR report rows for display"""
+    if df.empty:
+        return pd.DataFrame()
+    
+    # Format record data
+    df['Amount'] = (
+        df['total_amount'].map('{:,.2f}'.format) + ' ' + df['currency'] +
+        ' (' + df['grand_total'].map('{:,.2f}'.format) + ' ESPEES)'
+    )
+    if ror:
+        df = df.rename(columns={'total_outreaches': 'Total Outreaches', **ROR_PROGRAM_COLUMNS})
+        return df[
+            ['ID', 'Zone', 'Group', 'Total Outreaches', 'Amount'] +
+            list(ROR_PROGRAM_COLUMNS.values()) + ['Submission Date']
+        ]
+    
+    df = df.rename(columns={
+        'church_pastor': 'Church Pastor',
+        'cell_name': 'Cell Name',
+        'cell_leader': 'Cell Leader',
+        'total_quantity': 'Total Quantity'
+    })
+    return df[[
+        'ID', 'Record Type', 'Zone', 'Group', 'Church Name', 'Church Pastor',
+        'Cell Name', 'Cell Leader', 'Total Quantity', 'Amount', 'Submission Date'
+    ]]
+
+def partner_edit_matches(search_term, user_zone=None):
+    """Typeahead matches for an edit picker: up to 20 partners whose name, email,
+    phone number or record id (e.g. AP_12) starts with search_term"""
+    return pd.DataFrame(
+        partner_typeahead(search_term, zone=user_zone),
+        columns=['id', 'record_type', 'title', 'first_name', 'surname', 'zone']
+    )
+
+def apply_partner_search(df, search_term):
+    """Keep the partner records in df (with an id column) that match search_term"""
+    matches = search_records(search_term, types=list(PARTNER_TABLES))
+    return df[df['id'].isin([record_id for _, record_id in matches])]
+
+@cached_by_data_version('church_partners')
 def get_filtered_church_records(user_zone=None):
     """Get filtered church records"""
     try:
         # Fetch church records (excluding ROR)
-        conn = sqlite3.connect('church_partners.db')
-        query = "SELECT * FROM church_partner_records WHERE record_type != 'ROR'"
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        if df.empty:
-            return pd.DataFrame()
-        
-        # Process records
-        records_data = []
-        for _, row in df.iterrows():
-            record_data = json.loads(row['record_data'])
-            
-            # Filter by user zone if specified
-            if user_zone and record_data.get('zone_name') != user_zone:
-                continue
-            
-            # Format record data
-            base_data = {
-                'ID': row['id'],
-                'Record Type': row['record_type'],
-                'Zone': record_data.get('zone_name', ''),
-                'Group': record_data.get('group_name', ''),
-                'Church Name': record_data.get('church_name', ''),
-                'Church Pastor': record_data.get('church_pastor', ''),
-                'Cell Name': record_data.get('cell_name', ''),
-                'Cell Leader': record_data.get('cell_leader', ''),
-                'Total Quantity': record_data.get('total_quantity', 0),
-                'Amount': f"{float(record_data.get('total_amount', 0)):,.2f} {record_data.get('currency', 'ESPEES')} "
-                         f"({float(record_data.get('grand_total', 0)):,.2f} ESPEES)",
-                'Submission Date': row['submission_date']
-            }
-            records_data.append(base_data)
-        
-        return pd.DataFrame(records_data)
+        query, params = church_report_query(False, user_zone)
+        df = pd.read_sql_query(query, get_connection('church_partners'), params=params)
+        return format_church_report(df, ror=False)
     except Exception as e:
         st.error(f"Error getting church records: {e}")
         return pd.DataFrame()
 
+@cached_by_data_version('church_partners')
 def get_filtered_ror_records(user_zone=None):
     """Get filtered ROR records"""
     try:
         # Fetch only ROR records
-        conn = sqlite3.connect('church_partners.db')
-        query = "SELECT * FROM church_partner_records WHERE record_type = 'ROR'"
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        if df.empty:
-            return pd.DataFrame()
-        
-        # Process records
-        records_data = []
-        for _, row in df.iterrows():
-            record_data = json.loads(row['record_data'])
-            
-            # Filter by user zone if specified
-            if user_zone and record_data.get('zone_name') != user_zone:
-                continue
-            
-            records_data.append({
-                'ID': row['id'],
-                'Zone': record_data.get('zone_name', ''),
-                'Group': record_data.get('group_name', ''),
-                'Total Outreaches': record_data.get('total_outreaches', 0),
-                'Amount': f"{float(record_data.get('total_amount', 0)):,.2f} {record_data.get('currency', 'ESPEES')} "
-                         f"({float(record_data.get('grand_total', 0)):,.2f} ESPEES)",
-                'Reachout Programs': record_data.get('reachout_world_programs', 0),
-                'Rhapathon': record_data.get('rhapathon', 0),
-                'World Nations': record_data.get('reachout_world_nations', 0),
-                'Say Yes to Kids': record_data.get('say_yes_to_kids', 0),
-                'Teevolution': record_data.get('teevolution', 0),
-                'Youth Aglow': record_data.get('youth_aglow', 0),
-                'No One Left Behind': record_data.get('no_one_left_behind', 0),
-                'Penetrating Truth': record_data.get('penetrating_truth', 0),
-                'Penetrating Languages': record_data.get('penetrating_languages', 0),
-                'Adopt a Street': record_data.get('adopt_a_street', 0),
-                'Submission Date': row['submission_date']
-            })
-        
-        return pd.DataFrame(records_data)
+        query, params = church_report_query(True, user_zone)
+        df = pd.read_sql_query(query, get_connection('church_partners'), params=params)
+        return format_church_report(df, ror=True)
     except Exception as e:
         st.error(f"Error getting ROR records: {e}")
         return pd.DataFrame()
 
-def fetch_church_partner_records():
-    """Fetch all church partner records including ROR"""
+@cached_by_data_version('church_partners')
+def get_church_report_page(ror=False, user_zone=None, search=None, page=1, page_size=PAGE_SIZES[0]):
+    """One page of church (or ROR) report rows, newest first, and the number of matching records"""
     try:
-        conn = sqlite3.connect('church_partners.db')
-        c = conn.cursor()
-        c.execute("""SELECT id, record_type, record_data, submission_date 
-                    FROM church_partner_records""")
-        records = c.fetchall()
-        conn.close()
-        return records
+        query, params = church_report_query(ror, user_zone, search)
+        df, total = fetch_page('church_partners', query, params, page, page_size)
+        return format_church_report(df, ror), total
     except Exception as e:
-        st.error(f"Error fetching church partner records: {e}")
-        return []
+        st.error(f"Error getting {'ROR' if ror else 'church'} records: {e}")
+        return pd.DataFrame(), 0
+
+def get_partner_report_page(user_zone=None, search=None, page=1, page_size=PAGE_SIZES[0]):
+    """One page of partner report rows, newest first, and the number of matching records"""
+    df, total = load_partner_page(zone=user_zone, search=search, page=page, page_size=page_size, columns=[
+        'title', 'first_name', 'surname', 'zone', 'currency', 'original_amount', 'grand_total'
+    ])
+    if df.empty:
+        return pd.DataFrame(), total
+    
+    df['Amount'] = format_display_amounts(df['original_amount'], df['currency'], df['grand_total'])
+    return df[['id', 'record_type', 'title', 'first_name', 'surname', 'zone', 'Amount', 'submission_date']], total
 
 def analytics_dashboard():
     """Partner analytics dashboard"""
@@ -2177,21 +2170,15 @@ def analytics_dashboard():
     display_currency = 'ESPEES'
     
     # Fetch all partner records
-    df = fetch_all_partner_records()
+    df = load_partner_records()
     
     if df.empty:
         st.warning("No partner records found.")
         return
     
-    # Extract fields from record_data
-    df['wonder_challenge'] = df['record_data'].apply(lambda x: float(x.get('total_wonder_challenge', 0)))
-    df['rhapsody_languages'] = df['record_data'].apply(lambda x: float(x.get('total_rhapsody_languages', 0)))
-    df['kiddies_products'] = df['record_data'].apply(lambda x: float(x.get('total_kiddies_products', 0)))
-    df['teevo'] = df['record_data'].apply(lambda x: float(x.get('total_teevo', 0)))
-    df['braille_nolb'] = df['record_data'].apply(lambda x: float(x.get('total_braille_nolb', 0)))
-    df['youth_aglow'] = df['record_data'].apply(lambda x: float(x.get('total_youth_aglow', 0)))
-    df['local_distribution'] = df['record_data'].apply(lambda x: float(x.get('total_local_distribution', 0)))
-    df['subscriptions_dubais'] = df['record_data'].apply(lambda x: float(x.get('total_subscriptions_dubais', 0)))
+    # Sponsorship amounts come straight from the typed columns
+    for field in SPONSORSHIP_FIELDS:
+        df[field.replace('total_', '', 1)] = df[field]
     
     # Add filters in columns
     col1, col2, col3 = st.columns(3)
@@ -2232,20 +2219,8 @@ def analytics_dashboard():
     if selected_zone != 'All':
         filtered_df = filtered_df[filtered_df['zone'] == selected_zone]
     if search_term:
-        # Search across multiple fields
-        filtered_df = filtered_df[
-            filtered_df['id'].astype(str).str.contains(search_term, case=False, na=False) |
-            filtered_df['first_name'].str.contains(search_term, case=False, na=False) |
-            filtered_df['surname'].str.contains(search_term, case=False, na=False) |
-            filtered_df['title'].str.contains(search_term, case=False, na=False) |
-            filtered_df['zone'].str.contains(search_term, case=False, na=False) |
-            filtered_df['record_data'].apply(lambda x: 
-                str(x.get('email', '')).lower().contains(search_term.lower()) or
-                str(x.get('church', '')).lower().contains(search_term.lower()) or
-                str(x.get('group', '')).lower().contains(search_term.lower()) or
-                str(x.get('kingschat_phone', '')).lower().contains(search_term.lower())
-            )
-        ]
+        # Search across multiple fields through the full-text index
+        filtered_df = apply_partner_search(filtered_df, search_term)
     
     # Prepare display columns based on analysis type
     if analysis_type == "Quantity":
@@ -2256,10 +2231,9 @@ def analytics_dashboard():
             'subscriptions_dubais', 'submission_date'
         ]
     else:  # Amount
-        filtered_df['Display Amount'] = filtered_df.apply(
-            lambda row: f"{row['original_amount']:,.2f} {row['currency']} "
-                       f"({row['grand_total']:,.2f} {display_currency})",
-            axis=1
+        filtered_df['Display Amount'] = format_display_amounts(
+            filtered_df['original_amount'], filtered_df['currency'],
+            filtered_df['grand_total'], display_currency
         )
         display_columns = [
             'record_type', 'title', 'first_name', 'surname', 'zone',
@@ -2274,31 +2248,20 @@ def view_partner_reports(is_admin=False, user_zone=None):
     """View partner records reports with financial edit for admin"""
     st.subheader("Partner Reports")
     
-    # Display records in dataframe
-    filtered_df = get_filtered_partner_records(user_zone)
-    if filtered_df.empty:
-        st.warning("No partner records found.")
-        return
-        
-    # Enhanced search functionality
+    # Enhanced search functionality, matched in SQL
     search_term = st.text_input("Search by ID, Name, Title, Email, Church, Group, Zone, Phone", 
                                key="admin_partner_search")
-    if search_term:
-        filtered_df = filtered_df[
-            filtered_df['id'].astype(str).str.contains(search_term, case=False, na=False) |
-            filtered_df['first_name'].str.contains(search_term, case=False, na=False) |
-            filtered_df['surname'].str.contains(search_term, case=False, na=False) |
-            filtered_df['title'].str.contains(search_term, case=False, na=False) |
-            filtered_df['zone'].str.contains(search_term, case=False, na=False) |
-            filtered_df['record_data'].apply(lambda x: 
-                str(x.get('email', '')).lower().contains(search_term.lower()) or
-                str(x.get('church', '')).lower().contains(search_term.lower()) or
-                str(x.get('group', '')).lower().contains(search_term.lower()) or
-                str(x.get('kingschat_phone', '')).lower().contains(search_term.lower())
-            )
-        ]
     
-    st.dataframe(filtered_df, use_container_width=True)
+    # Display one page of records in dataframe
+    page_df, total = fetch_report_page(
+        "admin_partner_report", lambda page, page_size: get_partner_report_page(user_zone, search_term, page, page_size)
+    )
+    if total == 0 and not search_term:
+        st.warning("No partner records found.")
+        return
+    
+    st.dataframe(page_df, use_container_width=True)
+    pagination_controls("admin_partner_report", total)
     
     # Add financial edit section for admin
     if is_admin:
@@ -2306,13 +2269,20 @@ def view_partner_reports(is_admin=False, user_zone=None):
         
         # Add search functionality for editing
         edit_search_term = st.text_input(
-            "Search Record to Edit (ID, Name, Title, Email, Church, Group, Zone, Phone)",
+            "Search Record to Edit (ID or AP_12-style ID, Name, Email, Phone)",
             key="admin_edit_search"
         )
         
-        edit_results_df = filtered_df
+        # Typeahead matches for the edit search, otherwise one page of records at a
+        # time, keep the number of Edit buttons bounded
+        edit_total = None
         if edit_search_term:
-            edit_results_df = apply_partner_search(filtered_df, edit_search_term)
+            edit_results_df = partner_edit_matches(edit_search_term, user_zone)
+        else:
+            edit_results_df, edit_total = fetch_report_page(
+                "admin_partner_edit",
+                lambda page, page_size: get_partner_report_page(user_zone, search_term, page, page_size)
+            )
         
         if not edit_results_df.empty:
             st.write("### Search Results")
@@ -2332,6 +2302,8 @@ def view_partner_reports(is_admin=False, user_zone=None):
                     if st.button("Edit", key=f"admin_edit_btn_{unique_id}"):
                         st.session_state.admin_editing_record = record_id
                         st.session_state.admin_editing_type = row['record_type']
+            if edit_total is not None:
+                pagination_controls("admin_partner_edit", edit_total)
             
             # Show edit form if a record is selected
             if hasattr(st.session_state, 'admin_editing_record'):
@@ -2428,12 +2400,7 @@ def view_partner_reports(is_admin=False, user_zone=None):
 # Add this helper function to generate unique record identifier
 def get_unique_record_id(record_id, record_type):
     """Generate a unique identifier combining record ID and type"""
-    type_prefix = {
-        'Adult Partner': 'AP',
-        'Child Partner': 'CP',
-        'Teenager Partner': 'TP',
-        'External Partner': 'EP'
-    }.get(record_type, 'XX')
+    type_prefix = RECORD_ID_PREFIXES.get(record_type, 'XX')
     return f"{type_prefix}_{record_id}"
 
 # Modify the search results display in view_reports_ui_readonly
@@ -2441,44 +2408,40 @@ def view_reports_ui_readonly(user_zone):
     """View reports interface for RZMs with financial edit capability"""
     st.subheader("View Reports")
     
-    # Display records in dataframe
-    filtered_df = get_filtered_partner_records(user_zone)
-    if filtered_df.empty:
-        st.warning("No partner records found.")
-        return
-    
-    # Enhanced search functionality
+    # Enhanced search functionality, matched in SQL
     search_term = st.text_input("Search by ID, Name, Title, Email, Church, Group, Zone, Phone", 
                                key="rzm_partner_search")
-    if search_term:
-        filtered_df = filtered_df[
-            filtered_df['id'].astype(str).str.contains(search_term, case=False, na=False) |
-            filtered_df['first_name'].str.contains(search_term, case=False, na=False) |
-            filtered_df['surname'].str.contains(search_term, case=False, na=False) |
-            filtered_df['title'].str.contains(search_term, case=False, na=False) |
-            filtered_df['zone'].str.contains(search_term, case=False, na=False) |
-            filtered_df['record_data'].apply(lambda x: 
-                str(x.get('email', '')).lower().contains(search_term.lower()) or
-                str(x.get('church', '')).lower().contains(search_term.lower()) or
-                str(x.get('group', '')).lower().contains(search_term.lower()) or
-                str(x.get('kingschat_phone', '')).lower().contains(search_term.lower())
-            )
-        ]
     
-    st.dataframe(filtered_df, use_container_width=True)
+    # Display one page of records in dataframe
+    page_df, total = fetch_report_page(
+        "rzm_partner_report", lambda page, page_size: get_partner_report_page(user_zone, search_term, page, page_size)
+    )
+    if total == 0 and not search_term:
+        st.warning("No partner records found.")
+        return
+    
+    st.dataframe(page_df, use_container_width=True)
+    pagination_controls("rzm_partner_report", total)
     
     # Add financial edit section for RZMs
     st.subheader("Edit Financial Records")
     
     # Add search functionality for editing
     edit_search_term = st.text_input(
-        "Search Record to Edit (ID, Name, Title, Email, Church, Group, Zone, Phone)",
+        "Search Record to Edit (ID or AP_12-style ID, Name, Email, Phone)",
         key="rzm_edit_search"
     )
     
-    edit_results_df = filtered_df
+    # Typeahead matches for the edit search, otherwise one page of records at a
+    # time, keep the number of Edit buttons bounded
+    edit_total = None
     if edit_search_term:
-        edit_results_df = apply_partner_search(filtered_df, edit_search_term)
+        edit_results_df = partner_edit_matches(edit_search_term, user_zone)
+    else:
+        edit_results_df, edit_total = fetch_report_page(
+            "rzm_partner_edit",
+            lambda page, page_size: get_partner_report_page(user_zone, search_term, page, page_size)
+        )
     
     if not edit_results_df.empty:
         st.write("### Search Results")
@@ -2498,6 +2461,8 @@ def view_reports_ui_readonly(user_zone):
                 if st.button("Edit", key=f"edit_btn_{unique_id}"):
                     st.session_state.editing_record = record_id
                     st.session_state.editing_type = row['record_type']
+        if edit_total is not None:
+            pagination_controls("rzm_partner_edit", edit_total)
         
         # Show edit form if a record is selected
         if hasattr(st.session_state, 'editing_record'):
@@ -2591,110 +2556,17 @@ def view_reports_ui_readonly(user_zone):
                         else:
                             st.error(message)
 
-# Also add these helper functions for partner record operations
-def get_partner_record(record_id, record_type):
-    """Fetch a specific partner record"""
-    try:
-        conn = sqlite3.connect('partner_records.db')
-        c = conn.cursor()
-        
-        table_map = {
-            'Adult Partner': 'adult_partners',
-            'Child Partner': 'children_partners',
-            'Teenager Partner': 'teenager_partners',
-            'External Partner': 'external_partners'
-        }
-        
-        table_name = table_map.get(record_type)
-        if not table_name:
-            return None
-            
-        c.execute(f"""SELECT record_data 
-                    FROM {table_name} 
-                    WHERE id = ?""", 
-                 (record_id,))
-        record = c.fetchone()
-        conn.close()
-        
-        if record:
-            return json.loads(record[0])
-        return None
-    except Exception as e:
-        st.error(f"Error fetching partner record: {e}")
-        return None
-
-def update_partner_record(record_id, record_type, updated_data):
-    """Update an existing partner record"""
-    try:
-        conn = sqlite3.connect('partner_records.db')
-        c = conn.cursor()
-        
-        table_map = {
-            'Adult Partner': 'adult_partners',
-            'Child Partner': 'children_partners',
-            'Teenager Partner': 'teenager_partners',
-            'External Partner': 'external_partners'
-        }
-        
-        table_name = table_map.get(record_type)
-        if not table_name:
-            return False, "Invalid record type"
-        
-        # Calculate totals and convert currency
-        original_amount = sum([
-            float(updated_data.get('total_wonder_challenge', 0)),
-            float(updated_data.get('total_rhapsody_languages', 0)),
-            float(updated_data.get('total_kiddies_products', 0)),
-            float(updated_data.get('total_teevo', 0)),
-            float(updated_data.get('total_braille_nolb', 0)),
-            float(updated_data.get('total_youth_aglow', 0)),
-            float(updated_data.get('total_local_distribution', 0)),
-            float(updated_data.get('total_subscriptions_dubais', 0))
-        ])
-        
-        grand_total = convert_to_espees(original_amount, updated_data['currency'])
-        
-        # Add calculated totals to updated data
-        updated_data.update({
-            'original_amount': original_amount,
-            'grand_total': grand_total
-        })
-        
-        # Convert data to JSON string
-        record_json = json.dumps(updated_data)
-        
-        # Update the record
-        c.execute(f"""UPDATE {table_name} 
-                    SET record_data = ?, 
-                        submission_date = CURRENT_TIMESTAMP
-                    WHERE id = ?""",
-                 (record_json, record_id))
-        
-        conn.commit()
-        conn.close()
-        return True, "Record updated successfully!"
-    except Exception as e:
-        return False, f"Error updating record: {e}"
-
 def edit_financial_record(record_id, record_type, updated_amounts):
     """Edit financial amounts for a partner record"""
     try:
-        conn = sqlite3.connect('partner_records.db')
-        c = conn.cursor()
+        c = get_connection('partner_records').cursor()
         
         # Get the current record data
-        table_map = {
-            'Adult Partner': 'adult_partners',
-            'Child Partner': 'children_partners',
-            'Teenager Partner': 'teenager_partners',
-            'External Partner': 'external_partners'
-        }
-        
-        table_name = table_map.get(record_type)
-        if not table_name:
+        if record_type not in PARTNER_TABLES:
             return False, "Invalid record type"
             
-        c.execute(f"SELECT record_data FROM {table_name} WHERE id = ?", (record_id,))
+        c.execute("SELECT record_data FROM partners WHERE id = ? AND record_type = ?",
+                  (record_id, record_type))
         record = c.fetchone()
         
         if not record:
@@ -2715,22 +2587,23 @@ def edit_financial_record(record_id, record_type, updated_amounts):
         record_data['original_amount'] = original_amount
         record_data['grand_total'] = grand_total
         
-        # Save updated record
+        # Save updated record along with its typed columns
         record_json = json.dumps(record_data)
-        c.execute(f"""UPDATE {table_name} 
-                    SET record_data = ?, 
-                        submission_date = CURRENT_TIMESTAMP
-                    WHERE id = ?""",
-                 (record_json, record_id))
-        
-        conn.commit()
-        conn.close()
+        assignments = ', '.join(f"{column} = ?" for column in PARTNER_COLUMNS)
+        with transaction('partner_records') as conn:
+            conn.execute(f"""UPDATE partners 
+                        SET record_data = ?, 
+                            submission_date = CURRENT_TIMESTAMP,
+                            {assignments}
+                        WHERE id = ? AND record_type = ?""",
+                     (record_json, *partner_column_values(record_data), record_id, record_type))
         return True, "Financial records updated successfully!"
     except Exception as e:
         return False, f"Error updating financial records: {e}"
 
 if __name__ == "__main__":
     try:
+        init_databases()
         init_db()
         init_partner_db()
         load_conversion_rates()  # Add this line to load saved rates
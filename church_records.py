@@ -1,30 +1,37 @@
 import streamlit as st
 import sqlite3
 import json
+import math
 from datetime import datetime
 import pandas as pd
+import numpy as np
 import io
+from db import get_connection, transaction, run_migrations, cached_by_data_version
+from users import get_user_details
+from zones import load_zones_data, sync_zone_regions
+from periods import period_conditions
+from currency import CURRENCIES, CONVERSION_RATES, convert_amounts, convert_amounts_as_of, convert_to_espees, load_conversion_rates
 
 # Database initialization
 def init_church_db():
     """Initialize the church partners database with proper schema"""
     try:
-        conn = sqlite3.connect('church_partners.db')
-        c = conn.cursor()
-        
-        # Create the table if it doesn't exist
-        c.execute('''CREATE TABLE IF NOT EXISTS church_partner_records
-                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                      record_type TEXT NOT NULL,
-                      record_data TEXT NOT NULL,
-                      submission_date DATETIME NOT NULL)''')
-        
-        conn.commit()
+        with transaction('church_partners') as conn:
+            # Create the table if it doesn't exist
+            conn.execute('''CREATE TABLE IF NOT EXISTS church_partner_records
+                         (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                          record_type TEXT NOT NULL,
+                          record_data TEXT NOT NULL,
+                          submission_date DATETIME NOT NULL)''')
+        
+        # Bring the schema up to date
+        applied = run_church_db_migrations()
+        
+        # Regions for the rollups, from zones_data.json when it changed
+        sync_zone_regions('church_partners', force=bool(applied))
         return True, "Database initialized successfully!"
     except Exception as e:
         return False, f"Error initializing database: {e}"
-    finally:
-        conn.close()
 
 # Add this function to run migrations
 def run_church_db_migration():
@@ -34,21 +41,61 @@ def run_church_db_migration():
         with open('migrations/init_church_db.sql', 'r') as f:
             migration_sql = f.read()
         
-        # Connect to database and execute migration
-        conn = sqlite3.connect('church_partners.db')
-        c = conn.cursor()
-        
-        # Split and execute each statement
-        for statement in migration_sql.split(';'):
-            if statement.strip():
-                c.execute(statement)
+        with transaction('church_partners') as conn:
+            # Split and execute each statement
+            for statement in migration_sql.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+            
+            # The table was recreated, so replay the versioned migrations
+            conn.execute("PRAGMA user_version = 0")
         
-        conn.commit()
-        conn.close()
+        run_church_db_migrations()
         return True, "Migration completed successfully!"
     except Exception as e:
         return False, f"Migration failed: {e}"
 
+def json_column(field, default=0):
+    """SQL expression selecting a record_data field (or a default) under its own name"""
+    return f"COALESCE(json_extract(record_data, '$.{field}'), {default!r}) AS {field}"
+
+def json_safe(value):
+    """Convert values that JSON/SQLite can't store (NaN, timestamps) to storable ones"""
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return None if pd.isna(value) else value.isoformat()
+    return value
+
+def repair_record_json(conn, table):
+    """Rewrite record_data blobs that SQLite's JSON functions cannot parse"""
+    try:
+        rows = conn.execute(
+            f"SELECT id, record_data FROM {table} WHERE NOT json_valid(record_data)"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return
+    
+    repaired = []
+    for record_id, record_data in rows:
+        try:
+            data = json.loads(record_data)
+        except ValueError:
+            continue
+        repaired.append((json.dumps({key: json_safe(value) for key, value in data.items()}), record_id))
+    
+    if repaired:
+        conn.executemany(f"UPDATE {table} SET record_data = ? WHERE id = ?", repaired)
+        conn.commit()
+
+def run_church_db_migrations():
+    """Apply versioned church migrations (migrations/church_NNN_*.sql) not yet applied"""
+    # Generated columns use json_extract, which rejects the NaN older uploads wrote
+    return run_migrations(
+        'church_partners', 'church',
+        before=lambda conn: repair_record_json(conn, 'church_partner_records')
+    )
+
 # Update the main initialization code
 def initialize_database():
     """Complete database initialization and migration"""
@@ -64,10 +111,13 @@ def initialize_database():
     
     return True
 
-# Function to save church partner record
-def save_church_partner_record(record_type, record_data):
-    """Save church partner record with currency conversion"""
-    try:
+def church_record_row(record_type, record_data, amounts_computed=False, row_hash=None):
+    """Compute amounts for a church record and return its church_partner_records row.
+    
+    With amounts_computed, original_amount and grand_total are taken as already set.
+    row_hash is the uploaded row's hash (see uploads.record_hashes), if any.
+    """
+    if not amounts_computed:
         # Calculate original amount and converted amount (ESPEES)
         currency = record_data.get('currency', 'ESPEES')
         original_amount = float(record_data.get('total_amount', 0))
@@ -76,76 +126,163 @@ def save_church_partner_record(record_type, record_data):
         grand_total = convert_to_espees(original_amount, currency)
         record_data['original_amount'] = original_amount
         record_data['grand_total'] = grand_total
-        
-        conn = sqlite3.connect('church_partners.db')
-        c = conn.cursor()
-        c.execute("""INSERT INTO church_partner_records 
-                     (record_type, record_data, submission_date)
-                     VALUES (?, ?, ?)""",
-                  (record_type, json.dumps(record_data), datetime.now()))
-        conn.commit()
-        conn.close()
+    
+    return (record_type,
+            json.dumps({key: json_safe(value) for key, value in record_data.items()}),
+            datetime.now(), row_hash)
+
+def insert_church_rows(conn, rows):
+    """Insert prepared church_record_row() rows in one executemany call.
+    
+    Rows whose hash is already saved are skipped; returns the number inserted.
+    """
+    cursor = conn.executemany("""INSERT INTO church_partner_records 
+                              (record_type, record_data, submission_date, row_hash)
+                              VALUES (?, ?, ?, ?)
+                              ON CONFLICT(row_hash) DO NOTHING""", rows)
+    return cursor.rowcount
+
+# Function to save church partner record
+def save_church_partner_record(record_type, record_data):
+    """Save church partner record with currency conversion"""
+    try:
+        row = church_record_row(record_type, record_data)
+        with transaction('church_partners') as conn:
+            insert_church_rows(conn, [row])
         return True, "Record saved successfully!"
     except Exception as e:
         return False, f"Error saving record: {e}"
 
-# Function to fetch all church partner records
-def fetch_church_partner_records():
-    """Fetch church records with currency conversion support"""
+def save_church_partner_records_bulk(records, amounts_computed=False, row_hashes=None):
+    """Save many (record_type, record_data) pairs in a single transaction.
+    
+    All-or-nothing: if any record fails to convert or insert, nothing is saved.
+    Returns (success, message, row_errors, saved) where row_errors lists
+    {'row': index, 'error': message} for each record that could not be prepared
+    and saved counts the records inserted.
+    Pass amounts_computed when the records already carry original_amount and grand_total,
+    and row_hashes (one per record) to skip records an earlier upload already saved.
+    """
+    rows = []
+    row_errors = []
+    for index, (record_type, record_data) in enumerate(records):
+        try:
+            row_hash = row_hashes[index] if row_hashes else None
+            rows.append(church_record_row(record_type, record_data, amounts_computed, row_hash))
+        except Exception as e:
+            row_errors.append({'row': index, 'error': str(e)})
+    
+    if row_errors:
+        return False, f"{len(row_errors)} of {len(records)} records are invalid; nothing was saved", row_errors, 0
+    
     try:
-        conn = sqlite3.connect('church_partners.db')
-        c = conn.cursor()
-        c.execute("SELECT * FROM church_partner_records")
-        records = c.fetchall()
-        conn.close()
-
-        # Process records to include converted amounts
-        processed_records = []
-        for record in records:
-            record_id, record_type, record_data_str, submission_date = record
-            record_data = json.loads(record_data_str)
-            
-            # Ensure currency conversion data exists
-            if 'currency' in record_data and 'total_amount' in record_data:
-                if 'grand_total' not in record_data:
-                    record_data['original_amount'] = float(record_data['total_amount'])
-                    record_data['grand_total'] = convert_to_espees(
-                        record_data['total_amount'],
-                        record_data['currency']
-                    )
-                    # Update record with new data
-                    conn = sqlite3.connect('church_partners.db')
-                    c = conn.cursor()
-                    c.execute("""UPDATE church_partner_records 
-                                SET record_data = ? 
-                                WHERE id = ?""",
-                             (json.dumps(record_data), record_id))
-                    conn.commit()
-                    conn.close()
-            
-            processed_records.append((
-                record_id,
-                record_type,
-                record_data,
-                submission_date
-            ))
-        
-        return processed_records
+        with transaction('church_partners') as conn:
+            saved = insert_church_rows(conn, rows)
     except Exception as e:
-        st.error(f"Error fetching church records: {e}")
-        return []
+        return False, f"Error saving records: {e}", row_errors, 0
+    
+    if saved < len(rows):
+        return True, f"Saved {saved} records; {len(rows) - saved} were already saved", row_errors, saved
+    return True, f"Saved {saved} records", row_errors, saved
+
+@cached_by_data_version('church_partners')
+def load_church_rollup(region=None, zone=None, group_name=None, ror=False):
+    """Count and total church/cell records (ROR records with ror) one level below the
+    narrowest filter given: per region, per zone of a region, per group of a zone, or
+    per church of a group. Returns the level's column, record_count and grand_total."""
+    conditions = ["record_type = 'ROR'" if ror else "record_type != 'ROR'"]
+    params = []
+    join = ''
+    if zone and group_name is not None:
+        level, column = 'church', 'church_name'
+        conditions += ['zone_name = ?', 'group_name = ?']
+        params += [zone, group_name]
+    elif zone:
+        level, column = 'group_name', 'group_name'
+        conditions.append('zone_name = ?')
+        params.append(zone)
+    elif region:
+        level, column = 'zone', 'zone_name'
+        conditions.append('zone_name IN (SELECT zone FROM zone_regions WHERE region = ?)')
+        params.append(region)
+    else:
+        # Regions come from zones_data.json (see migrations/church_004_zone_regions.sql)
+        level, column = 'region', "COALESCE(zone_regions.region, '')"
+        join = 'LEFT JOIN zone_regions ON zone_regions.zone = church_partner_records.zone_name'
+    
+    query = f"""SELECT {column} AS {level}, COUNT(*) AS record_count, SUM(grand_total) AS grand_total
+                FROM church_partner_records {join}
+                WHERE {' AND '.join(conditions)}
+                GROUP BY 1 ORDER BY grand_total DESC"""
+    return pd.read_sql_query(query, get_connection('church_partners'), params=params)
 
-# Add this list of currencies
-CURRENCIES = ["ESPEES", "USD", "NGN", "EUR"]
+@cached_by_data_version('church_partners')
+def load_church_period_totals(period, region=None, zone=None, ror=False):
+    """Church/cell (ROR with ror) record counts and ESPEES totals for one period
+    (see periods.parse_period) by zone and record type, in one indexed query"""
+    conditions, params = period_conditions(period)
+    conditions.append("record_type = 'ROR'" if ror else "record_type != 'ROR'")
+    if zone:
+        conditions.append('zone_name = ?')
+        params.append(zone)
+    elif region:
+        conditions.append('zone_name IN (SELECT zone FROM zone_regions WHERE region = ?)')
+        params.append(region)
+    
+    query = f"""SELECT zone_name AS zone, record_type, COUNT(*) AS record_count, SUM(grand_total) AS grand_total
+                FROM church_partner_records WHERE {' AND '.join(conditions)}
+                GROUP BY zone_name, record_type ORDER BY grand_total DESC"""
+    return pd.read_sql_query(query, get_connection('church_partners'), params=params)
+
+# Records recomputed per transaction by recompute_church_grand_totals()
+RECOMPUTE_CHUNK_ROWS = 5000
 
-# Update the CONVERSION_RATES dictionary to match the global system
-CONVERSION_RATES = {
-    "NGN": 1750.0,  # 1 USD = 1750 NGN
-    "USD": 1.0,     # Base currency
-    "EUR": 0.92,    # 1 USD = 0.92 EUR
-    "ESPEES": 1.0   # ESPEES is equivalent to USD
-}
+def recompute_church_grand_totals(year=None, chunk_rows=RECOMPUTE_CHUNK_ROWS, progress=None):
+    """Recompute the ESPEES grand_total of church, cell and ROR records at the rate in
+    effect on each record's submission date.
+    
+    Runs through one year's records (all with year=None) in id order, chunk_rows at
+    a time with each chunk in its own transaction, and rewrites only records whose
+    amounts changed; records without an original_amount get it from total_amount.
+    progress(done, total) is called after each chunk. Returns the number of records updated.
+    """
+    conn = get_connection('church_partners')
+    where = "WHERE year = ?" if year else "WHERE 1 = 1"
+    params = [int(year)] if year else []
+    total = conn.execute(f"SELECT COUNT(*) FROM church_partner_records {where}", params).fetchone()[0]
+    
+    query = f"""SELECT id, currency, submission_date, total_amount, grand_total,
+                       json_extract(record_data, '$.original_amount') AS original_amount
+                FROM church_partner_records {where} AND id > ? ORDER BY id LIMIT ?"""
+    
+    done = updated = 0
+    last_id = 0
+    while True:
+        df = pd.read_sql_query(query, conn, params=params + [last_id, chunk_rows])
+        if df.empty:
+            break
+        
+        # Records saved before original_amount was stored only carry total_amount
+        missing = df['original_amount'].isna()
+        original_amounts = pd.to_numeric(df['original_amount'].fillna(df['total_amount']), errors='coerce').fillna(0.0)
+        grand_totals = convert_amounts_as_of(original_amounts, df['currency'], df['submission_date'])
+        changed = missing | (grand_totals != df['grand_total'].round(2))
+        
+        updates = list(zip(original_amounts[changed].tolist(), grand_totals[changed].tolist(),
+                           df.loc[changed, 'id'].tolist()))
+        with transaction('church_partners'):
+            conn.executemany("""UPDATE church_partner_records
+                                SET record_data = json_set(record_data, '$.original_amount', ?, '$.grand_total', ?)
+                                WHERE id = ?""", updates)
+        
+        done += len(df)
+        updated += len(updates)
+        last_id = int(df['id'].iloc[-1])
+        if progress:
+            progress(done, total)
+    return updated
 
+# Function to fetch all church partner records
 # Add these at the top of the file with other global variables
 DISPLAY_CURRENCY = 'ESPEES'
 
@@ -154,28 +291,17 @@ def set_display_currency(currency):
     global DISPLAY_CURRENCY
     DISPLAY_CURRENCY = currency
 
-# Update the convert_to_espees function to format decimals better
-def convert_to_espees(amount, from_currency):
-    """Convert amount from given currency to ESPEES"""
-    if amount is None or amount == 0:
-        return 0.0
-        
-    try:
-        amount = float(amount)
-        if from_currency == "ESPEES":
-            return round(amount, 2)
-            
-        rate = CONVERSION_RATES.get(from_currency)
-        if not rate:
-            return round(amount, 2)
-            
-        # All conversions now use the same formula for consistency
-        converted = amount / rate if from_currency != "USD" else amount
-        return round(converted, 2)
-            
-    except (TypeError, ValueError, ZeroDivisionError) as e:
-        st.error(f"Conversion error: {e}")
-        return 0.0
+def format_amounts(amounts):
+    """Format a column of amounts as '1,234.56' strings, formatting each distinct value once"""
+    values = pd.to_numeric(amounts, errors='coerce').fillna(0.0)
+    codes, uniques = pd.factorize(values)
+    formatted = np.array([f"{value:,.2f}" for value in uniques], dtype=object)
+    return pd.Series(formatted[codes], index=values.index)
+
+def format_display_amounts(original_amounts, currencies, converted_amounts, display_currency='ESPEES'):
+    """Build '1,750.00 NGN (1.00 ESPEES)' display strings for whole columns at once"""
+    return (format_amounts(original_amounts) + ' ' + currencies.fillna('').astype(str) +
+            ' (' + format_amounts(converted_amounts) + f' {display_currency})')
 
 # Add these handler functions after the convert_to_espees function
 
@@ -212,22 +338,26 @@ def handle_church_submit(form_data, category):
     except Exception as e:
         return False, f"Error processing submission: {e}"
 
+def add_cell_amounts(form_data):
+    """Add the given and received amounts, converted to ESPEES, to a cell submission"""
+    currency = form_data['currency']
+    total_amount = float(form_data.get('total_amount_given', 0))
+    total_amount_received = float(form_data.get('total_amount_received', 0))
+    
+    # Convert both amounts to ESPEES
+    grand_total = convert_to_espees(total_amount, currency)
+    received_total = convert_to_espees(total_amount_received, currency)
+    
+    form_data['original_amount'] = total_amount
+    form_data['grand_total'] = grand_total
+    form_data['original_amount_received'] = total_amount_received
+    form_data['received_total_espees'] = received_total
+    return form_data
+
 def handle_cell_submit(form_data):
     """Handle cell form submission with currency conversion"""
     try:
-        currency = form_data['currency']
-        total_amount = float(form_data.get('total_amount_given', 0))
-        total_amount_received = float(form_data.get('total_amount_received', 0))
-        
-        # Convert both amounts to ESPEES
-        grand_total = convert_to_espees(total_amount, currency)
-        received_total = convert_to_espees(total_amount_received, currency)
-        
-        form_data['original_amount'] = total_amount
-        form_data['grand_total'] = grand_total
-        form_data['original_amount_received'] = total_amount_received
-        form_data['received_total_espees'] = received_total
-        
+        add_cell_amounts(form_data)
         success, message = save_church_partner_record("Cell", form_data)
         return success, message
     except Exception as e:
@@ -445,8 +575,7 @@ def church_records_ui():
             return
     elif st.session_state.is_super_admin:
         # Load zones data for admin
-        with open('zones_data.json', 'r') as f:
-            zones_data = json.load(f)
+        zones_data = load_zones_data()
         
         # First select region
         regions = list(zones_data.keys())
@@ -486,14 +615,8 @@ def church_records_ui():
 
 # Add this function to load saved conversion rates
 def load_saved_rates():
-    try:
-        with open('conversion_rates.json', 'r') as f:
-            saved_rates = json.load(f)
-            CONVERSION_RATES.update(saved_rates)
-    except FileNotFoundError:
-        pass  # Use default rates if file doesn't exist
-    except Exception as e:
-        st.error(f"Error loading conversion rates: {e}")
+    """Load today's rates from the rate history, recording changes to conversion_rates.json"""
+    load_conversion_rates()
 
 # Initialize the database when the script is run
 init_church_db()
@@ -519,8 +642,7 @@ if __name__ == "__main__":
 def check_db_needs_migration():
     """Check if the database needs migration"""
     try:
-        conn = sqlite3.connect('church_partners.db')
-        c = conn.cursor()
+        c = get_connection('church_partners').cursor()
         
         # Try to get table info
         c.execute("PRAGMA table_info(church_partner_records)")
@@ -533,14 +655,3 @@ def check_db_needs_migration():
         return not required_columns.issubset(existing_columns)
     except:
         return True
-    finally:
-        conn.close()
-
-# Add this function at the top of the file
-def get_user_details(username):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("SELECT user_group, sub_group, region, zone FROM users WHERE username=?", (username,))
-    user_details = c.fetchone()
-    conn.close()
-    return user_details
@@ -0,0 +1,180 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import json
+from datetime import date
+from db import get_connection, transaction, run_migrations, cached_by_data_version
+
+# Add this list of currencies
+CURRENCIES = ["ESPEES", "USD", "NGN", "EUR"]
+
+# Update the CONVERSION_RATES dictionary to match the global system
+CONVERSION_RATES = {
+    "NGN": 1750.0,  # 1 USD = 1750 NGN
+    "USD": 1.0,     # Base currency
+    "EUR": 0.92,    # 1 USD = 0.92 EUR
+    "ESPEES": 1.0   # ESPEES is equivalent to USD
+}
+
+# Currencies always worth one ESPEES, whatever the saved rates say
+BASE_CURRENCIES = ("ESPEES", "USD")
+
+def currency_rate(currency):
+    """Units of a currency per ESPEES; base and unknown currencies count as 1"""
+    rate = CONVERSION_RATES.get(currency)
+    if currency in BASE_CURRENCIES or not rate:
+        return 1.0
+    return float(rate)
+
+def currency_rates(currencies):
+    """Rate vector (units per ESPEES) for a column of currency codes"""
+    codes, uniques = pd.factorize(pd.Series(currencies, dtype=object).fillna(''))
+    return np.array([currency_rate(currency) for currency in uniques] or [1.0])[codes]
+
+def convert_amounts(amounts, from_currencies, to_currency='ESPEES'):
+    """Convert a column of amounts to to_currency, rounded to 2 decimals.
+
+    from_currencies is one currency code for every amount or a column of codes
+    aligned with amounts. Missing or non-numeric amounts count as 0. Returns a
+    Series on amounts' index when amounts is a Series, otherwise an array.
+    """
+    values = amounts if isinstance(amounts, pd.Series) else pd.Series(amounts)
+    values = pd.to_numeric(values, errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    if isinstance(from_currencies, str):
+        from_rates = currency_rate(from_currencies)
+    else:
+        from_rates = currency_rates(from_currencies)
+    converted = np.round(values / from_rates * currency_rate(to_currency), 2)
+
+    if isinstance(amounts, pd.Series):
+        return pd.Series(converted, index=amounts.index)
+    return converted
+
+def convert_to_espees(amount, from_currency):
+    """Convert one amount from given currency to ESPEES"""
+    if amount is None or amount == 0:
+        return 0.0
+
+    try:
+        # Same rates as convert_amounts(), without building a column for one value
+        return round(float(amount) / currency_rate(from_currency), 2)
+    except (TypeError, ValueError) as e:
+        st.error(f"Conversion error: {e}")
+        return 0.0
+
+# Saved current rates; changes to it are recorded in the conversion_rates table
+RATES_FILE = 'conversion_rates.json'
+
+# Effective date given to the rates the history starts from, so they cover every older record
+RATE_HISTORY_START = '2000-01-01'
+
+def set_conversion_rate(currency, rate, effective_from=None):
+    """Record a rate (units of currency per ESPEES) effective from a date, today by default"""
+    effective_from = str(pd.Timestamp(effective_from or date.today()).date())
+    with transaction('rates') as conn:
+        conn.execute("""INSERT OR REPLACE INTO conversion_rates (currency, rate, effective_from)
+                        VALUES (?, ?, ?)""", (currency, float(rate), effective_from))
+
+def latest_conversion_rates():
+    """Each currency's rate in effect today, from the conversion_rates table"""
+    rows = get_connection('rates').execute("""
+        SELECT currency, rate FROM conversion_rates AS current
+        WHERE effective_from = (SELECT MAX(effective_from) FROM conversion_rates
+                                WHERE currency = current.currency AND effective_from <= ?)
+    """, (str(date.today()),)).fetchall()
+    return dict(rows)
+
+def load_conversion_rates(rates_file=RATES_FILE):
+    """Bring the rate history up to date with conversion_rates.json and load today's rates
+    into CONVERSION_RATES.
+    
+    The first run seeds the history from the file (or the defaults) as of
+    RATE_HISTORY_START; afterwards a rate that differs from today's is recorded as
+    a new entry effective today.
+    """
+    try:
+        run_migrations('rates', 'rates')
+        try:
+            with open(rates_file, 'r') as f:
+                saved_rates = json.load(f)
+        except FileNotFoundError:
+            saved_rates = {}
+        
+        current = latest_conversion_rates()
+        if not current:
+            seed = {**CONVERSION_RATES, **saved_rates}
+            with transaction('rates') as conn:
+                conn.executemany("""INSERT OR IGNORE INTO conversion_rates (currency, rate, effective_from)
+                                    VALUES (?, ?, ?)""",
+                                 [(currency, float(rate), RATE_HISTORY_START) for currency, rate in seed.items()])
+        else:
+            for currency, rate in saved_rates.items():
+                if current.get(currency) != float(rate):
+                    set_conversion_rate(currency, rate)
+        
+        CONVERSION_RATES.update(latest_conversion_rates())
+    except Exception as e:
+        st.error(f"Error loading conversion rates: {e}")
+
+@cached_by_data_version('rates')
+def load_rate_history():
+    """Every currency's rates sorted by effective date, as {currency: (dates, rates)} arrays"""
+    history = pd.read_sql_query(
+        "SELECT currency, rate, effective_from FROM conversion_rates ORDER BY currency, effective_from",
+        get_connection('rates')
+    )
+    history['effective_from'] = pd.to_datetime(history['effective_from'])
+    # A zero rate would divide by zero; treat it like a missing rate
+    history['rate'] = history['rate'].where(history['rate'] > 0, 1.0)
+    return {
+        currency: (rates['effective_from'].to_numpy(), rates['rate'].to_numpy(dtype=float))
+        for currency, rates in history.groupby('currency')
+    }
+
+def as_of_dates(dates):
+    """Parse a column of dates for as-of lookups; missing dates sort after every rate"""
+    if isinstance(dates, np.ndarray) and dates.dtype == 'datetime64[ns]':
+        return dates
+    dates = pd.to_datetime(pd.Series(dates).reset_index(drop=True), format='mixed', errors='coerce')
+    return dates.fillna(pd.Timestamp.max).to_numpy(dtype='datetime64[ns]')
+
+def rates_as_of(currencies, dates):
+    """Rate vector (units per ESPEES) in effect for each currency code on each date.
+    
+    Dates before a currency's first entry use its earliest rate and missing dates
+    its latest; base and unknown currencies count as 1.
+    """
+    codes, uniques = pd.factorize(pd.Series(currencies, dtype=object).fillna('').reset_index(drop=True))
+    dates = as_of_dates(dates)
+    
+    rates = np.ones(len(codes))
+    history = load_rate_history()
+    for code, currency in enumerate(uniques):
+        if currency in BASE_CURRENCIES or currency not in history:
+            continue
+        effective_from, effective_rates = history[currency]
+        rows = codes == code
+        # The last entry effective on or before each date
+        positions = np.searchsorted(effective_from, dates[rows], side='right') - 1
+        rates[rows] = effective_rates[np.clip(positions, 0, None)]
+    return rates
+
+def convert_amounts_as_of(amounts, from_currencies, dates, to_currency='ESPEES'):
+    """Convert a column of amounts to to_currency at the rates in effect on each row's date.
+    
+    Like convert_amounts(), but each amount uses the historical rate valid on its
+    date (e.g. a record's submission_date) rather than today's.
+    """
+    values = amounts if isinstance(amounts, pd.Series) else pd.Series(amounts)
+    values = pd.to_numeric(values, errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    # Parse the dates once for both rate lookups
+    dates = as_of_dates(dates)
+    if isinstance(from_currencies, str):
+        from_currencies = [from_currencies] * len(values)
+    from_rates = rates_as_of(from_currencies, dates)
+    to_rates = 1.0 if to_currency in BASE_CURRENCIES else rates_as_of([to_currency] * len(values), dates)
+    converted = np.round(values / from_rates * to_rates, 2)
+    
+    if isinstance(amounts, pd.Series):
+        return pd.Series(converted, index=amounts.index)
+    return converted
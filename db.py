@@ -0,0 +1,250 @@
+import sqlite3
+import threading
+import functools
+import glob
+import os
+from contextlib import contextmanager
+import streamlit as st
+
+# Databases used by the app, by name
+DATABASES = {
+    'users': 'users.db',
+    'reports': 'reports.db',
+    'partner_records': 'partner_records.db',
+    'church_partners': 'church_partners.db',
+    'edit_requests': 'edit_requests.db',
+    'rates': 'conversion_rates.db',
+    'uploads': 'uploads.db'
+}
+
+# Pragmas applied once to every new connection. busy_timeout comes first so
+# the others wait out a writer in another session instead of failing.
+CONNECTION_PRAGMAS = {
+    'busy_timeout': 5000,         # ms to wait on a locked database
+    'synchronous': 'NORMAL',      # safe with WAL, fsyncs only at checkpoints
+    'cache_size': -16000,         # negative means KiB, i.e. a 16 MB page cache
+    'mmap_size': 64 * 1024 * 1024,
+    'foreign_keys': 'ON',
+    'temp_store': 'MEMORY'
+}
+
+# Journal mode is stored in the database file; setting it again on later
+# connections is a no-op, and covers files recreated by remove_database()
+JOURNAL_MODE = 'WAL'
+
+# Settings reported by init_databases(), per database
+_applied_settings = {}
+
+# Each thread keeps its own long-lived connection per database
+_local = threading.local()
+
+# Bumped by reset_connections() so threads reopen connections to replaced files
+_generations = {name: 0 for name in DATABASES}
+_generations_lock = threading.Lock()
+
+def get_connection(name):
+    """Return this thread's connection to a database, opening it on first use"""
+    if name not in DATABASES:
+        raise ValueError(f"Unknown database: {name}")
+
+    connections = _local.__dict__.setdefault('connections', {})
+    generation = _generations[name]
+
+    if name in connections:
+        conn, conn_generation = connections[name]
+        if conn_generation == generation:
+            return conn
+        # The database file was replaced (reinitialized or restored)
+        conn.close()
+
+    conn = sqlite3.connect(DATABASES[name])
+    for pragma, value in CONNECTION_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+    connections[name] = (conn, generation)
+    return conn
+
+@contextmanager
+def transaction(name):
+    """Run a block of writes on a database, committing on success and rolling back on error"""
+    conn = get_connection(name)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def reset_connections(name):
+    """Close connections to a database before its file is deleted or replaced"""
+    with _generations_lock:
+        _generations[name] += 1
+
+    connections = _local.__dict__.get('connections', {})
+    if name in connections:
+        connections.pop(name)[0].close()
+
+def init_databases():
+    """Open (and so configure) every database and record the settings actually in effect"""
+    for name in DATABASES:
+        _applied_settings[name] = read_settings(get_connection(name))
+    return _applied_settings
+
+def read_settings(conn):
+    """Read back the journal mode and tuned pragmas of a connection"""
+    settings = {'journal_mode': conn.execute("PRAGMA journal_mode").fetchone()[0]}
+    for pragma in CONNECTION_PRAGMAS:
+        settings[pragma] = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+    return settings
+
+def database_diagnostics():
+    """Settings in effect on this thread's connections, plus file sizes, for every database"""
+    diagnostics = []
+    for name, path in DATABASES.items():
+        current = read_settings(get_connection(name))
+        row = {
+            'database': path,
+            'size_kb': round(os.path.getsize(path) / 1024, 1) if os.path.exists(path) else 0,
+            'wal_kb': round(os.path.getsize(f"{path}-wal") / 1024, 1) if os.path.exists(f"{path}-wal") else 0,
+            'initialized': name in _applied_settings
+        }
+        row.update(current)
+        diagnostics.append(row)
+    return diagnostics
+
+def backup_database(name, backup_path):
+    """Copy a live database, including changes still in its WAL file"""
+    target = sqlite3.connect(backup_path)
+    try:
+        get_connection(name).backup(target)
+    finally:
+        target.close()
+
+def restore_database(name, backup_path):
+    """Replace a database's contents with a backup through SQLite, so open connections stay valid"""
+    source = sqlite3.connect(backup_path)
+    try:
+        source.backup(get_connection(name))
+    finally:
+        source.close()
+    
+    # The backup brings its own data_version, which may repeat a cached one
+    reset_connections(name)
+
+def remove_database(name):
+    """Delete a database file along with its WAL and shared-memory files"""
+    reset_connections(name)
+    for path in (DATABASES[name], f"{DATABASES[name]}-wal", f"{DATABASES[name]}-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def split_sql_statements(migration_sql):
+    """Split a migration script into complete statements (trigger bodies stay intact)"""
+    statements = []
+    buffer = ''
+    for line in migration_sql.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ''
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+def run_migrations(name, prefix, before=None):
+    """Apply versioned migrations (migrations/<prefix>_NNN_*.sql) not yet applied to a database.
+
+    The applied version is tracked in PRAGMA user_version. `before(conn)` runs
+    once ahead of any pending migrations. Each migration runs in an explicit
+    transaction, so a failing statement rolls back its DDL, data changes and
+    version bump together.
+    """
+    conn = get_connection(name)
+    current_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    pending = []
+    for path in sorted(glob.glob(os.path.join('migrations', f'{prefix}_*.sql'))):
+        version = int(os.path.basename(path).split('_')[1])
+        if version > current_version:
+            pending.append((version, path))
+
+    if not pending:
+        return []
+
+    if before:
+        before(conn)
+        conn.commit()
+
+    for version, path in pending:
+        with open(path, 'r') as f:
+            migration_sql = f.read()
+        with transaction(name):
+            # sqlite3 only opens a transaction implicitly before DML, not DDL
+            conn.execute("BEGIN")
+            for statement in split_sql_statements(migration_sql):
+                try:
+                    conn.execute(statement)
+                except sqlite3.OperationalError as e:
+                    # Columns may already exist from an earlier partial run
+                    if "duplicate column" not in str(e).lower():
+                        raise e
+            conn.execute(f"PRAGMA user_version = {version}")
+
+    return [version for version, _ in pending]
+
+def database_generation(name):
+    """Counter bumped whenever this process replaces or deletes a database's file"""
+    return _generations[name]
+
+def data_version(name):
+    """Return a key that changes whenever a database's records are written, replaced or deleted.
+
+    The version counter is kept up to date by triggers (see the *_data_version
+    migrations); the generation covers files recreated or restored by this process.
+    """
+    try:
+        row = get_connection(name).execute("SELECT version FROM data_version").fetchone()
+    except sqlite3.OperationalError:
+        # Not migrated yet
+        row = None
+    return (_generations[name], row[0] if row else 0)
+
+# Results st.cache_data keeps per cached_by_data_version() fetcher, across arguments
+CACHE_MAX_ENTRIES = 128
+
+def cached_by_data_version(name, resource=False):
+    """Cache a fetcher with st.cache_data until the named database is next written to.
+
+    Results are cached per set of arguments, which must be hashable by st.cache_data.
+    Earlier versions' results are dropped once the version changes, and at most
+    CACHE_MAX_ENTRIES are kept, so memory doesn't grow with writes.
+
+    With resource=True, st.cache_resource keeps only the latest version's results
+    and hands every caller the same object instead of a copy, for large read-only
+    structures such as search indexes.
+
+    The undecorated fetcher stays available as `.uncached`.
+    """
+    def decorator(func):
+        def cached(version, *args, **kwargs):
+            return func(*args, **kwargs)
+        # st.cache_data keys caches by module and qualified name
+        cached.__module__ = func.__module__
+        cached.__qualname__ = func.__qualname__
+        if resource:
+            cached = st.cache_resource(show_spinner=False, max_entries=1)(cached)
+        else:
+            cached = st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)(cached)
+        latest = {'version': None}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            version = data_version(name)
+            if version != latest['version']:
+                # Results of older versions can never be read again
+                if latest['version'] is not None and not resource:
+                    cached.clear()
+                latest['version'] = version
+            return cached(version, *args, **kwargs)
+        wrapper.uncached = func
+        return wrapper
+    return decorator
@@ -0,0 +1,230 @@
+import difflib
+import functools
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
+import streamlit as st
+from db import get_connection, data_version
+
+# Full names at least this similar (difflib ratio) within a block count as the same partner
+NAME_SIMILARITY = 0.85
+
+# Phone numbers are compared on their trailing digits, so local (0803...) and
+# international (+234 803...) forms of a number agree
+PHONE_DIGITS = 10
+
+# An email or phone number shared by more differently named partners than this
+# is taken for a placeholder (e.g. a church office line) and not matched on
+SHARED_CONTACT_NAMES = 20
+
+# Soundex digit of each consonant; vowels, h, w and y have none
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6'
+}
+
+@functools.lru_cache(maxsize=65536)
+def normalize_name(name):
+    """Lowercase a name, drop accents and anything but letters, and collapse spaces"""
+    name = unicodedata.normalize('NFKD', str(name or ''))
+    name = ''.join(char for char in name if not unicodedata.combining(char)).lower()
+    return ' '.join(re.sub(r'[^a-z]+', ' ', name).split())
+
+def normalize_email(email):
+    """Lowercase an email and drop any +tag from its local part; '' unless it has an @"""
+    email = str(email or '').strip().lower()
+    if '@' not in email:
+        return ''
+    local, _, domain = email.rpartition('@')
+    return f"{local.split('+')[0]}@{domain}"
+
+def normalize_phone(phone):
+    """Trailing PHONE_DIGITS digits of a phone number; '' when it has fewer than 7 digits"""
+    digits = re.sub(r'\D', '', str(phone or ''))
+    return digits[-PHONE_DIGITS:] if len(digits) >= 7 else ''
+
+@functools.lru_cache(maxsize=65536)
+def soundex(name):
+    """American Soundex code of a normalized name, e.g. 'robert' and 'rupert' -> 'R163'"""
+    letters = [char for char in name if char.isalpha()]
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # h and w don't separate two letters with the same code; vowels do
+        if letter not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+def partner_keys(zone, first_name, surname, email, phone):
+    """Matching keys of a partner: (email, phone, block, full name).
+
+    The block groups partners of one zone whose surnames and first names sound
+    alike, so names are only compared within it.
+    """
+    first_name = normalize_name(first_name)
+    surname = normalize_name(surname)
+    block = (str(zone or ''), soundex(surname), soundex(first_name))
+    return normalize_email(email), normalize_phone(phone), block, f"{first_name} {surname}".strip()
+
+def new_dedup_index():
+    """Empty index for add_partner() and find_matches()"""
+    return {'emails': {}, 'phones': {}, 'names': {}, 'parents': {}, 'unique_partners': 0}
+
+def similar_name(matcher, other_name):
+    """Whether other_name is at least NAME_SIMILARITY alike the name matcher was made for.
+
+    matcher is a difflib.SequenceMatcher with the name as its second sequence,
+    which it indexes once for every comparison.
+    """
+    matcher.set_seq1(other_name)
+    return (matcher.real_quick_ratio() >= NAME_SIMILARITY and matcher.quick_ratio() >= NAME_SIMILARITY
+            and matcher.ratio() >= NAME_SIMILARITY)
+
+def find_matches(index, keys):
+    """Ids of indexed partners that a partner with partner_keys() keys likely duplicates.
+
+    Partners match on full names at least NAME_SIMILARITY alike within the same
+    block. A shared email or phone number only counts for partners in the same
+    block or with similar names, since children and teenagers often carry a
+    parent's contact details.
+    """
+    email, phone, block, full_name = keys
+    matches = set()
+    # Ids to match if their name is similar, by name
+    candidates = {}
+    for contact, contacts in ((email, index['emails']), (phone, index['phones'])):
+        named = contacts.get(contact, {})
+        if len(named) > SHARED_CONTACT_NAMES:
+            continue
+        for (other_block, other_name), other_id in named.items():
+            if other_block == block:
+                matches.add(other_id)
+            elif full_name and other_name:
+                candidates.setdefault(other_name, set()).add(other_id)
+    names = index['names'].get(block, {})
+    if full_name in names:
+        # Every similar name in the block was grouped with this one when either was added
+        matches.add(names[full_name])
+    elif full_name:
+        for other_name, other_id in names.items():
+            candidates.setdefault(other_name, set()).add(other_id)
+
+    if candidates:
+        matcher = difflib.SequenceMatcher(None, '', full_name)
+        for other_name, other_ids in candidates.items():
+            if other_name == full_name or similar_name(matcher, other_name):
+                matches.update(other_ids)
+    return matches
+
+def find_partner(index, record_id):
+    """Id representing the group of likely duplicates record_id belongs to"""
+    parents = index['parents']
+    while parents[record_id] != record_id:
+        # Path halving keeps later lookups short
+        parents[record_id] = parents[parents[record_id]]
+        record_id = parents[record_id]
+    return record_id
+
+def add_partner(index, record_id, keys):
+    """Index a partner, grouping it with the partners it likely duplicates.
+
+    Returns the ids of the indexed partners it matched.
+    """
+    matches = find_matches(index, keys)
+    index['parents'][record_id] = record_id
+    index['unique_partners'] += 1
+    for match in matches:
+        root, other_root = find_partner(index, record_id), find_partner(index, match)
+        if root != other_root:
+            index['parents'][other_root] = root
+            index['unique_partners'] -= 1
+
+    # Each key keeps one id per name; every partner sharing both is already in that id's group
+    email, phone, block, full_name = keys
+    if email:
+        index['emails'].setdefault(email, {}).setdefault((block, full_name), record_id)
+    if phone:
+        index['phones'].setdefault(phone, {}).setdefault((block, full_name), record_id)
+    if full_name:
+        index['names'].setdefault(block, {}).setdefault(full_name, record_id)
+    return matches
+
+@st.cache_resource(show_spinner=False)
+def partner_dedup_cache():
+    """The process's cached partner dedup index and the lock guarding it"""
+    return {'lock': threading.Lock(), 'index': None}
+
+def partner_key_changes():
+    """(database generation, count of edits to partners' matching fields and deletes);
+    see migrations/partner_009_dedup_key_changes.sql"""
+    row = get_connection('partner_records').execute("SELECT key_changes FROM data_version").fetchone()
+    return data_version('partner_records')[0], row[0] if row else 0
+
+def build_partner_dedup_index(index=None):
+    """Add the partners saved after an index's last one to it, or build a new index.
+
+    The index also tracks the last id it holds and the partner_key_changes() it was built at.
+    """
+    conn = get_connection('partner_records')
+    if index is None:
+        index = new_dedup_index()
+        # Read before the partners, so an edit made while building forces the next rebuild
+        index.update(last_id=0, key_changes=partner_key_changes())
+    rows = conn.execute(
+        "SELECT id, zone, first_name, surname, email, kingschat_phone FROM partners WHERE id > ? ORDER BY id",
+        (index['last_id'],)
+    )
+    for record_id, zone, first_name, surname, email, phone in rows:
+        add_partner(index, record_id, partner_keys(zone, first_name, surname, email, phone))
+        index['last_id'] = record_id
+    return index
+
+@contextmanager
+def partner_dedup_index():
+    """Hold the dedup index over every partner record for reading.
+
+    The index is cached for the process. Partners saved since it was last used
+    are added to it (ids only grow), so saves and uploads cost only their new
+    rows. Partners can't be taken out of their groups, so it is rebuilt when a
+    saved partner's name, zone, email or phone was edited, a partner was
+    deleted, or the database file was replaced.
+    """
+    cache = partner_dedup_cache()
+    with cache['lock']:
+        index = cache['index']
+        if index is not None and index['key_changes'] != partner_key_changes():
+            index = None
+        index = build_partner_dedup_index(index)
+        cache['index'] = index
+        yield index
+
+def count_unique_partners():
+    """Number of distinct partners once likely duplicates are grouped together"""
+    with partner_dedup_index() as index:
+        return index['unique_partners']
+
+def find_duplicate_partners(partners):
+    """Flag likely duplicates among partners about to be saved.
+
+    partners is a list of (zone, first_name, surname, email, phone) tuples. Returns
+    {'row': position, 'existing': [record ids], 'repeats': [earlier positions]}
+    for each partner that matches saved records or an earlier partner in the list.
+    """
+    incoming = new_dedup_index()
+    flagged = []
+    with partner_dedup_index() as saved:
+        for position, partner in enumerate(partners):
+            keys = partner_keys(*partner)
+            existing = sorted(find_matches(saved, keys))
+            repeats = sorted(add_partner(incoming, position, keys))
+            if existing or repeats:
+                flagged.append({'row': position, 'existing': existing, 'repeats': repeats})
+    return flagged
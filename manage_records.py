@@ -1,6 +1,7 @@
 import sqlite3
 import streamlit as st
 from typing import Optional
+from db import transaction
 
 def delete_partner_record(partner_id: int, record_type: str) -> tuple[bool, Optional[str]]:
     """
@@ -26,19 +27,16 @@ def delete_partner_record(partner_id: int, record_type: str) -> tuple[bool, Opti
     table_name = table_mapping[record_type]
     
     try:
-        conn = sqlite3.connect('partner_records.db')
-        cursor = conn.cursor()
-        
-        # First verify the record exists
-        cursor.execute(f"SELECT id FROM {table_name} WHERE id = ?", (partner_id,))
-        if not cursor.fetchone():
-            conn.close()
-            return False, f"No {record_type} found with ID {partner_id}"
-        
-        # Delete the record
-        cursor.execute(f"DELETE FROM {table_name} WHERE id = ?", (partner_id,))
-        conn.commit()
-        conn.close()
+        with transaction('partner_records') as conn:
+            cursor = conn.cursor()
+            
+            # First verify the record exists
+            cursor.execute(f"SELECT id FROM {table_name} WHERE id = ?", (partner_id,))
+            if not cursor.fetchone():
+                return False, f"No {record_type} found with ID {partner_id}"
+            
+            # Delete the record
+            cursor.execute(f"DELETE FROM {table_name} WHERE id = ?", (partner_id,))
         
         return True, None
         
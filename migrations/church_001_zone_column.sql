@@ -0,0 +1,8 @@
+-- Expose the zone stored in record_data as an indexed generated column so
+-- zone-scoped (RZM) queries read only their own zone's rows.
+
+ALTER TABLE church_partner_records ADD COLUMN zone_name TEXT
+    GENERATED ALWAYS AS (json_extract(record_data, '$.zone_name')) VIRTUAL;
+
+-- Church/cell records (record_type != 'ROR') and ROR records of one zone
+CREATE INDEX IF NOT EXISTS idx_church_records_zone_type ON church_partner_records(zone_name, record_type);
@@ -0,0 +1,21 @@
+-- Expose the remaining commonly read record_data fields as virtual generated
+-- columns so church/ROR readers select and filter in SQL instead of decoding
+-- JSON row by row in Python.
+
+ALTER TABLE church_partner_records ADD COLUMN group_name TEXT
+    GENERATED ALWAYS AS (COALESCE(json_extract(record_data, '$.group_name'), '')) VIRTUAL;
+
+ALTER TABLE church_partner_records ADD COLUMN church_name TEXT
+    GENERATED ALWAYS AS (COALESCE(json_extract(record_data, '$.church_name'), '')) VIRTUAL;
+
+ALTER TABLE church_partner_records ADD COLUMN currency TEXT
+    GENERATED ALWAYS AS (COALESCE(json_extract(record_data, '$.currency'), 'ESPEES')) VIRTUAL;
+
+ALTER TABLE church_partner_records ADD COLUMN total_amount REAL
+    GENERATED ALWAYS AS (COALESCE(json_extract(record_data, '$.total_amount'), 0)) VIRTUAL;
+
+ALTER TABLE church_partner_records ADD COLUMN grand_total REAL
+    GENERATED ALWAYS AS (COALESCE(json_extract(record_data, '$.grand_total'), 0)) VIRTUAL;
+
+-- All records of a type (e.g. ROR), optionally narrowed to a zone
+CREATE INDEX IF NOT EXISTS idx_church_records_type_zone ON church_partner_records(record_type, zone_name);
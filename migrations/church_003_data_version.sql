@@ -0,0 +1,28 @@
+-- Count writes to church_partner_records so cached reads (db.cached_by_data_version)
+-- are invalidated by any insert, update or delete, whichever code path makes it.
+
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS church_records_data_version_insert AFTER INSERT ON church_partner_records
+BEGIN
+    UPDATE data_version SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS church_records_data_version_update AFTER UPDATE ON church_partner_records
+BEGIN
+    UPDATE data_version SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS church_records_data_version_delete AFTER DELETE ON church_partner_records
+BEGIN
+    UPDATE data_version SET version = version + 1;
+END;
+
+-- Count the migration itself as a write; run_church_db_migration() replays it
+-- after recreating the table, which does not fire the triggers above
+UPDATE data_version SET version = version + 1;
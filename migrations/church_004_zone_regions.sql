@@ -0,0 +1,11 @@
+-- Zone to region map, synced from zones_data.json by zones.sync_zone_regions(), so
+-- region rollups join each record's zone_name to its region in SQL. Regions are
+-- resolved at read time, so moving a zone between regions needs no record rewrites.
+
+CREATE TABLE IF NOT EXISTS zone_regions (
+    zone TEXT PRIMARY KEY,
+    region TEXT NOT NULL
+);
+
+-- A region's zones, for region-scoped reads through idx_church_records_zone_type
+CREATE INDEX IF NOT EXISTS idx_zone_regions_region ON zone_regions(region, zone);
@@ -0,0 +1,15 @@
+-- Expose the calendar period of each record's submission_date as integer
+-- generated columns and index them, so period totals (see periods.py) filter
+-- on year/quarter/month in SQL instead of parsing dates in pandas.
+
+ALTER TABLE church_partner_records ADD COLUMN year INTEGER
+    GENERATED ALWAYS AS (CAST(strftime('%Y', submission_date) AS INTEGER)) VIRTUAL;
+
+ALTER TABLE church_partner_records ADD COLUMN quarter INTEGER
+    GENERATED ALWAYS AS ((CAST(strftime('%m', submission_date) AS INTEGER) + 2) / 3) VIRTUAL;
+
+ALTER TABLE church_partner_records ADD COLUMN month INTEGER
+    GENERATED ALWAYS AS (CAST(strftime('%m', submission_date) AS INTEGER)) VIRTUAL;
+
+-- A period's church/cell or ROR records, grouped by zone
+CREATE INDEX IF NOT EXISTS idx_church_records_period ON church_partner_records(year, quarter, month, record_type, zone_name);
@@ -0,0 +1,37 @@
+-- Full-text index over the church, cell and ROR fields the search boxes match
+-- (see search.py). rowid is the church_partner_records id. The fields live in
+-- record_data, so the triggers re-index a record whenever record_data changes.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS church_records_search USING fts5(
+    church_name, church_pastor, cell_name, cell_leader, group_name, zone_name,
+    tokenize = 'unicode61', prefix = '2 3'
+);
+
+-- Rebuild from scratch: run_church_db_migration() recreates the records table
+-- and replays the migrations, leaving stale rows behind
+DELETE FROM church_records_search;
+
+INSERT INTO church_records_search (rowid, church_name, church_pastor, cell_name, cell_leader, group_name, zone_name)
+SELECT id, church_name, json_extract(record_data, '$.church_pastor'), json_extract(record_data, '$.cell_name'),
+       json_extract(record_data, '$.cell_leader'), group_name, zone_name
+FROM church_partner_records;
+
+CREATE TRIGGER IF NOT EXISTS church_records_search_insert AFTER INSERT ON church_partner_records
+BEGIN
+    INSERT INTO church_records_search (rowid, church_name, church_pastor, cell_name, cell_leader, group_name, zone_name)
+    VALUES (NEW.id, NEW.church_name, json_extract(NEW.record_data, '$.church_pastor'), json_extract(NEW.record_data, '$.cell_name'),
+            json_extract(NEW.record_data, '$.cell_leader'), NEW.group_name, NEW.zone_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS church_records_search_delete AFTER DELETE ON church_partner_records
+BEGIN
+    DELETE FROM church_records_search WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS church_records_search_update AFTER UPDATE OF record_data ON church_partner_records
+BEGIN
+    DELETE FROM church_records_search WHERE rowid = OLD.id;
+    INSERT INTO church_records_search (rowid, church_name, church_pastor, cell_name, cell_leader, group_name, zone_name)
+    VALUES (NEW.id, NEW.church_name, json_extract(NEW.record_data, '$.church_pastor'), json_extract(NEW.record_data, '$.cell_name'),
+            json_extract(NEW.record_data, '$.cell_leader'), NEW.group_name, NEW.zone_name);
+END;
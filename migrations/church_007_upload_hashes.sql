@@ -0,0 +1,7 @@
+-- Content hash of each record saved from an uploaded workbook (see uploads.py).
+-- The unique index lets a re-submitted row be skipped with ON CONFLICT DO NOTHING
+-- instead of saved twice; records entered through the forms keep a NULL hash.
+
+ALTER TABLE church_partner_records ADD COLUMN row_hash TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_church_records_row_hash ON church_partner_records(row_hash);
@@ -0,0 +1,175 @@
+-- Promote frequently read partner fields out of the record_data JSON blob
+-- into typed columns so fetchers can select them directly.
+-- record_data is kept as the full record for fields that are not promoted.
+
+-- Add typed columns to adult_partners
+ALTER TABLE adult_partners ADD COLUMN zone TEXT NOT NULL DEFAULT '';
+ALTER TABLE adult_partners ADD COLUMN currency TEXT NOT NULL DEFAULT 'ESPEES';
+ALTER TABLE adult_partners ADD COLUMN title TEXT NOT NULL DEFAULT '';
+ALTER TABLE adult_partners ADD COLUMN first_name TEXT NOT NULL DEFAULT '';
+ALTER TABLE adult_partners ADD COLUMN surname TEXT NOT NULL DEFAULT '';
+ALTER TABLE adult_partners ADD COLUMN email TEXT NOT NULL DEFAULT '';
+ALTER TABLE adult_partners ADD COLUMN kingschat_phone TEXT NOT NULL DEFAULT '';
+ALTER TABLE adult_partners ADD COLUMN church TEXT NOT NULL DEFAULT '';
+ALTER TABLE adult_partners ADD COLUMN group_name TEXT NOT NULL DEFAULT '';
+ALTER TABLE adult_partners ADD COLUMN total_wonder_challenge REAL NOT NULL DEFAULT 0;
+ALTER TABLE adult_partners ADD COLUMN total_rhapsody_languages REAL NOT NULL DEFAULT 0;
+ALTER TABLE adult_partners ADD COLUMN total_kiddies_products REAL NOT NULL DEFAULT 0;
+ALTER TABLE adult_partners ADD COLUMN total_teevo REAL NOT NULL DEFAULT 0;
+ALTER TABLE adult_partners ADD COLUMN total_braille_nolb REAL NOT NULL DEFAULT 0;
+ALTER TABLE adult_partners ADD COLUMN total_youth_aglow REAL NOT NULL DEFAULT 0;
+ALTER TABLE adult_partners ADD COLUMN total_local_distribution REAL NOT NULL DEFAULT 0;
+ALTER TABLE adult_partners ADD COLUMN total_subscriptions_dubais REAL NOT NULL DEFAULT 0;
+ALTER TABLE adult_partners ADD COLUMN original_amount REAL NOT NULL DEFAULT 0;
+ALTER TABLE adult_partners ADD COLUMN grand_total REAL NOT NULL DEFAULT 0;
+
+-- Add typed columns to children_partners
+ALTER TABLE children_partners ADD COLUMN zone TEXT NOT NULL DEFAULT '';
+ALTER TABLE children_partners ADD COLUMN currency TEXT NOT NULL DEFAULT 'ESPEES';
+ALTER TABLE children_partners ADD COLUMN title TEXT NOT NULL DEFAULT '';
+ALTER TABLE children_partners ADD COLUMN first_name TEXT NOT NULL DEFAULT '';
+ALTER TABLE children_partners ADD COLUMN surname TEXT NOT NULL DEFAULT '';
+ALTER TABLE children_partners ADD COLUMN email TEXT NOT NULL DEFAULT '';
+ALTER TABLE children_partners ADD COLUMN kingschat_phone TEXT NOT NULL DEFAULT '';
+ALTER TABLE children_partners ADD COLUMN church TEXT NOT NULL DEFAULT '';
+ALTER TABLE children_partners ADD COLUMN group_name TEXT NOT NULL DEFAULT '';
+ALTER TABLE children_partners ADD COLUMN total_wonder_challenge REAL NOT NULL DEFAULT 0;
+ALTER TABLE children_partners ADD COLUMN total_rhapsody_languages REAL NOT NULL DEFAULT 0;
+ALTER TABLE children_partners ADD COLUMN total_kiddies_products REAL NOT NULL DEFAULT 0;
+ALTER TABLE children_partners ADD COLUMN total_teevo REAL NOT NULL DEFAULT 0;
+ALTER TABLE children_partners ADD COLUMN total_braille_nolb REAL NOT NULL DEFAULT 0;
+ALTER TABLE children_partners ADD COLUMN total_youth_aglow REAL NOT NULL DEFAULT 0;
+ALTER TABLE children_partners ADD COLUMN total_local_distribution REAL NOT NULL DEFAULT 0;
+ALTER TABLE children_partners ADD COLUMN total_subscriptions_dubais REAL NOT NULL DEFAULT 0;
+ALTER TABLE children_partners ADD COLUMN original_amount REAL NOT NULL DEFAULT 0;
+ALTER TABLE children_partners ADD COLUMN grand_total REAL NOT NULL DEFAULT 0;
+
+-- Add typed columns to teenager_partners
+ALTER TABLE teenager_partners ADD COLUMN zone TEXT NOT NULL DEFAULT '';
+ALTER TABLE teenager_partners ADD COLUMN currency TEXT NOT NULL DEFAULT 'ESPEES';
+ALTER TABLE teenager_partners ADD COLUMN title TEXT NOT NULL DEFAULT '';
+ALTER TABLE teenager_partners ADD COLUMN first_name TEXT NOT NULL DEFAULT '';
+ALTER TABLE teenager_partners ADD COLUMN surname TEXT NOT NULL DEFAULT '';
+ALTER TABLE teenager_partners ADD COLUMN email TEXT NOT NULL DEFAULT '';
+ALTER TABLE teenager_partners ADD COLUMN kingschat_phone TEXT NOT NULL DEFAULT '';
+ALTER TABLE teenager_partners ADD COLUMN church TEXT NOT NULL DEFAULT '';
+ALTER TABLE teenager_partners ADD COLUMN group_name TEXT NOT NULL DEFAULT '';
+ALTER TABLE teenager_partners ADD COLUMN total_wonder_challenge REAL NOT NULL DEFAULT 0;
+ALTER TABLE teenager_partners ADD COLUMN total_rhapsody_languages REAL NOT NULL DEFAULT 0;
+ALTER TABLE teenager_partners ADD COLUMN total_kiddies_products REAL NOT NULL DEFAULT 0;
+ALTER TABLE teenager_partners ADD COLUMN total_teevo REAL NOT NULL DEFAULT 0;
+ALTER TABLE teenager_partners ADD COLUMN total_braille_nolb REAL NOT NULL DEFAULT 0;
+ALTER TABLE teenager_partners ADD COLUMN total_youth_aglow REAL NOT NULL DEFAULT 0;
+ALTER TABLE teenager_partners ADD COLUMN total_local_distribution REAL NOT NULL DEFAULT 0;
+ALTER TABLE teenager_partners ADD COLUMN total_subscriptions_dubais REAL NOT NULL DEFAULT 0;
+ALTER TABLE teenager_partners ADD COLUMN original_amount REAL NOT NULL DEFAULT 0;
+ALTER TABLE teenager_partners ADD COLUMN grand_total REAL NOT NULL DEFAULT 0;
+
+-- Add typed columns to external_partners
+ALTER TABLE external_partners ADD COLUMN zone TEXT NOT NULL DEFAULT '';
+ALTER TABLE external_partners ADD COLUMN currency TEXT NOT NULL DEFAULT 'ESPEES';
+ALTER TABLE external_partners ADD COLUMN title TEXT NOT NULL DEFAULT '';
+ALTER TABLE external_partners ADD COLUMN first_name TEXT NOT NULL DEFAULT '';
+ALTER TABLE external_partners ADD COLUMN surname TEXT NOT NULL DEFAULT '';
+ALTER TABLE external_partners ADD COLUMN email TEXT NOT NULL DEFAULT '';
+ALTER TABLE external_partners ADD COLUMN kingschat_phone TEXT NOT NULL DEFAULT '';
+ALTER TABLE external_partners ADD COLUMN church TEXT NOT NULL DEFAULT '';
+ALTER TABLE external_partners ADD COLUMN group_name TEXT NOT NULL DEFAULT '';
+ALTER TABLE external_partners ADD COLUMN total_wonder_challenge REAL NOT NULL DEFAULT 0;
+ALTER TABLE external_partners ADD COLUMN total_rhapsody_languages REAL NOT NULL DEFAULT 0;
+ALTER TABLE external_partners ADD COLUMN total_kiddies_products REAL NOT NULL DEFAULT 0;
+ALTER TABLE external_partners ADD COLUMN total_teevo REAL NOT NULL DEFAULT 0;
+ALTER TABLE external_partners ADD COLUMN total_braille_nolb REAL NOT NULL DEFAULT 0;
+ALTER TABLE external_partners ADD COLUMN total_youth_aglow REAL NOT NULL DEFAULT 0;
+ALTER TABLE external_partners ADD COLUMN total_local_distribution REAL NOT NULL DEFAULT 0;
+ALTER TABLE external_partners ADD COLUMN total_subscriptions_dubais REAL NOT NULL DEFAULT 0;
+ALTER TABLE external_partners ADD COLUMN original_amount REAL NOT NULL DEFAULT 0;
+ALTER TABLE external_partners ADD COLUMN grand_total REAL NOT NULL DEFAULT 0;
+
+-- Backfill typed columns for existing adult_partners records
+UPDATE adult_partners SET
+    zone = COALESCE(json_extract(record_data, '$.zone'), ''),
+    currency = COALESCE(NULLIF(json_extract(record_data, '$.currency'), ''), 'ESPEES'),
+    title = COALESCE(json_extract(record_data, '$.title'), ''),
+    first_name = COALESCE(json_extract(record_data, '$.first_name'), ''),
+    surname = COALESCE(json_extract(record_data, '$.surname'), ''),
+    email = COALESCE(json_extract(record_data, '$.email'), ''),
+    kingschat_phone = COALESCE(json_extract(record_data, '$.kingschat_phone'), ''),
+    church = COALESCE(json_extract(record_data, '$.church'), ''),
+    group_name = COALESCE(json_extract(record_data, '$.group_name'), json_extract(record_data, '$.group'), ''),
+    total_wonder_challenge = COALESCE(CAST(json_extract(record_data, '$.total_wonder_challenge') AS REAL), 0),
+    total_rhapsody_languages = COALESCE(CAST(json_extract(record_data, '$.total_rhapsody_languages') AS REAL), 0),
+    total_kiddies_products = COALESCE(CAST(json_extract(record_data, '$.total_kiddies_products') AS REAL), 0),
+    total_teevo = COALESCE(CAST(json_extract(record_data, '$.total_teevo') AS REAL), 0),
+    total_braille_nolb = COALESCE(CAST(json_extract(record_data, '$.total_braille_nolb') AS REAL), 0),
+    total_youth_aglow = COALESCE(CAST(json_extract(record_data, '$.total_youth_aglow') AS REAL), 0),
+    total_local_distribution = COALESCE(CAST(json_extract(record_data, '$.total_local_distribution') AS REAL), 0),
+    total_subscriptions_dubais = COALESCE(CAST(json_extract(record_data, '$.total_subscriptions_dubais') AS REAL), 0),
+    original_amount = COALESCE(CAST(json_extract(record_data, '$.original_amount') AS REAL), 0),
+    grand_total = COALESCE(CAST(json_extract(record_data, '$.grand_total') AS REAL), 0);
+
+-- Backfill typed columns for existing children_partners records
+UPDATE children_partners SET
+    zone = COALESCE(json_extract(record_data, '$.zone'), ''),
+    currency = COALESCE(NULLIF(json_extract(record_data, '$.currency'), ''), 'ESPEES'),
+    title = COALESCE(json_extract(record_data, '$.title'), ''),
+    first_name = COALESCE(json_extract(record_data, '$.first_name'), ''),
+    surname = COALESCE(json_extract(record_data, '$.surname'), ''),
+    email = COALESCE(json_extract(record_data, '$.email'), ''),
+    kingschat_phone = COALESCE(json_extract(record_data, '$.kingschat_phone'), ''),
+    church = COALESCE(json_extract(record_data, '$.church'), ''),
+    group_name = COALESCE(json_extract(record_data, '$.group_name'), json_extract(record_data, '$.group'), ''),
+    total_wonder_challenge = COALESCE(CAST(json_extract(record_data, '$.total_wonder_challenge') AS REAL), 0),
+    total_rhapsody_languages = COALESCE(CAST(json_extract(record_data, '$.total_rhapsody_languages') AS REAL), 0),
+    total_kiddies_products = COALESCE(CAST(json_extract(record_data, '$.total_kiddies_products') AS REAL), 0),
+    total_teevo = COALESCE(CAST(json_extract(record_data, '$.total_teevo') AS REAL), 0),
+    total_braille_nolb = COALESCE(CAST(json_extract(record_data, '$.total_braille_nolb') AS REAL), 0),
+    total_youth_aglow = COALESCE(CAST(json_extract(record_data, '$.total_youth_aglow') AS REAL), 0),
+    total_local_distribution = COALESCE(CAST(json_extract(record_data, '$.total_local_distribution') AS REAL), 0),
+    total_subscriptions_dubais = COALESCE(CAST(json_extract(record_data, '$.total_subscriptions_dubais') AS REAL), 0),
+    original_amount = COALESCE(CAST(json_extract(record_data, '$.original_amount') AS REAL), 0),
+    grand_total = COALESCE(CAST(json_extract(record_data, '$.grand_total') AS REAL), 0);
+
+-- Backfill typed columns for existing teenager_partners records
+UPDATE teenager_partners SET
+    zone = COALESCE(json_extract(record_data, '$.zone'), ''),
+    currency = COALESCE(NULLIF(json_extract(record_data, '$.currency'), ''), 'ESPEES'),
+    title = COALESCE(json_extract(record_data, '$.title'), ''),
+    first_name = COALESCE(json_extract(record_data, '$.first_name'), ''),
+    surname = COALESCE(json_extract(record_data, '$.surname'), ''),
+    email = COALESCE(json_extract(record_data, '$.email'), ''),
+    kingschat_phone = COALESCE(json_extract(record_data, '$.kingschat_phone'), ''),
+    church = COALESCE(json_extract(record_data, '$.church'), ''),
+    group_name = COALESCE(json_extract(record_data, '$.group_name'), json_extract(record_data, '$.group'), ''),
+    total_wonder_challenge = COALESCE(CAST(json_extract(record_data, '$.total_wonder_challenge') AS REAL), 0),
+    total_rhapsody_languages = COALESCE(CAST(json_extract(record_data, '$.total_rhapsody_languages') AS REAL), 0),
+    total_kiddies_products = COALESCE(CAST(json_extract(record_data, '$.total_kiddies_products') AS REAL), 0),
+    total_teevo = COALESCE(CAST(json_extract(record_data, '$.total_teevo') AS REAL), 0),
+    total_braille_nolb = COALESCE(CAST(json_extract(record_data, '$.total_braille_nolb') AS REAL), 0),
+    total_youth_aglow = COALESCE(CAST(json_extract(record_data, '$.total_youth_aglow') AS REAL), 0),
+    total_local_distribution = COALESCE(CAST(json_extract(record_data, '$.total_local_distribution') AS REAL), 0),
+    total_subscriptions_dubais = COALESCE(CAST(json_extract(record_data, '$.total_subscriptions_dubais') AS REAL), 0),
+    original_amount = COALESCE(CAST(json_extract(record_data, '$.original_amount') AS REAL), 0),
+    grand_total = COALESCE(CAST(json_extract(record_data, '$.grand_total') AS REAL), 0);
+
+-- Backfill typed columns for existing external_partners records
+UPDATE external_partners SET
+    zone = COALESCE(json_extract(record_data, '$.zone'), ''),
+    currency = COALESCE(NULLIF(json_extract(record_data, '$.currency'), ''), 'ESPEES'),
+    title = COALESCE(json_extract(record_data, '$.title'), ''),
+    first_name = COALESCE(json_extract(record_data, '$.first_name'), ''),
+    surname = COALESCE(json_extract(record_data, '$.surname'), ''),
+    email = COALESCE(json_extract(record_data, '$.email'), ''),
+    kingschat_phone = COALESCE(json_extract(record_data, '$.kingschat_phone'), ''),
+    church = COALESCE(json_extract(record_data, '$.church'), ''),
+    group_name = COALESCE(json_extract(record_data, '$.group_name'), json_extract(record_data, '$.group'), ''),
+    total_wonder_challenge = COALESCE(CAST(json_extract(record_data, '$.total_wonder_challenge') AS REAL), 0),
+    total_rhapsody_languages = COALESCE(CAST(json_extract(record_data, '$.total_rhapsody_languages') AS REAL), 0),
+    total_kiddies_products = COALESCE(CAST(json_extract(record_data, '$.total_kiddies_products') AS REAL), 0),
+    total_teevo = COALESCE(CAST(json_extract(record_data, '$.total_teevo') AS REAL), 0),
+    total_braille_nolb = COALESCE(CAST(json_extract(record_data, '$.total_braille_nolb') AS REAL), 0),
+    total_youth_aglow = COALESCE(CAST(json_extract(record_data, '$.total_youth_aglow') AS REAL), 0),
+    total_local_distribution = COALESCE(CAST(json_extract(record_data, '$.total_local_distribution') AS REAL), 0),
+    total_subscriptions_dubais = COALESCE(CAST(json_extract(record_data, '$.total_subscriptions_dubais') AS REAL), 0),
+    original_amount = COALESCE(CAST(json_extract(record_data, '$.original_amount') AS REAL), 0),
+    grand_total = COALESCE(CAST(json_extract(record_data, '$.grand_total') AS REAL), 0);
@@ -0,0 +1,307 @@
+-- Replace the four identically-shaped partner tables with a single partners
+-- table keyed by record_type (mirroring church_partner_records), and keep
+-- views named after the old tables so existing queries and backups still work.
+
+CREATE TABLE IF NOT EXISTS partners (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    record_type TEXT NOT NULL,
+    record_data TEXT NOT NULL,
+    submission_date DATETIME NOT NULL,
+    zone TEXT NOT NULL DEFAULT '',
+    currency TEXT NOT NULL DEFAULT 'ESPEES',
+    title TEXT NOT NULL DEFAULT '',
+    first_name TEXT NOT NULL DEFAULT '',
+    surname TEXT NOT NULL DEFAULT '',
+    email TEXT NOT NULL DEFAULT '',
+    kingschat_phone TEXT NOT NULL DEFAULT '',
+    church TEXT NOT NULL DEFAULT '',
+    group_name TEXT NOT NULL DEFAULT '',
+    total_wonder_challenge REAL NOT NULL DEFAULT 0,
+    total_rhapsody_languages REAL NOT NULL DEFAULT 0,
+    total_kiddies_products REAL NOT NULL DEFAULT 0,
+    total_teevo REAL NOT NULL DEFAULT 0,
+    total_braille_nolb REAL NOT NULL DEFAULT 0,
+    total_youth_aglow REAL NOT NULL DEFAULT 0,
+    total_local_distribution REAL NOT NULL DEFAULT 0,
+    total_subscriptions_dubais REAL NOT NULL DEFAULT 0,
+    original_amount REAL NOT NULL DEFAULT 0,
+    grand_total REAL NOT NULL DEFAULT 0,
+    legacy_id INTEGER
+);
+
+-- Copy existing records, keeping each old table's id as legacy_id so AP_12-style
+-- references still resolve. Adult partners keep their ids; the other tables'
+-- ids overlap them, so those records are numbered after the adult partners.
+INSERT INTO partners (id, legacy_id, record_type, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total)
+SELECT id, id, 'Adult Partner', record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total
+FROM adult_partners ORDER BY id;
+
+INSERT INTO partners (legacy_id, record_type, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total)
+SELECT id, 'Child Partner', record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total
+FROM children_partners ORDER BY id;
+
+INSERT INTO partners (legacy_id, record_type, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total)
+SELECT id, 'Teenager Partner', record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total
+FROM teenager_partners ORDER BY id;
+
+INSERT INTO partners (legacy_id, record_type, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total)
+SELECT id, 'External Partner', record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total
+FROM external_partners ORDER BY id;
+
+DROP TABLE adult_partners;
+DROP TABLE children_partners;
+DROP TABLE teenager_partners;
+DROP TABLE external_partners;
+
+-- All partners of a type in a zone, ordered by date
+CREATE INDEX IF NOT EXISTS idx_partners_type_zone_date ON partners(record_type, zone, submission_date);
+-- All partners in a zone regardless of type
+CREATE INDEX IF NOT EXISTS idx_partners_zone_date ON partners(zone, submission_date);
+
+-- Compatibility view for adult_partners
+CREATE VIEW IF NOT EXISTS adult_partners AS
+SELECT id, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total
+FROM partners WHERE record_type = 'Adult Partner';
+
+CREATE TRIGGER IF NOT EXISTS adult_partners_insert INSTEAD OF INSERT ON adult_partners
+BEGIN
+    INSERT INTO partners (record_type, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total)
+    VALUES ('Adult Partner', NEW.record_data, NEW.submission_date,
+        COALESCE(NEW.zone, ''),
+        COALESCE(NEW.currency, 'ESPEES'),
+        COALESCE(NEW.title, ''),
+        COALESCE(NEW.first_name, ''),
+        COALESCE(NEW.surname, ''),
+        COALESCE(NEW.email, ''),
+        COALESCE(NEW.kingschat_phone, ''),
+        COALESCE(NEW.church, ''),
+        COALESCE(NEW.group_name, ''),
+        COALESCE(NEW.total_wonder_challenge, 0),
+        COALESCE(NEW.total_rhapsody_languages, 0),
+        COALESCE(NEW.total_kiddies_products, 0),
+        COALESCE(NEW.total_teevo, 0),
+        COALESCE(NEW.total_braille_nolb, 0),
+        COALESCE(NEW.total_youth_aglow, 0),
+        COALESCE(NEW.total_local_distribution, 0),
+        COALESCE(NEW.total_subscriptions_dubais, 0),
+        COALESCE(NEW.original_amount, 0),
+        COALESCE(NEW.grand_total, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS adult_partners_update INSTEAD OF UPDATE ON adult_partners
+BEGIN
+    UPDATE partners SET
+        record_data = NEW.record_data,
+        submission_date = NEW.submission_date,
+        zone = NEW.zone,
+        currency = NEW.currency,
+        title = NEW.title,
+        first_name = NEW.first_name,
+        surname = NEW.surname,
+        email = NEW.email,
+        kingschat_phone = NEW.kingschat_phone,
+        church = NEW.church,
+        group_name = NEW.group_name,
+        total_wonder_challenge = NEW.total_wonder_challenge,
+        total_rhapsody_languages = NEW.total_rhapsody_languages,
+        total_kiddies_products = NEW.total_kiddies_products,
+        total_teevo = NEW.total_teevo,
+        total_braille_nolb = NEW.total_braille_nolb,
+        total_youth_aglow = NEW.total_youth_aglow,
+        total_local_distribution = NEW.total_local_distribution,
+        total_subscriptions_dubais = NEW.total_subscriptions_dubais,
+        original_amount = NEW.original_amount,
+        grand_total = NEW.grand_total
+    WHERE id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS adult_partners_delete INSTEAD OF DELETE ON adult_partners
+BEGIN
+    DELETE FROM partners WHERE id = OLD.id;
+END;
+
+-- Compatibility view for children_partners
+CREATE VIEW IF NOT EXISTS children_partners AS
+SELECT id, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total
+FROM partners WHERE record_type = 'Child Partner';
+
+CREATE TRIGGER IF NOT EXISTS children_partners_insert INSTEAD OF INSERT ON children_partners
+BEGIN
+    INSERT INTO partners (record_type, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total)
+    VALUES ('Child Partner', NEW.record_data, NEW.submission_date,
+        COALESCE(NEW.zone, ''),
+        COALESCE(NEW.currency, 'ESPEES'),
+        COALESCE(NEW.title, ''),
+        COALESCE(NEW.first_name, ''),
+        COALESCE(NEW.surname, ''),
+        COALESCE(NEW.email, ''),
+        COALESCE(NEW.kingschat_phone, ''),
+        COALESCE(NEW.church, ''),
+        COALESCE(NEW.group_name, ''),
+        COALESCE(NEW.total_wonder_challenge, 0),
+        COALESCE(NEW.total_rhapsody_languages, 0),
+        COALESCE(NEW.total_kiddies_products, 0),
+        COALESCE(NEW.total_teevo, 0),
+        COALESCE(NEW.total_braille_nolb, 0),
+        COALESCE(NEW.total_youth_aglow, 0),
+        COALESCE(NEW.total_local_distribution, 0),
+        COALESCE(NEW.total_subscriptions_dubais, 0),
+        COALESCE(NEW.original_amount, 0),
+        COALESCE(NEW.grand_total, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS children_partners_update INSTEAD OF UPDATE ON children_partners
+BEGIN
+    UPDATE partners SET
+        record_data = NEW.record_data,
+        submission_date = NEW.submission_date,
+        zone = NEW.zone,
+        currency = NEW.currency,
+        title = NEW.title,
+        first_name = NEW.first_name,
+        surname = NEW.surname,
+        email = NEW.email,
+        kingschat_phone = NEW.kingschat_phone,
+        church = NEW.church,
+        group_name = NEW.group_name,
+        total_wonder_challenge = NEW.total_wonder_challenge,
+        total_rhapsody_languages = NEW.total_rhapsody_languages,
+        total_kiddies_products = NEW.total_kiddies_products,
+        total_teevo = NEW.total_teevo,
+        total_braille_nolb = NEW.total_braille_nolb,
+        total_youth_aglow = NEW.total_youth_aglow,
+        total_local_distribution = NEW.total_local_distribution,
+        total_subscriptions_dubais = NEW.total_subscriptions_dubais,
+        original_amount = NEW.original_amount,
+        grand_total = NEW.grand_total
+    WHERE id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS children_partners_delete INSTEAD OF DELETE ON children_partners
+BEGIN
+    DELETE FROM partners WHERE id = OLD.id;
+END;
+
+-- Compatibility view for teenager_partners
+CREATE VIEW IF NOT EXISTS teenager_partners AS
+SELECT id, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total
+FROM partners WHERE record_type = 'Teenager Partner';
+
+CREATE TRIGGER IF NOT EXISTS teenager_partners_insert INSTEAD OF INSERT ON teenager_partners
+BEGIN
+    INSERT INTO partners (record_type, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total)
+    VALUES ('Teenager Partner', NEW.record_data, NEW.submission_date,
+        COALESCE(NEW.zone, ''),
+        COALESCE(NEW.currency, 'ESPEES'),
+        COALESCE(NEW.title, ''),
+        COALESCE(NEW.first_name, ''),
+        COALESCE(NEW.surname, ''),
+        COALESCE(NEW.email, ''),
+        COALESCE(NEW.kingschat_phone, ''),
+        COALESCE(NEW.church, ''),
+        COALESCE(NEW.group_name, ''),
+        COALESCE(NEW.total_wonder_challenge, 0),
+        COALESCE(NEW.total_rhapsody_languages, 0),
+        COALESCE(NEW.total_kiddies_products, 0),
+        COALESCE(NEW.total_teevo, 0),
+        COALESCE(NEW.total_braille_nolb, 0),
+        COALESCE(NEW.total_youth_aglow, 0),
+        COALESCE(NEW.total_local_distribution, 0),
+        COALESCE(NEW.total_subscriptions_dubais, 0),
+        COALESCE(NEW.original_amount, 0),
+        COALESCE(NEW.grand_total, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS teenager_partners_update INSTEAD OF UPDATE ON teenager_partners
+BEGIN
+    UPDATE partners SET
+        record_data = NEW.record_data,
+        submission_date = NEW.submission_date,
+        zone = NEW.zone,
+        currency = NEW.currency,
+        title = NEW.title,
+        first_name = NEW.first_name,
+        surname = NEW.surname,
+        email = NEW.email,
+        kingschat_phone = NEW.kingschat_phone,
+        church = NEW.church,
+        group_name = NEW.group_name,
+        total_wonder_challenge = NEW.total_wonder_challenge,
+        total_rhapsody_languages = NEW.total_rhapsody_languages,
+        total_kiddies_products = NEW.total_kiddies_products,
+        total_teevo = NEW.total_teevo,
+        total_braille_nolb = NEW.total_braille_nolb,
+        total_youth_aglow = NEW.total_youth_aglow,
+        total_local_distribution = NEW.total_local_distribution,
+        total_subscriptions_dubais = NEW.total_subscriptions_dubais,
+        original_amount = NEW.original_amount,
+        grand_total = NEW.grand_total
+    WHERE id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS teenager_partners_delete INSTEAD OF DELETE ON teenager_partners
+BEGIN
+    DELETE FROM partners WHERE id = OLD.id;
+END;
+
+-- Compatibility view for external_partners
+CREATE VIEW IF NOT EXISTS external_partners AS
+SELECT id, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total
+FROM partners WHERE record_type = 'External Partner';
+
+CREATE TRIGGER IF NOT EXISTS external_partners_insert INSTEAD OF INSERT ON external_partners
+BEGIN
+    INSERT INTO partners (record_type, record_data, submission_date, zone, currency, title, first_name, surname, email, kingschat_phone, church, group_name, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais, original_amount, grand_total)
+    VALUES ('External Partner', NEW.record_data, NEW.submission_date,
+        COALESCE(NEW.zone, ''),
+        COALESCE(NEW.currency, 'ESPEES'),
+        COALESCE(NEW.title, ''),
+        COALESCE(NEW.first_name, ''),
+        COALESCE(NEW.surname, ''),
+        COALESCE(NEW.email, ''),
+        COALESCE(NEW.kingschat_phone, ''),
+        COALESCE(NEW.church, ''),
+        COALESCE(NEW.group_name, ''),
+        COALESCE(NEW.total_wonder_challenge, 0),
+        COALESCE(NEW.total_rhapsody_languages, 0),
+        COALESCE(NEW.total_kiddies_products, 0),
+        COALESCE(NEW.total_teevo, 0),
+        COALESCE(NEW.total_braille_nolb, 0),
+        COALESCE(NEW.total_youth_aglow, 0),
+        COALESCE(NEW.total_local_distribution, 0),
+        COALESCE(NEW.total_subscriptions_dubais, 0),
+        COALESCE(NEW.original_amount, 0),
+        COALESCE(NEW.grand_total, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS external_partners_update INSTEAD OF UPDATE ON external_partners
+BEGIN
+    UPDATE partners SET
+        record_data = NEW.record_data,
+        submission_date = NEW.submission_date,
+        zone = NEW.zone,
+        currency = NEW.currency,
+        title = NEW.title,
+        first_name = NEW.first_name,
+        surname = NEW.surname,
+        email = NEW.email,
+        kingschat_phone = NEW.kingschat_phone,
+        church = NEW.church,
+        group_name = NEW.group_name,
+        total_wonder_challenge = NEW.total_wonder_challenge,
+        total_rhapsody_languages = NEW.total_rhapsody_languages,
+        total_kiddies_products = NEW.total_kiddies_products,
+        total_teevo = NEW.total_teevo,
+        total_braille_nolb = NEW.total_braille_nolb,
+        total_youth_aglow = NEW.total_youth_aglow,
+        total_local_distribution = NEW.total_local_distribution,
+        total_subscriptions_dubais = NEW.total_subscriptions_dubais,
+        original_amount = NEW.original_amount,
+        grand_total = NEW.grand_total
+    WHERE id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS external_partners_delete INSTEAD OF DELETE ON external_partners
+BEGIN
+    DELETE FROM partners WHERE id = OLD.id;
+END;
@@ -0,0 +1,131 @@
+-- Pre-aggregated partner totals per zone, record type, sponsorship category and
+-- month, so headline dashboards read a few hundred rows instead of every record.
+-- category 'all' counts every record with its full amounts; the other categories
+-- are the typed sponsorship columns, counting records with a non-zero amount and
+-- converting to ESPEES at the record's own rate. External partner categories live
+-- in record_data and only appear under 'all'.
+-- The triggers keep the totals current for every write path; the table is filled
+-- from existing records by partner_records.rebuild_zone_totals().
+
+-- Zone to region map, synced from zones_data.json by partner_records.sync_partner_zone_regions()
+CREATE TABLE IF NOT EXISTS zone_regions (
+    zone TEXT PRIMARY KEY,
+    region TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS zone_totals (
+    zone TEXT NOT NULL,
+    region TEXT NOT NULL DEFAULT '',
+    record_type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    month TEXT NOT NULL,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    original_amount REAL NOT NULL DEFAULT 0,
+    grand_total REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (zone, record_type, category, month)
+);
+
+-- Headline reads filter on category first
+CREATE INDEX IF NOT EXISTS idx_zone_totals_category ON zone_totals(category, record_type);
+
+CREATE TRIGGER IF NOT EXISTS partners_zone_totals_insert AFTER INSERT ON partners
+BEGIN
+    INSERT INTO zone_totals (zone, region, record_type, category, month, record_count, original_amount, grand_total)
+    SELECT NEW.zone,
+           COALESCE((SELECT region FROM zone_regions WHERE zone = NEW.zone), ''),
+           NEW.record_type, category, COALESCE(strftime('%Y-%m', NEW.submission_date), ''),
+           record_count, original_amount, COALESCE(grand_total, 0)
+    FROM (
+        SELECT 'all' AS category, 1 AS record_count, NEW.original_amount AS original_amount, NEW.grand_total AS grand_total
+        UNION ALL SELECT 'total_wonder_challenge', 1, NEW.total_wonder_challenge, NEW.total_wonder_challenge * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_rhapsody_languages', 1, NEW.total_rhapsody_languages, NEW.total_rhapsody_languages * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_kiddies_products', 1, NEW.total_kiddies_products, NEW.total_kiddies_products * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_teevo', 1, NEW.total_teevo, NEW.total_teevo * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_braille_nolb', 1, NEW.total_braille_nolb, NEW.total_braille_nolb * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_youth_aglow', 1, NEW.total_youth_aglow, NEW.total_youth_aglow * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_local_distribution', 1, NEW.total_local_distribution, NEW.total_local_distribution * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_subscriptions_dubais', 1, NEW.total_subscriptions_dubais, NEW.total_subscriptions_dubais * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+    )
+    WHERE category = 'all' OR original_amount != 0
+    ON CONFLICT (zone, record_type, category, month) DO UPDATE SET
+        record_count = record_count + excluded.record_count,
+        original_amount = original_amount + excluded.original_amount,
+        grand_total = grand_total + excluded.grand_total;
+END;
+
+CREATE TRIGGER IF NOT EXISTS partners_zone_totals_delete AFTER DELETE ON partners
+BEGIN
+    INSERT INTO zone_totals (zone, region, record_type, category, month, record_count, original_amount, grand_total)
+    SELECT OLD.zone,
+           COALESCE((SELECT region FROM zone_regions WHERE zone = OLD.zone), ''),
+           OLD.record_type, category, COALESCE(strftime('%Y-%m', OLD.submission_date), ''),
+           record_count, original_amount, COALESCE(grand_total, 0)
+    FROM (
+        SELECT 'all' AS category, -1 AS record_count, -OLD.original_amount AS original_amount, -OLD.grand_total AS grand_total
+        UNION ALL SELECT 'total_wonder_challenge', -1, -OLD.total_wonder_challenge, -OLD.total_wonder_challenge * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_rhapsody_languages', -1, -OLD.total_rhapsody_languages, -OLD.total_rhapsody_languages * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_kiddies_products', -1, -OLD.total_kiddies_products, -OLD.total_kiddies_products * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_teevo', -1, -OLD.total_teevo, -OLD.total_teevo * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_braille_nolb', -1, -OLD.total_braille_nolb, -OLD.total_braille_nolb * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_youth_aglow', -1, -OLD.total_youth_aglow, -OLD.total_youth_aglow * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_local_distribution', -1, -OLD.total_local_distribution, -OLD.total_local_distribution * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_subscriptions_dubais', -1, -OLD.total_subscriptions_dubais, -OLD.total_subscriptions_dubais * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+    )
+    WHERE category = 'all' OR original_amount != 0
+    ON CONFLICT (zone, record_type, category, month) DO UPDATE SET
+        record_count = record_count + excluded.record_count,
+        original_amount = original_amount + excluded.original_amount,
+        grand_total = grand_total + excluded.grand_total;
+    DELETE FROM zone_totals
+    WHERE zone = OLD.zone AND record_type = OLD.record_type
+      AND month = COALESCE(strftime('%Y-%m', OLD.submission_date), '') AND record_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS partners_zone_totals_update AFTER UPDATE OF zone, record_type, submission_date, original_amount, grand_total, total_wonder_challenge, total_rhapsody_languages, total_kiddies_products, total_teevo, total_braille_nolb, total_youth_aglow, total_local_distribution, total_subscriptions_dubais ON partners
+BEGIN
+    INSERT INTO zone_totals (zone, region, record_type, category, month, record_count, original_amount, grand_total)
+    SELECT OLD.zone,
+           COALESCE((SELECT region FROM zone_regions WHERE zone = OLD.zone), ''),
+           OLD.record_type, category, COALESCE(strftime('%Y-%m', OLD.submission_date), ''),
+           record_count, original_amount, COALESCE(grand_total, 0)
+    FROM (
+        SELECT 'all' AS category, -1 AS record_count, -OLD.original_amount AS original_amount, -OLD.grand_total AS grand_total
+        UNION ALL SELECT 'total_wonder_challenge', -1, -OLD.total_wonder_challenge, -OLD.total_wonder_challenge * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_rhapsody_languages', -1, -OLD.total_rhapsody_languages, -OLD.total_rhapsody_languages * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_kiddies_products', -1, -OLD.total_kiddies_products, -OLD.total_kiddies_products * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_teevo', -1, -OLD.total_teevo, -OLD.total_teevo * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_braille_nolb', -1, -OLD.total_braille_nolb, -OLD.total_braille_nolb * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_youth_aglow', -1, -OLD.total_youth_aglow, -OLD.total_youth_aglow * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_local_distribution', -1, -OLD.total_local_distribution, -OLD.total_local_distribution * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+        UNION ALL SELECT 'total_subscriptions_dubais', -1, -OLD.total_subscriptions_dubais, -OLD.total_subscriptions_dubais * OLD.grand_total / NULLIF(OLD.original_amount, 0)
+    )
+    WHERE category = 'all' OR original_amount != 0
+    ON CONFLICT (zone, record_type, category, month) DO UPDATE SET
+        record_count = record_count + excluded.record_count,
+        original_amount = original_amount + excluded.original_amount,
+        grand_total = grand_total + excluded.grand_total;
+    INSERT INTO zone_totals (zone, region, record_type, category, month, record_count, original_amount, grand_total)
+    SELECT NEW.zone,
+           COALESCE((SELECT region FROM zone_regions WHERE zone = NEW.zone), ''),
+           NEW.record_type, category, COALESCE(strftime('%Y-%m', NEW.submission_date), ''),
+           record_count, original_amount, COALESCE(grand_total, 0)
+    FROM (
+        SELECT 'all' AS category, 1 AS record_count, NEW.original_amount AS original_amount, NEW.grand_total AS grand_total
+        UNION ALL SELECT 'total_wonder_challenge', 1, NEW.total_wonder_challenge, NEW.total_wonder_challenge * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_rhapsody_languages', 1, NEW.total_rhapsody_languages, NEW.total_rhapsody_languages * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_kiddies_products', 1, NEW.total_kiddies_products, NEW.total_kiddies_products * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_teevo', 1, NEW.total_teevo, NEW.total_teevo * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_braille_nolb', 1, NEW.total_braille_nolb, NEW.total_braille_nolb * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_youth_aglow', 1, NEW.total_youth_aglow, NEW.total_youth_aglow * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_local_distribution', 1, NEW.total_local_distribution, NEW.total_local_distribution * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+        UNION ALL SELECT 'total_subscriptions_dubais', 1, NEW.total_subscriptions_dubais, NEW.total_subscriptions_dubais * NEW.grand_total / NULLIF(NEW.original_amount, 0)
+    )
+    WHERE category = 'all' OR original_amount != 0
+    ON CONFLICT (zone, record_type, category, month) DO UPDATE SET
+        record_count = record_count + excluded.record_count,
+        original_amount = original_amount + excluded.original_amount,
+        grand_total = grand_total + excluded.grand_total;
+    DELETE FROM zone_totals
+    WHERE zone = OLD.zone AND record_type = OLD.record_type
+      AND month = COALESCE(strftime('%Y-%m', OLD.submission_date), '') AND record_count <= 0;
+END;
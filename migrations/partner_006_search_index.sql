@@ -0,0 +1,33 @@
+-- Full-text index over the partner fields the search boxes match (see search.py),
+-- so a search reads the matching ids from the index instead of scanning every
+-- record with LIKE. rowid is the partners id; triggers keep the index current
+-- for every write path.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS partners_search USING fts5(
+    first_name, surname, title, email, kingschat_phone, church, group_name, zone,
+    tokenize = 'unicode61', prefix = '2 3'
+);
+
+-- Rebuild from scratch, so replaying the migration never indexes a record twice
+DELETE FROM partners_search;
+
+INSERT INTO partners_search (rowid, first_name, surname, title, email, kingschat_phone, church, group_name, zone)
+SELECT id, first_name, surname, title, email, kingschat_phone, church, group_name, zone FROM partners;
+
+CREATE TRIGGER IF NOT EXISTS partners_search_insert AFTER INSERT ON partners
+BEGIN
+    INSERT INTO partners_search (rowid, first_name, surname, title, email, kingschat_phone, church, group_name, zone)
+    VALUES (NEW.id, NEW.first_name, NEW.surname, NEW.title, NEW.email, NEW.kingschat_phone, NEW.church, NEW.group_name, NEW.zone);
+END;
+
+CREATE TRIGGER IF NOT EXISTS partners_search_delete AFTER DELETE ON partners
+BEGIN
+    DELETE FROM partners_search WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS partners_search_update AFTER UPDATE OF first_name, surname, title, email, kingschat_phone, church, group_name, zone ON partners
+BEGIN
+    DELETE FROM partners_search WHERE rowid = OLD.id;
+    INSERT INTO partners_search (rowid, first_name, surname, title, email, kingschat_phone, church, group_name, zone)
+    VALUES (NEW.id, NEW.first_name, NEW.surname, NEW.title, NEW.email, NEW.kingschat_phone, NEW.church, NEW.group_name, NEW.zone);
+END;
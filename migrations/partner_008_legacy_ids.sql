@@ -0,0 +1,8 @@
+-- Id each partner had in its old per-type table (see partner_002), so AP_12-style
+-- references made before the tables were merged still find their record. NULL
+-- for partners saved since; the column already exists where partner_002 ran
+-- after it gained legacy_id.
+
+ALTER TABLE partners ADD COLUMN legacy_id INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_partners_legacy_id ON partners(record_type, legacy_id);
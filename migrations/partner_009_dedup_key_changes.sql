@@ -0,0 +1,18 @@
+-- Count edits to the fields partners are matched on (see dedup.partner_keys) and
+-- deletes, so the cached dedup index is rebuilt when a saved partner's keys
+-- change and only extended when partners are added. Amount-only updates, like
+-- the ESPEES recompute, leave the count alone.
+
+ALTER TABLE data_version ADD COLUMN key_changes INTEGER NOT NULL DEFAULT 0;
+
+CREATE TRIGGER IF NOT EXISTS partners_key_changes_update AFTER UPDATE ON partners
+WHEN OLD.zone IS NOT NEW.zone OR OLD.first_name IS NOT NEW.first_name OR OLD.surname IS NOT NEW.surname
+    OR OLD.email IS NOT NEW.email OR OLD.kingschat_phone IS NOT NEW.kingschat_phone
+BEGIN
+    UPDATE data_version SET key_changes = key_changes + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS partners_key_changes_delete AFTER DELETE ON partners
+BEGIN
+    UPDATE data_version SET key_changes = key_changes + 1;
+END;
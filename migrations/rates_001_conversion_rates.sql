@@ -0,0 +1,35 @@
+-- Effective-dated exchange rates (units of a currency per ESPEES). A rate applies
+-- from its effective_from date until the currency's next entry, so totals can be
+-- recomputed with the rate in force on each record's submission date.
+-- currency.load_conversion_rates() seeds the table and records changes made to
+-- conversion_rates.json as new entries.
+
+CREATE TABLE IF NOT EXISTS conversion_rates (
+    currency TEXT NOT NULL,
+    rate REAL NOT NULL,
+    effective_from TEXT NOT NULL,
+    PRIMARY KEY (currency, effective_from)
+);
+
+-- Count writes so the cached rate history (currency.load_rate_history) is reloaded
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS conversion_rates_data_version_insert AFTER INSERT ON conversion_rates
+BEGIN
+    UPDATE data_version SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS conversion_rates_data_version_update AFTER UPDATE ON conversion_rates
+BEGIN
+    UPDATE data_version SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS conversion_rates_data_version_delete AFTER DELETE ON conversion_rates
+BEGIN
+    UPDATE data_version SET version = version + 1;
+END;
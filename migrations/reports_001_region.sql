@@ -0,0 +1,14 @@
+-- Store each report's region next to its zone so regional managers' reports are
+-- read with one indexed query instead of a users.db lookup and an IN (...) list.
+-- save_report() fills region from zone_regions, which is synced from
+-- zones_data.json by zones.sync_zone_regions(); app.init_db() backfills older reports.
+
+CREATE TABLE IF NOT EXISTS zone_regions (
+    zone TEXT PRIMARY KEY,
+    region TEXT NOT NULL
+);
+
+ALTER TABLE reports ADD COLUMN region TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_reports_region ON reports(region, id);
+CREATE INDEX IF NOT EXISTS idx_reports_username ON reports(username, id);
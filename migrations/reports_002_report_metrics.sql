@@ -0,0 +1,21 @@
+-- Keep each report's numeric metrics as rows so dashboard summaries are SQL
+-- aggregates joined to reports (by region, zone or period) instead of decoding
+-- every report_data blob on each view. save_report() rewrites a report's rows
+-- in the same transaction as the report itself.
+
+CREATE TABLE IF NOT EXISTS report_metrics (
+    report_id TEXT NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (report_id, metric)
+);
+
+-- Totals of one metric across reports
+CREATE INDEX IF NOT EXISTS idx_report_metrics_metric ON report_metrics(metric);
+
+-- Backfill from existing reports; non-numeric values are not metrics
+INSERT OR REPLACE INTO report_metrics (report_id, metric, value)
+SELECT reports.id, metrics.key, metrics.value
+FROM reports, json_each(reports.report_data) AS metrics
+WHERE json_valid(reports.report_data)
+  AND metrics.type IN ('integer', 'real', 'true', 'false');
@@ -0,0 +1,7 @@
+-- Reports already store their integer year and month; add the quarter and
+-- index the three so period totals (see periods.py) are indexed reads.
+
+ALTER TABLE reports ADD COLUMN quarter INTEGER
+    GENERATED ALWAYS AS ((month + 2) / 3) VIRTUAL;
+
+CREATE INDEX IF NOT EXISTS idx_reports_period ON reports(year, quarter, month);
@@ -0,0 +1,22 @@
+-- One entry per submitted workbook: its SHA-256, the zone it was uploaded for,
+-- how many rows were read, saved and skipped as already saved, and how long
+-- it took. record_templates checks it so an identical file isn't processed again.
+
+CREATE TABLE IF NOT EXISTS upload_ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_hash TEXT NOT NULL,
+    file_name TEXT,
+    zone TEXT NOT NULL,
+    currency TEXT,
+    uploaded_by TEXT,
+    status TEXT NOT NULL,
+    rows_read INTEGER NOT NULL DEFAULT 0,
+    rows_saved INTEGER NOT NULL DEFAULT 0,
+    rows_skipped INTEGER NOT NULL DEFAULT 0,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+
+-- Earlier submissions of a file to a zone
+CREATE INDEX IF NOT EXISTS idx_upload_ledger_file ON upload_ledger(file_hash, zone);
@@ -0,0 +1,51 @@
+import math
+import pandas as pd
+import streamlit as st
+from db import get_connection
+
+# Rows per page offered by the paginated report tables; the first is the default
+PAGE_SIZES = [25, 50, 100, 250]
+
+def fetch_page(name, query, params=(), page=1, page_size=PAGE_SIZES[0], order_by='id DESC'):
+    """Run a SELECT for one page of its rows, returning (DataFrame, total row count).
+    
+    The total is counted in SQL over the same query, so only page_size rows are
+    read into pandas however many match. Pages are numbered from 1.
+    """
+    conn = get_connection(name)
+    total = conn.execute(f"SELECT COUNT(*) FROM ({query})", list(params)).fetchone()[0]
+    df = pd.read_sql_query(
+        f"{query} ORDER BY {order_by} LIMIT ? OFFSET ?", conn,
+        params=[*params, int(page_size), (max(int(page), 1) - 1) * int(page_size)]
+    )
+    return df, total
+
+def fetch_report_page(key, fetch):
+    """Fetch the page of a report table selected by its pagination_controls().
+    
+    fetch(page, page_size) returns (DataFrame, total); a page past the end, e.g.
+    after a narrower search, falls back to the last page. Returns (DataFrame, total).
+    """
+    page = st.session_state.get(f"{key}_page", 1)
+    page_size = st.session_state.get(f"{key}_page_size", PAGE_SIZES[0])
+    df, total = fetch(page, page_size)
+    
+    last_page = max(1, math.ceil(total / page_size))
+    if page > last_page:
+        st.session_state[f"{key}_page"] = last_page
+        df, total = fetch(last_page, page_size)
+    return df, total
+
+def pagination_controls(key, total):
+    """Rows-per-page and page pickers for a table fetched with fetch_report_page()"""
+    page_size = st.session_state.get(f"{key}_page_size", PAGE_SIZES[0])
+    last_page = max(1, math.ceil(total / page_size))
+    
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        st.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+    with col2:
+        page = st.number_input("Page", min_value=1, max_value=last_page, step=1, key=f"{key}_page")
+    with col3:
+        first = (page - 1) * page_size + 1 if total else 0
+        st.caption(f"Showing {first:,}–{min(page * page_size, total):,} of {total:,} records")
@@ -1,14 +1,24 @@
 import streamlit as st
 import pandas as pd
-from partner_records import fetch_partner_records, CURRENCIES
+from partner_records import load_partner_records, load_zone_totals, CURRENCIES, SPONSORSHIP_FIELDS
+from church_records import convert_amounts, format_amounts
 from datetime import datetime
 import io
 
+# Category amounts, each in its record's own currency
+CATEGORY_AMOUNT_COLUMNS = SPONSORSHIP_FIELDS + ['rim', 'translators_network_international', 'sponsorship_retail_center']
+
+# Fields the analytics read, besides id, record_type and submission_date
+ANALYTICS_COLUMNS = [
+    'zone', 'title', 'first_name', 'surname', 'email', 'currency', 'grand_total',
+    *CATEGORY_AMOUNT_COLUMNS
+]
+
 def partner_analytics_ui():
     st.header("Partner Analytics")
     
     # Fetch all partner records
-    df = fetch_partner_records()
+    df = load_partner_records(columns=ANALYTICS_COLUMNS)
     
     if df.empty:
         st.warning("No partner records found")
@@ -20,6 +30,11 @@ def partner_analytics_ui():
         CURRENCIES,
         key="analytics_display_currency"
     )
+    
+    # Express ESPEES totals and each record's category amounts in the display currency
+    df['grand_total'] = convert_amounts(df['grand_total'], 'ESPEES', display_currency)
+    for column in CATEGORY_AMOUNT_COLUMNS:
+        df[column] = convert_amounts(df[column], df['currency'], display_currency)
 
     # Filters section
     st.subheader("Filters")
@@ -199,12 +214,8 @@ def partner_analytics_ui():
     
     # Create a formatted display DataFrame
     display_df = top_partners[display_cols].copy()
-    display_df['Partner Name'] = display_df.apply(
-        lambda x: f"{x['title']} {x['first_name']} {x['surname']}", axis=1
-    )
-    display_df[metric_label] = display_df[col_name].apply(
-        lambda x: f"{x:,.2f}"
-    )
+    display_df['Partner Name'] = display_df['title'] + ' ' + display_df['first_name'] + ' ' + display_df['surname']
+    display_df[metric_label] = format_amounts(display_df[col_name])
     
     # Final display columns
     final_display_cols = ['Partner Name', 'zone', 'record_type', 'email', metric_label]
@@ -216,15 +227,24 @@ def partner_analytics_ui():
     # Zone-wise Analysis
     if selected_zone == 'All Zones':
         st.write("### Zone-wise Analysis")
-        zone_analysis = filtered_df.groupby('zone').agg({
-            'grand_total': 'sum',
-            'id': 'count'
-        }).reset_index()
+        if min_amount == 0 and max_amount >= df[col_for_range].max():
+            # No amount filter in effect, so read the pre-aggregated zone totals
+            zone_totals = load_zone_totals(
+                record_types=[selected_type] if selected_type != 'All Types' else None
+            )
+            zone_analysis = zone_totals.groupby('zone').agg({
+                'grand_total': 'sum',
+                'record_count': 'sum'
+            }).reset_index()
+            zone_analysis['grand_total'] = convert_amounts(zone_analysis['grand_total'], 'ESPEES', display_currency)
+        else:
+            zone_analysis = filtered_df.groupby('zone').agg({
+                'grand_total': 'sum',
+                'id': 'count'
+            }).reset_index()
         
         zone_analysis.columns = ['Zone', 'Total Amount', 'Partner Count']
-        zone_analysis['Total Amount'] = zone_analysis['Total Amount'].apply(
-            lambda x: f"{x:,.2f} {display_currency}"
-        )
+        zone_analysis['Total Amount'] = format_amounts(zone_analysis['Total Amount']) + f" {display_currency}"
         st.dataframe(zone_analysis, use_container_width=True)
 
     # Export filtered data
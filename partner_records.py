@@ -1,9 +1,21 @@
-from church_records import CURRENCIES, CONVERSION_RATES, convert_to_espees
+from church_records import (
+    CURRENCIES, CONVERSION_RATES, convert_to_espees,
+    json_column, json_safe, repair_record_json
+)
+from currency import convert_amounts_as_of
+from db import (
+    get_connection, transaction, run_migrations, cached_by_data_version
+)
+from users import get_user_details
+from zones import load_zones_data, sync_zone_regions
+from pagination import fetch_page, PAGE_SIZES
+from search import match_condition
+from periods import period_conditions
 import streamlit as st
-import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
 import io
+import math
 import plotly.express as px
 import plotly.graph_objects as go
 import json
@@ -11,106 +23,191 @@ import json
 TITLE_OPTIONS = ["Bro", "Sis", "Dcn", "Dcns", "Pastor", "Mr", "Mrs"]
 CHILD_TITLE_OPTIONS = ["Bro", "Sis"]
 
+# Map partner record types to their legacy per-type tables. Since
+# migrations/partner_002_unified_partners.sql all records live in the single
+# partners table and these names are compatibility views over it.
+PARTNER_TABLES = {
+    'Adult Partner': 'adult_partners',
+    'Child Partner': 'children_partners',
+    'Teenager Partner': 'teenager_partners',
+    'External Partner': 'external_partners'
+}
+
+# Sponsorship amount fields for adult, child and teenager partners
+SPONSORSHIP_FIELDS = [
+    'total_wonder_challenge', 'total_rhapsody_languages',
+    'total_kiddies_products', 'total_teevo', 'total_braille_nolb',
+    'total_youth_aglow', 'total_local_distribution',
+    'total_subscriptions_dubais'
+]
+
+# Sponsorship amount fields for external partners
+EXTERNAL_SPONSORSHIP_FIELDS = [
+    'rhapsody_subscriptions_dubais', 'sponsorship_retail_center',
+    'translators_network_international', 'rhapsody_influencers_network', 'rim'
+]
+
+# Fields promoted out of record_data into typed columns (see migrations/partner_001_typed_columns.sql)
+PARTNER_TEXT_COLUMNS = [
+    'zone', 'currency', 'title', 'first_name', 'surname',
+    'email', 'kingschat_phone', 'church', 'group_name'
+]
+PARTNER_AMOUNT_COLUMNS = SPONSORSHIP_FIELDS + ['original_amount', 'grand_total']
+PARTNER_COLUMNS = PARTNER_TEXT_COLUMNS + PARTNER_AMOUNT_COLUMNS
+
+# Integer calendar period of submission_date (see migrations/partner_005_periods.sql)
+PARTNER_PERIOD_COLUMNS = ['year', 'quarter', 'month']
+
 # Initialize the partner records database
 def init_partner_db():
     """Initialize the partner records database"""
-    conn = sqlite3.connect('partner_records.db')
-    c = conn.cursor()
+    with transaction('partner_records') as conn:
+        # Create tables with simplified schema
+        tables = ['adult_partners', 'children_partners', 'teenager_partners', 'external_partners']
+        for table in tables:
+            conn.execute(f'''CREATE TABLE IF NOT EXISTS {table}
+                         (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                          record_data TEXT NOT NULL,
+                          submission_date DATETIME NOT NULL)''')
+    
+    # Bring the schema up to date
+    applied = run_partner_db_migrations()
     
-   
+    # Keep the zone totals' regions in line with zones_data.json
+    sync_partner_zone_regions(force=bool(applied))
+    if ZONE_TOTALS_MIGRATION in applied:
+        rebuild_zone_totals()
+
+def repair_partner_json(conn):
+    """Repair record_data in whichever partner tables are stored as real tables"""
+    stored_tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'"
+    )]
+    for table in list(PARTNER_TABLES.values()) + ['partners']:
+        if table in stored_tables:
+            repair_record_json(conn, table)
+
+def run_partner_db_migrations():
+    """Apply versioned partner migrations (migrations/partner_NNN_*.sql) not yet applied"""
+    # SQLite's JSON functions reject NaN, which older uploads wrote into record_data
+    return run_migrations('partner_records', 'partner', before=repair_partner_json)
+
+def partner_column_values(record_data):
+    """Return the typed column values for a record, in PARTNER_COLUMNS order"""
+    values = []
+    for column in PARTNER_TEXT_COLUMNS:
+        value = record_data.get(column)
+        if column == 'group_name' and value is None:
+            # Uploaded records store the group under 'group'
+            value = record_data.get('group')
+        if column == 'currency' and not value:
+            value = 'ESPEES'
+        values.append('' if value is None else str(value))
     
-    # Create tables with simplified schema
-    tables = ['adult_partners', 'children_partners', 'teenager_partners', 'external_partners']
-    for table in tables:
-        c.execute(f'''CREATE TABLE IF NOT EXISTS {table}
-                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                      record_data TEXT NOT NULL,
-                      submission_date DATETIME NOT NULL)''')
+    for column in PARTNER_AMOUNT_COLUMNS:
+        try:
+            amount = float(record_data.get(column) or 0)
+        except (TypeError, ValueError):
+            amount = 0.0
+        values.append(0.0 if math.isnan(amount) else amount)
     
-    conn.commit()
-    conn.close()
+    return values
 
 # Add these functions at the top of the file
-def save_partner_record(record_type, record_data):
-    """Save partner record with currency conversion"""
-    try:
-        # Calculate original amount and converted amount (ESPEES)
-        currency = record_data.get('currency', 'ESPEES')
-        
+def partner_record_row(record_type, record_data, amounts_computed=False, row_hash=None):
+    """Compute amounts for a partner record and return its partners table row.
+    
+    With amounts_computed, original_amount and grand_total are taken as already set.
+    row_hash is the uploaded row's hash (see uploads.record_hashes), if any.
+    """
+    if record_type not in PARTNER_TABLES:
+        raise ValueError(f"Invalid record type: {record_type}")
+    
+    # Calculate original amount and converted amount (ESPEES)
+    currency = record_data.get('currency', 'ESPEES')
+    
+    if not amounts_computed:
         # Calculate total amount based on record type
         if record_type == "External Partner":
-            original_amount = sum([
-                float(record_data.get('rhapsody_subscriptions_dubais', 0)),
-                float(record_data.get('sponsorship_retail_center', 0)),
-                float(record_data.get('translators_network_international', 0)),
-                float(record_data.get('rhapsody_influencers_network', 0)),
-                float(record_data.get('rim', 0))
-            ])
+            amount_fields = EXTERNAL_SPONSORSHIP_FIELDS
         else:
-            original_amount = sum([
-                float(record_data.get('total_wonder_challenge', 0)),
-                float(record_data.get('total_rhapsody_languages', 0)),
-                float(record_data.get('total_kiddies_products', 0)),
-                float(record_data.get('total_teevo', 0)),
-                float(record_data.get('total_braille_nolb', 0)),
-                float(record_data.get('total_youth_aglow', 0)),
-                float(record_data.get('total_local_distribution', 0)),
-                float(record_data.get('total_subscriptions_dubais', 0))
-            ])
+            amount_fields = SPONSORSHIP_FIELDS
+        original_amount = sum(float(record_data.get(field, 0)) for field in amount_fields)
 
         # Convert to ESPEES and store both amounts
         grand_total = convert_to_espees(original_amount, currency)
-        
-        # Store both original and converted amounts
         record_data.update({
             'original_amount': original_amount,
-            'grand_total': grand_total,
-            'currency': currency  # Ensure currency is stored
+            'grand_total': grand_total
         })
-        
-        # Convert datetime objects to strings
-        submission_date = datetime.now()
-        processed_data = {}
-        for key, value in record_data.items():
-            if isinstance(value, datetime):
-                processed_data[key] = value.isoformat()
-            elif isinstance(value, pd._libs.tslibs.timestamps.Timestamp):
-                processed_data[key] = value.isoformat()
-            else:
-                processed_data[key] = value
+    
+    # Ensure currency is stored
+    record_data['currency'] = currency
+    
+    # Convert datetime objects (and NaN) to JSON-safe values
+    processed_data = {key: json_safe(value) for key, value in record_data.items()}
 
-        # Store as JSON string
-        record_json = json.dumps(processed_data)
-        
-        conn = sqlite3.connect('partner_records.db')
-        c = conn.cursor()
-        
-        # Map record type to table name
-        table_map = {
-            'Adult Partner': 'adult_partners',
-            'Child Partner': 'children_partners',
-            'Teenager Partner': 'teenager_partners',
-            'External Partner': 'external_partners'
-        }
-        
-        table_name = table_map.get(record_type)
-        if not table_name:
-            raise ValueError(f"Invalid record type: {record_type}")
-
-        # Insert record
-        c.execute(f"""INSERT INTO {table_name} 
-                     (record_data, submission_date)
-                     VALUES (?, ?)""",
-                  (record_json, submission_date))
-        
-        conn.commit()
-        conn.close()
+    # Store as JSON string along with its typed columns
+    return (record_type, json.dumps(processed_data), datetime.now(),
+            *partner_column_values(processed_data), row_hash)
+
+def insert_partner_rows(conn, rows):
+    """Insert prepared partner_record_row() rows in one executemany call.
+    
+    Rows whose hash is already saved are skipped; returns the number inserted.
+    """
+    columns = ', '.join(PARTNER_COLUMNS)
+    placeholders = ', '.join(['?'] * len(PARTNER_COLUMNS))
+    cursor = conn.executemany(f"""INSERT INTO partners
+                              (record_type, record_data, submission_date, {columns}, row_hash)
+                              VALUES (?, ?, ?, {placeholders}, ?)
+                              ON CONFLICT(row_hash) DO NOTHING""", rows)
+    return cursor.rowcount
+
+def save_partner_record(record_type, record_data):
+    """Save partner record with currency conversion"""
+    try:
+        row = partner_record_row(record_type, record_data)
+        with transaction('partner_records') as conn:
+            insert_partner_rows(conn, [row])
         
         return True, "Record saved successfully!"
     except Exception as e:
         st.error(f"Error saving record: {str(e)}")
         return False, f"Error saving record: {str(e)}"
 
+def save_partner_records_bulk(records, amounts_computed=False, row_hashes=None):
+    """Save many (record_type, record_data) pairs in a single transaction.
+    
+    All-or-nothing: if any record fails to convert or insert, nothing is saved.
+    Returns (success, message, row_errors, saved) where row_errors lists
+    {'row': index, 'error': message} for each record that could not be prepared
+    and saved counts the records inserted.
+    Pass amounts_computed when the records already carry original_amount and grand_total,
+    and row_hashes (one per record) to skip records an earlier upload already saved.
+    """
+    rows = []
+    row_errors = []
+    for index, (record_type, record_data) in enumerate(records):
+        try:
+            row_hash = row_hashes[index] if row_hashes else None
+            rows.append(partner_record_row(record_type, record_data, amounts_computed, row_hash))
+        except Exception as e:
+            row_errors.append({'row': index, 'error': str(e)})
+    
+    if row_errors:
+        return False, f"{len(row_errors)} of {len(records)} records are invalid; nothing was saved", row_errors, 0
+    
+    try:
+        with transaction('partner_records') as conn:
+            saved = insert_partner_rows(conn, rows)
+    except Exception as e:
+        return False, f"Error saving records: {e}", row_errors, 0
+    
+    if saved < len(rows):
+        return True, f"Saved {saved} records; {len(rows) - saved} were already saved", row_errors, saved
+    return True, f"Saved {saved} records", row_errors, saved
+
 # Function to add a new partner record
 def add_partner_record(partner_data, is_child=False, is_teenager=False):
     """Add a new partner record"""
@@ -130,90 +227,282 @@ def add_partner_record(partner_data, is_child=False, is_teenager=False):
         st.error(f"Error adding partner record: {str(e)}")
         return False, f"Error adding partner record: {str(e)}"
 
-# Function to fetch all partner records
-def fetch_partner_records(partner_type='all'):
-    """Fetch partner records with proper currency conversion"""
-    try:
-        conn = sqlite3.connect('partner_records.db')
-        
-        # Initialize empty list to store all records
-        all_records = []
-        
-        # Define table mappings
-        tables = {
-            'adult': ('adult_partners', 'Adult Partner'),
-            'children': ('children_partners', 'Child Partner'),
-            'teenager': ('teenager_partners', 'Teenager Partner'),
-            'external': ('external_partners', 'External Partner')
-        }
-        
-        # Fetch records based on partner type
-        if partner_type != 'all':
-            if partner_type in tables:
-                table_name, record_type = tables[partner_type]
-                query = f"SELECT id, record_data, submission_date FROM {table_name}"
-                df = pd.read_sql_query(query, conn)
-                if not df.empty:
-                    df['record_type'] = record_type
-                    all_records.append(df)
+# Migration that added zone_totals (see migrations/partner_004_zone_totals.sql)
+ZONE_TOTALS_MIGRATION = 4
+
+# zone_totals categories: every record, then each typed sponsorship column
+ZONE_TOTALS_CATEGORIES = ['all'] + SPONSORSHIP_FIELDS
+
+def sync_partner_zone_regions(force=False):
+    """Load the zone to region map from zones_data.json and apply it to zone_totals.
+    
+    Skipped while zones_data.json is unchanged since the last sync (see zones.sync_zone_regions).
+    """
+    if not sync_zone_regions('partner_records', force=force):
+        return
+    
+    with transaction('partner_records') as conn:
+        conn.execute("""UPDATE zone_totals SET region = COALESCE(
+                            (SELECT region FROM zone_regions WHERE zone_regions.zone = zone_totals.zone), '')""")
+
+def rebuild_zone_totals():
+    """Recompute zone_totals from the partners table (the triggers keep it current afterwards)"""
+    selects = []
+    for category in ZONE_TOTALS_CATEGORIES:
+        if category == 'all':
+            selects.append("""SELECT zone, record_type, 'all' AS category, month,
+                                     COUNT(*), SUM(original_amount), SUM(grand_total)
+                              FROM monthly GROUP BY zone, record_type, month""")
         else:
-            # Fetch from all tables
-            for table_name, record_type in tables.values():
-                try:
-                    query = f"SELECT id, record_data, submission_date FROM {table_name}"
-                    df = pd.read_sql_query(query, conn)
-                    if not df.empty:
-                        df['record_type'] = record_type
-                        all_records.append(df)
-                except:
-                    continue
-        
-        conn.close()
-        
-        # Combine all records
-        if not all_records:
-            return pd.DataFrame()
-            
-        combined_df = pd.concat(all_records, ignore_index=True)
-        
-        # Parse JSON data
-        def parse_record_data(record_data):
-            if isinstance(record_data, str):
-                return json.loads(record_data)
-            return record_data
-            
-        # Extract fields from JSON
-        combined_df['record_data'] = combined_df['record_data'].apply(parse_record_data)
-        
-        # Extract common fields
-        for field in ['title', 'first_name', 'surname', 'church', 'group_name', 
-                     'kingschat_phone', 'email', 'zone', 'currency', 
-                     'original_amount', 'grand_total']:
-            combined_df[field] = combined_df['record_data'].apply(lambda x: x.get(field, ''))
-        
-        # Extract numeric fields with proper type conversion
-        numeric_fields = [
-            'total_wonder_challenge', 'total_rhapsody_languages',
-            'total_kiddies_products', 'total_teevo', 'total_braille_nolb',
-            'total_youth_aglow', 'total_local_distribution',
-            'total_subscriptions_dubais'
-        ]
-        
-        for field in numeric_fields:
-            combined_df[field] = combined_df['record_data'].apply(
-                lambda x: float(x.get(field, 0))
-            )
+            selects.append(f"""SELECT zone, record_type, '{category}', month, COUNT(*), SUM({category}),
+                                      SUM(COALESCE({category} * grand_total / NULLIF(original_amount, 0), 0))
+                               FROM monthly WHERE {category} != 0 GROUP BY zone, record_type, month""")
+    
+    with transaction('partner_records') as conn:
+        conn.execute("DELETE FROM zone_totals")
+        # partners has its own integer month column, so select only what the totals use
+        conn.execute(f"""WITH monthly AS (
+                             SELECT zone, record_type, original_amount, grand_total, {', '.join(SPONSORSHIP_FIELDS)},
+                                    COALESCE(strftime('%Y-%m', submission_date), '') AS month
+                             FROM partners
+                         )
+                         INSERT INTO zone_totals
+                             (zone, record_type, category, month, record_count, original_amount, grand_total)
+                         {' UNION ALL '.join(selects)}""")
+        conn.execute("""UPDATE zone_totals SET region = COALESCE(
+                            (SELECT region FROM zone_regions WHERE zone_regions.zone = zone_totals.zone), '')""")
+
+@cached_by_data_version('partner_records')
+def load_zone_totals(category='all', record_types=None, zone=None):
+    """Read pre-aggregated partner totals (zone, region, record_type, month, record_count,
+    original_amount, grand_total) for one category, optionally narrowed by type and zone"""
+    query = """SELECT zone, region, record_type, month, record_count, original_amount, grand_total
+               FROM zone_totals WHERE category = ?"""
+    params = [category]
+    if record_types:
+        query += f" AND record_type IN ({', '.join(['?'] * len(record_types))})"
+        params.extend(record_types)
+    if zone:
+        query += " AND zone = ?"
+        params.append(zone)
+    return pd.read_sql_query(query, get_connection('partner_records'), params=params)
+
+@cached_by_data_version('partner_records')
+def load_partner_rollup(region=None, zone=None, group_name=None, record_types=None):
+    """Count and total partner records one level below the narrowest filter given: per
+    region, per zone of a region, per group of a zone, or per church of a group. Returns
+    the level's column, record_count and grand_total (ESPEES).
+    
+    Region and zone levels are read from zone_totals; groups and churches from the
+    partners of a single zone.
+    """
+    conditions = []
+    params = []
+    if record_types:
+        conditions.append(f"record_type IN ({', '.join(['?'] * len(record_types))})")
+        params.extend(record_types)
+    
+    if zone:
+        conditions.append('zone = ?')
+        params.append(zone)
+        if group_name is not None:
+            level = 'church'
+            conditions.append("COALESCE(group_name, '') = ?")
+            params.append(group_name)
+        else:
+            level = 'group_name'
+        query = f"""SELECT COALESCE({level}, '') AS {level}, COUNT(*) AS record_count,
+                           SUM(grand_total) AS grand_total
+                    FROM partners"""
+    else:
+        conditions.append("category = 'all'")
+        if region:
+            level = 'zone'
+            conditions.append('region = ?')
+            params.append(region)
+        else:
+            level = 'region'
+        query = f"""SELECT {level}, SUM(record_count) AS record_count, SUM(grand_total) AS grand_total
+                    FROM zone_totals"""
+    
+    query += f" WHERE {' AND '.join(conditions)} GROUP BY 1 ORDER BY grand_total DESC"
+    return pd.read_sql_query(query, get_connection('partner_records'), params=params)
+
+@cached_by_data_version('partner_records')
+def load_partner_period_totals(period, region=None, zone=None, record_types=None):
+    """Partner totals for one period (see periods.parse_period) by zone: record_count,
+    grand_total and each sponsorship category converted to ESPEES, in one indexed query"""
+    conditions, params = period_conditions(period)
+    if record_types:
+        conditions.append(f"record_type IN ({', '.join(['?'] * len(record_types))})")
+        params.extend(record_types)
+    if zone:
+        conditions.append('zone = ?')
+        params.append(zone)
+    elif region:
+        conditions.append('zone IN (SELECT zone FROM zone_regions WHERE region = ?)')
+        params.append(region)
+    
+    categories = ', '.join(
+        f"SUM(COALESCE({field} * grand_total / NULLIF(original_amount, 0), 0)) AS {field}"
+        for field in SPONSORSHIP_FIELDS
+    )
+    query = f"""SELECT zone, COUNT(*) AS record_count, SUM(grand_total) AS grand_total, {categories}
+                FROM partners WHERE {' AND '.join(conditions)}
+                GROUP BY zone ORDER BY grand_total DESC"""
+    return pd.read_sql_query(query, get_connection('partner_records'), params=params)
+
+# Records recomputed per transaction by recompute_partner_grand_totals()
+RECOMPUTE_CHUNK_ROWS = 5000
+
+def recompute_partner_grand_totals(year=None, chunk_rows=RECOMPUTE_CHUNK_ROWS, progress=None):
+    """Recompute original_amount and the ESPEES grand_total of partner records from their
+    sponsorship amounts, at the rate in effect on each record's submission date.
+    
+    Runs through one year's records (all with year=None) in id order, chunk_rows at
+    a time with each chunk in its own transaction, and rewrites only records whose
+    amounts changed. progress(done, total) is called after each chunk. Returns the
+    number of records updated.
+    """
+    conn = get_connection('partner_records')
+    where = "WHERE year = ?" if year else "WHERE 1 = 1"
+    params = [int(year)] if year else []
+    total = conn.execute(f"SELECT COUNT(*) FROM partners {where}", params).fetchone()[0]
+    
+    external = ', '.join(json_column(field) for field in EXTERNAL_SPONSORSHIP_FIELDS)
+    query = f"""SELECT id, record_type, currency, submission_date, original_amount, grand_total,
+                       {', '.join(SPONSORSHIP_FIELDS)}, {external}
+                FROM partners {where} AND id > ? ORDER BY id LIMIT ?"""
+    
+    done = updated = 0
+    last_id = 0
+    while True:
+        df = pd.read_sql_query(query, conn, params=params + [last_id, chunk_rows])
+        if df.empty:
+            break
+        
+        # Same amounts as partner_record_row(), converted in one vectorized pass
+        is_external = df['record_type'] == 'External Partner'
+        original_amounts = df[SPONSORSHIP_FIELDS].sum(axis=1).where(
+            ~is_external, df[EXTERNAL_SPONSORSHIP_FIELDS].sum(axis=1)
+        ).round(2)
+        grand_totals = convert_amounts_as_of(original_amounts, df['currency'], df['submission_date'])
+        changed = (original_amounts != df['original_amount'].round(2)) | (grand_totals != df['grand_total'].round(2))
+        
+        updates = list(zip(original_amounts[changed].tolist(), grand_totals[changed].tolist(),
+                           original_amounts[changed].tolist(), grand_totals[changed].tolist(),
+                           df.loc[changed, 'id'].tolist()))
+        with transaction('partner_records'):
+            conn.executemany("""UPDATE partners SET original_amount = ?, grand_total = ?,
+                                    record_data = json_set(record_data, '$.original_amount', ?, '$.grand_total', ?)
+                                WHERE id = ?""", updates)
+        
+        done += len(df)
+        updated += len(updates)
+        last_id = int(df['id'].iloc[-1])
+        if progress:
+            progress(done, total)
+    return updated
+
+# Numeric fields, typed or kept in record_data, that load_partner_records() returns as floats
+PARTNER_NUMERIC_FIELDS = set(PARTNER_AMOUNT_COLUMNS + EXTERNAL_SPONSORSHIP_FIELDS + [
+    'total_amount', 'quantity_sponsored_retail', 'age'
+])
+
+def partner_records_query(record_types=None, zone=None, start_date=None, end_date=None, columns=None, period=None):
+    """SELECT over partners and its parameters for load_partner_records() and load_partner_page()"""
+    if columns is None:
+        columns = PARTNER_COLUMNS
+    
+    select = ['id', 'record_type', 'submission_date']
+    for column in columns:
+        if not column.isidentifier():
+            raise ValueError(f"Invalid column name: {column}")
+        if column in select:
+            continue
+        if column in PARTNER_COLUMNS or column in PARTNER_PERIOD_COLUMNS:
+            select.append(column)
+        else:
+            default = 0 if column in PARTNER_NUMERIC_FIELDS else "''"
+            select.append(f"COALESCE(json_extract(record_data, '$.{column}'), {default}) AS {column}")
+    
+    query = f"SELECT {', '.join(select)} FROM partners WHERE 1 = 1"
+    params = []
+    
+    # Filters use idx_partners_type_zone_date / idx_partners_zone_date
+    if record_types:
+        query += f" AND record_type IN ({', '.join(['?'] * len(record_types))})"
+        params.extend(record_types)
+    if zone:
+        query += " AND zone = ?"
+        params.append(zone)
+    if start_date:
+        query += " AND submission_date >= ?"
+        params.append(str(start_date))
+    if end_date:
+        query += " AND submission_date < ?"
+        params.append(str(pd.Timestamp(end_date).date() + timedelta(days=1)))
+    if period:
+        conditions, period_params = period_conditions(period)
+        query += f" AND {' AND '.join(conditions)}"
+        params.extend(period_params)
+    return query, params
+
+def type_partner_columns(df):
+    """Type the columns of a partners query consistently for every caller"""
+    df['submission_date'] = pd.to_datetime(df['submission_date'], format='mixed', errors='coerce')
+    for column in df.columns[3:]:
+        if column in PARTNER_NUMERIC_FIELDS:
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0.0).astype(float)
+        elif column in PARTNER_PERIOD_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype(int)
+        else:
+            df[column] = df[column].fillna('').astype(str)
+    return df
+
+# Function to load partner records
+@cached_by_data_version('partner_records')
+def load_partner_records(record_types=None, zone=None, start_date=None, end_date=None, columns=None, period=None):
+    """Load partner records, filtered in SQL and reading only the requested fields.
+    
+    record_types is a list of record types (all when None), zone a single zone,
+    and start_date/end_date an inclusive submission date range. period narrows to
+    one get_time_period_options() choice. columns lists the fields to return besides
+    id, record_type and submission_date; typed and period columns are read directly
+    and any other field is extracted from record_data. Defaults to all typed columns.
+    Numeric fields come back as floats with 0 for missing values, period columns as
+    ints, text fields as strings with '' for missing values.
+    """
+    try:
+        query, params = partner_records_query(record_types, zone, start_date, end_date, columns, period)
+        df = pd.read_sql_query(query, get_connection('partner_records'), params=params)
+        return type_partner_columns(df)
         
-        # Ensure numeric types
-        for col in numeric_fields + ['original_amount', 'grand_total']:
-            if col in combined_df.columns:
-                combined_df[col] = pd.to_numeric(combined_df[col], errors='coerce').fillna(0)
+    except Exception as e:
+        st.error(f"Error fetching partner records: {e}")
+        return pd.DataFrame()
+
+@cached_by_data_version('partner_records')
+def load_partner_page(zone=None, search=None, page=1, page_size=PAGE_SIZES[0], columns=None, record_types=None):
+    """Load one page of partner records, newest first, and the number of matching records.
+    
+    Takes load_partner_records() columns, zone and record_types; search is matched
+    through the partners_search full-text index (see search.py). Returns (DataFrame, total) where total counts
+    every matching record, or (empty DataFrame, 0) on error.
+    """
+    try:
+        query, params = partner_records_query(record_types, zone, columns=columns)
+        if search and search.strip():
+            condition, search_params = match_condition('partner_records', search)
+            query += f" AND {condition}"
+            params.extend(search_params)
         
-        return combined_df
+        df, total = fetch_page('partner_records', query, params, page, page_size)
+        return type_partner_columns(df), total
         
     except Exception as e:
         st.error(f"Error fetching partner records: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), 0
 
 # Make sure this function is defined and exported
 def partner_records_ui():
@@ -234,8 +523,7 @@ def partner_records_ui():
             return
     elif st.session_state.is_super_admin:
         # Load zones data for admin
-        with open('zones_data.json', 'r') as f:
-            zones_data = json.load(f)
+        zones_data = load_zones_data()
         
         # First select region
         regions = list(zones_data.keys())
@@ -540,95 +828,17 @@ def add_external_partner_record(partner_data):
         st.error(f"Error adding external partner record: {str(e)}")
         return False, f"Error adding external partner record: {str(e)}"
 
-def get_filtered_partner_records(user_zone=None):
-    """Get filtered partner records focusing on amounts"""
-    try:
-        # Fetch all partner records
-        conn = sqlite3.connect('partner_records.db')
-        
-        # Create a list to store DataFrames from different tables
-        dfs = []
-        
-        # Query each partner table
-        tables = {
-            'adult_partners': 'Adult Partner',
-            'children_partners': 'Child Partner',
-            'teenager_partners': 'Teenager Partner',
-            'external_partners': 'External Partner'
-        }
-        
-        for table, record_type in tables.items():
-            query = f"SELECT * FROM {table}"
-            df = pd.read_sql_query(query, conn)
-            if not df.empty:
-                # Parse record_data JSON
-                df['record_data'] = df['record_data'].apply(json.loads)
-                
-                # Extract fields from record_data
-                df['title'] = df['record_data'].apply(lambda x: x.get('title', ''))
-                df['first_name'] = df['record_data'].apply(lambda x: x.get('first_name', ''))
-                df['surname'] = df['record_data'].apply(lambda x: x.get('surname', ''))
-                df['zone'] = df['record_data'].apply(lambda x: x.get('zone', ''))
-                df['currency'] = df['record_data'].apply(lambda x: x.get('currency', 'ESPEES'))
-                df['original_amount'] = df['record_data'].apply(lambda x: float(x.get('original_amount', 0)))
-                df['grand_total'] = df['record_data'].apply(lambda x: float(x.get('grand_total', 0)))
-                df['record_type'] = record_type
-                
-                # Update the Amount display format to clearly show both amounts
-                df['Amount'] = df.apply(
-                    lambda row: f"{row['currency']} {row['original_amount']:,.2f} "
-                              f"(ESPEES {row['grand_total']:,.2f})",
-                    axis=1
-                )
-                
-                # Filter by user zone if specified
-                if user_zone:
-                    df = df[df['zone'] == user_zone]
-                
-                dfs.append(df)
-        
-        conn.close()
-        
-        # Combine all DataFrames
-        if dfs:
-            combined_df = pd.concat(dfs, ignore_index=True)
-            
-            # Select display columns - focusing on partner info and amounts
-            display_columns = [
-                'id', 'record_type', 'title', 'first_name', 'surname',
-                'zone', 'Amount', 'submission_date'
-            ]
-            
-            return combined_df[display_columns]
-        return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Error getting partner records: {e}")
-        return pd.DataFrame()
-
 # Add these functions to partner_records.py
 
 def delete_partner_record(record_id, record_type):
     """Delete a partner record"""
     try:
-        conn = sqlite3.connect('partner_records.db')
-        c = conn.cursor()
-        
-        # Map record type to table name
-        table_map = {
-            'Adult Partner': 'adult_partners',
-            'Child Partner': 'children_partners',
-            'Teenager Partner': 'teenager_partners',
-            'External Partner': 'external_partners'
-        }
-        
-        table_name = table_map.get(record_type)
-        if not table_name:
+        if record_type not in PARTNER_TABLES:
             return False, f"Invalid record type: {record_type}"
 
         # Delete the record
-        c.execute(f"DELETE FROM {table_name} WHERE id = ?", (record_id,))
-        conn.commit()
-        conn.close()
+        with transaction('partner_records') as conn:
+            conn.execute("DELETE FROM partners WHERE id = ? AND record_type = ?", (record_id, record_type))
         
         return True, "Record deleted successfully!"
     except Exception as e:
@@ -637,19 +847,7 @@ def delete_partner_record(record_id, record_type):
 def update_partner_record(record_id, record_type, updated_data):
     """Update an existing partner record"""
     try:
-        conn = sqlite3.connect('partner_records.db')
-        c = conn.cursor()
-        
-        # Map record type to table name
-        table_map = {
-            'Adult Partner': 'adult_partners',
-            'Child Partner': 'children_partners',
-            'Teenager Partner': 'teenager_partners',
-            'External Partner': 'external_partners'
-        }
-        
-        table_name = table_map.get(record_type)
-        if not table_name:
+        if record_type not in PARTNER_TABLES:
             return False, f"Invalid record type: {record_type}"
 
         # Calculate original amount and converted amount (ESPEES)
@@ -686,38 +884,40 @@ def update_partner_record(record_id, record_type, updated_data):
             'currency': currency
         })
         
-        # Convert datetime objects to strings
-        processed_data = {}
-        for key, value in updated_data.items():
-            if isinstance(value, datetime):
-                processed_data[key] = value.isoformat()
-            elif isinstance(value, pd._libs.tslibs.timestamps.Timestamp):
-                processed_data[key] = value.isoformat()
-            else:
-                processed_data[key] = value
+        # Convert datetime objects (and NaN) to JSON-safe values
+        processed_data = {key: json_safe(value) for key, value in updated_data.items()}
 
         # Store as JSON string
         record_json = json.dumps(processed_data)
         
-        # Update the record
-        c.execute(f"""UPDATE {table_name} 
-                     SET record_data = ?,
-                         submission_date = CURRENT_TIMESTAMP
-                     WHERE id = ?""", 
-                  (record_json, record_id))
-        
-        conn.commit()
-        conn.close()
+        # Update the record and its typed columns
+        assignments = ', '.join(f"{column} = ?" for column in PARTNER_COLUMNS)
+        with transaction('partner_records') as conn:
+            conn.execute(f"""UPDATE partners 
+                         SET record_data = ?,
+                             submission_date = CURRENT_TIMESTAMP,
+                             {assignments}
+                         WHERE id = ? AND record_type = ?""", 
+                      (record_json, *partner_column_values(processed_data), record_id, record_type))
         
         return True, "Record updated successfully!"
     except Exception as e:
         return False, f"Error updating record: {str(e)}"
 
-# Add this function at the top of the file
-def get_user_details(username):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("SELECT user_group, sub_group, region, zone FROM users WHERE username=?", (username,))
-    user_details = c.fetchone()
-    conn.close()
-    return user_details
+def get_partner_record(record_id, record_type):
+    """Fetch the full record_data of a single partner record"""
+    try:
+        if record_type not in PARTNER_TABLES:
+            return None
+        
+        c = get_connection('partner_records').cursor()
+        c.execute("SELECT record_data FROM partners WHERE id = ? AND record_type = ?",
+                  (record_id, record_type))
+        record = c.fetchone()
+        
+        if record:
+            return json.loads(record[0])
+        return None
+    except Exception as e:
+        st.error(f"Error fetching partner record: {e}")
+        return None
@@ -1,70 +1,66 @@
 import streamlit as st
 import pandas as pd
-from partner_records import fetch_partner_records, delete_partner_record, update_partner_record, CURRENCIES, TITLE_OPTIONS
+from partner_records import load_partner_records, load_partner_page, load_zone_totals, delete_partner_record, update_partner_record, get_partner_record, CURRENCIES, TITLE_OPTIONS
+from church_records import format_display_amounts
+from dedup import count_unique_partners
+from pagination import fetch_report_page, pagination_controls
 import io
 from datetime import datetime
 import time
 
+# Fields read for the report table and edit forms
+PARTNER_REPORT_COLUMNS = ['title', 'first_name', 'surname', 'email', 'currency', 'original_amount', 'grand_total']
+
+# Final display columns
+FINAL_DISPLAY_COLS = [
+    'submission_date',
+    'Partner Name',
+    'record_type',
+    'email',
+    'Amount'
+]
+
+def format_partner_report(df):
+    """Add the Partner Name and Amount display columns to partner report rows"""
+    df['Partner Name'] = df['title'] + ' ' + df['first_name'] + ' ' + df['surname']
+    df['Amount'] = format_display_amounts(df['original_amount'], df['currency'], df['grand_total'])
+    return df
+
+def fetch_partner_report_page(key, search=None):
+    """Fetch the page of partner report rows selected by pagination_controls(key), as (DataFrame, total)"""
+    df, total = fetch_report_page(key, lambda page, page_size: load_partner_page(
+        search=search, page=page, page_size=page_size, columns=PARTNER_REPORT_COLUMNS
+    ))
+    if df.empty:
+        return pd.DataFrame(columns=['id'] + FINAL_DISPLAY_COLS + PARTNER_REPORT_COLUMNS), total
+    return format_partner_report(df), total
+
 def partner_reports_ui():
     st.header("Partner Reports")
     
-    # Fetch all partner records
-    df = fetch_partner_records()
-    
-    if df.empty:
+    # Display summary metrics (counts and totals come pre-aggregated)
+    totals = load_zone_totals()
+    if totals.empty:
         st.warning("No partner records found")
         return
-
-    # Convert submission_date to datetime
-    df['submission_date'] = pd.to_datetime(df['submission_date'])
-
-    # Display summary metrics
+    
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Records", len(df))
+        st.metric("Total Records", int(totals['record_count'].sum()))
     with col2:
-        st.metric("Total ESPEES", f"{df['grand_total'].sum():,.2f}")
+        st.metric("Total ESPEES", f"{totals['grand_total'].sum():,.2f}")
     with col3:
-        unique_partners = len(df[['first_name', 'surname', 'email']].drop_duplicates())
-        st.metric("Unique Partners", unique_partners)
+        st.metric("Unique Partners", count_unique_partners())
 
-    # Display detailed records
+    # Display one page of detailed records
     st.subheader("Partner Records")
-    display_cols = [
-        'submission_date', 
-        'record_type', 
-        'title', 
-        'first_name', 
-        'surname', 
-        'email', 
-        'currency', 
-        'original_amount', 
-        'grand_total'
-    ]
-    
-    # Format the display
-    display_df = df[display_cols].copy()
-    display_df['Partner Name'] = display_df.apply(
-        lambda x: f"{x['title']} {x['first_name']} {x['surname']}", axis=1
-    )
-    display_df['Amount'] = display_df.apply(
-        lambda x: f"{x['currency']} {x['original_amount']:,.2f} (ESPEES {x['grand_total']:,.2f})",
-        axis=1
-    )
-    
-    # Final display columns
-    final_display_cols = [
-        'submission_date',
-        'Partner Name',
-        'record_type',
-        'email',
-        'Amount'
-    ]
+    page_df, total = fetch_partner_report_page("partner_report")
     
     st.dataframe(
-        display_df[final_display_cols],
+        page_df[FINAL_DISPLAY_COLS],
         use_container_width=True
     )
+    pagination_controls("partner_report", total)
 
     # Edit/Delete section
     st.subheader("Edit/Delete Records")
@@ -75,19 +71,15 @@ def partner_reports_ui():
     if 'delete_confirmations' not in st.session_state:
         st.session_state.delete_confirmations = {}
     
-    # Search functionality
+    # Search functionality, matched in SQL one page of results at a time
     search_term = st.text_input("Search by Name, Email, or ID", key="partner_search")
     if search_term:
-        search_df = display_df[
-            display_df['Partner Name'].str.contains(search_term, case=False, na=False) |
-            display_df['email'].str.contains(search_term, case=False, na=False) |
-            df['id'].astype(str).str.contains(search_term)
-        ]
+        search_df, search_total = fetch_partner_report_page("partner_search", search_term)
         
         if not search_df.empty:
             st.write("Search Results:")
             for idx, row in search_df.iterrows():
-                record_id = str(df.iloc[idx]['id'])
+                record_id = str(row['id'])
                 col1, col2, col3 = st.columns([3, 1, 1])
                 
                 with col1:
@@ -116,7 +108,7 @@ def partner_reports_ui():
                         col4, col5 = st.columns(2)
                         with col4:
                             if st.button("✓", key=f"confirm_{record_id}", type="primary"):
-                                success, message = delete_partner_record(record_id, df.iloc[idx]['record_type'])
+                                success, message = delete_partner_record(record_id, row['record_type'])
                                 if success:
                                     st.success(message)
                                     st.session_state.delete_confirmations[record_id] = False
@@ -136,27 +128,27 @@ def partner_reports_ui():
                         
                         # Basic Info
                         title = st.selectbox("Title", TITLE_OPTIONS, 
-                            index=TITLE_OPTIONS.index(df.iloc[idx]['title']))
+                            index=TITLE_OPTIONS.index(row['title']))
                         col1, col2 = st.columns(2)
                         with col1:
                             first_name = st.text_input("First Name", 
-                                value=df.iloc[idx]['first_name'])
+                                value=row['first_name'])
                         with col2:
                             surname = st.text_input("Surname", 
-                                value=df.iloc[idx]['surname'])
+                                value=row['surname'])
                         
                         # Contact Info
                         col1, col2 = st.columns(2)
                         with col1:
                             email = st.text_input("Email", 
-                                value=df.iloc[idx]['email'])
+                                value=row['email'])
                         with col2:
                             currency = st.selectbox("Currency", CURRENCIES,
-                                index=CURRENCIES.index(df.iloc[idx]['currency']))
+                                index=CURRENCIES.index(row['currency']))
                         
                         # Amount fields based on record type
-                        record_data = df.iloc[idx]['record_data']
-                        if df.iloc[idx]['record_type'] == 'External Partner':
+                        record_data = get_partner_record(record_id, row['record_type']) or {}
+                        if row['record_type'] == 'External Partner':
                             col1, col2 = st.columns(2)
                             with col1:
                                 rhapsody_subs = st.number_input("Rhapsody Subscriptions/Dubais", 
@@ -200,7 +192,7 @@ def partner_reports_ui():
                         
                         if submit:
                             # Prepare updated data based on record type
-                            if df.iloc[idx]['record_type'] == 'External Partner':
+                            if row['record_type'] == 'External Partner':
                                 updated_data = {
                                     'title': title,
                                     'first_name': first_name,
@@ -230,7 +222,7 @@ def partner_reports_ui():
                                     'total_subscriptions_dubais': subscriptions_dubais
                                 }
                             
-                            success, message = update_partner_record(record_id, df.iloc[idx]['record_type'], updated_data)
+                            success, message = update_partner_record(record_id, row['record_type'], updated_data)
                             if success:
                                 st.success(message)
                                 st.session_state.edit_mode[record_id] = False
@@ -242,25 +234,28 @@ def partner_reports_ui():
                         if cancel:
                             st.session_state.edit_mode[record_id] = False
                             st.rerun()
+            pagination_controls("partner_search", search_total)
         else:
             st.info("No records found matching your search.")
 
-    # Export options
+    # Export options; the full export reads every record, so it is only built on request
     st.subheader("Export Options")
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        display_df[final_display_cols].to_excel(
-            writer, 
-            sheet_name='Partner Records', 
-            index=False
+    if st.button("Prepare Excel Report", key="partner_report_export"):
+        export_df = format_partner_report(load_partner_records(columns=PARTNER_REPORT_COLUMNS))
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            export_df[FINAL_DISPLAY_COLS].to_excel(
+                writer, 
+                sheet_name='Partner Records', 
+                index=False
+            )
+        
+        st.download_button(
+            label="Download Excel Report",
+            data=output.getvalue(),
+            file_name=f"partner_report_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
-    
-    st.download_button(
-        label="Download Excel Report",
-        data=output.getvalue(),
-        file_name=f"partner_report_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
 
 if __name__ == "__main__":
     partner_reports_ui()
@@ -0,0 +1,45 @@
+from calendar import month_name
+
+# Quarters making up each half of the year
+HALF_YEAR_QUARTERS = {'H1': [1, 2], 'H2': [3, 4]}
+
+def parse_period(period):
+    """Turn a get_time_period_options() choice into {'year', 'quarters', 'month'}.
+
+    Accepts a year (2024 or "2024"), "2024 Q3", "2024 H1" or "2024 July".
+    quarters and month are None when the period doesn't narrow them.
+    """
+    parts = str(period).split()
+    parsed = {'year': int(parts[0]), 'quarters': None, 'month': None}
+    if len(parts) == 1:
+        return parsed
+
+    part = parts[1]
+    if part in HALF_YEAR_QUARTERS:
+        parsed['quarters'] = HALF_YEAR_QUARTERS[part]
+    elif part.startswith('Q') and part[1:].isdigit():
+        parsed['quarters'] = [int(part[1:])]
+    elif part in month_name[1:]:
+        parsed['month'] = list(month_name).index(part)
+        parsed['quarters'] = [(parsed['month'] + 2) // 3]
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return parsed
+
+def period_conditions(period, table=None):
+    """SQL conditions and parameters selecting a period on integer year/quarter/month columns.
+
+    The conditions follow the column order of the period indexes, year then
+    quarter then month, so each query reads a single index range.
+    """
+    parsed = parse_period(period)
+    prefix = f"{table}." if table else ''
+    conditions = [f"{prefix}year = ?"]
+    params = [parsed['year']]
+    if parsed['quarters']:
+        conditions.append(f"{prefix}quarter IN ({', '.join(['?'] * len(parsed['quarters']))})")
+        params.extend(parsed['quarters'])
+    if parsed['month']:
+        conditions.append(f"{prefix}month = ?")
+        params.append(parsed['month'])
+    return conditions, params
@@ -0,0 +1,57 @@
+"""Recompute stored ESPEES totals after conversion rates change.
+
+Partner and church records keep the grand_total computed when they were
+saved. After a rate is added or corrected, this job rewrites original_amount
+and grand_total with the rate in effect on each record's submission date,
+in chunked transactions so the app keeps serving reads while it runs. The
+admin dashboard runs the same job from Debug Database > Database Operations.
+
+Run from the repository root:
+
+    python recompute.py [--year YEAR] [--chunk-rows N]
+"""
+import argparse
+
+from currency import load_conversion_rates
+from partner_records import recompute_partner_grand_totals, RECOMPUTE_CHUNK_ROWS
+from church_records import recompute_church_grand_totals
+
+# Record groups the job recomputes, by label
+RECOMPUTE_JOBS = {
+    'Partner records': recompute_partner_grand_totals,
+    'Church records': recompute_church_grand_totals
+}
+
+def recompute_grand_totals(year=None, chunk_rows=RECOMPUTE_CHUNK_ROWS, progress=None):
+    """Recompute partner and church totals, returning {label: records updated}.
+
+    progress(label, done, total) is called after each chunk.
+    """
+    # Rates changed in conversion_rates.json become part of the history first
+    load_conversion_rates()
+
+    updated = {}
+    for label, job in RECOMPUTE_JOBS.items():
+        updated[label] = job(
+            year=year,
+            chunk_rows=chunk_rows,
+            progress=(lambda done, total, label=label: progress(label, done, total)) if progress else None
+        )
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--year', type=int, help="only records submitted in this year")
+    parser.add_argument('--chunk-rows', type=int, default=RECOMPUTE_CHUNK_ROWS,
+                        help="records per transaction (default %(default)s)")
+    args = parser.parse_args()
+
+    def report(label, done, total):
+        print(f"{label}: {done}/{total}", flush=True)
+
+    updated = recompute_grand_totals(args.year, args.chunk_rows, report)
+    for label, count in updated.items():
+        print(f"{label}: {count} updated")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
 import pandas as pd
 import streamlit as st
 from io import BytesIO
-from openpyxl import Workbook
+from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation  # Add this import
-import sqlite3
-import json
 from datetime import datetime
+from users import get_user_details
+from zones import load_zones_data
+from dedup import find_duplicate_partners
+from uploads import (
+    init_upload_ledger, new_upload, record_hashes, count_saved_rows, finish_upload,
+    find_completed_upload, load_upload_ledger, UPLOAD_COMPLETE, UPLOAD_FAILED
+)
 from church_records import (
     CURRENCIES, 
     CONVERSION_RATES, 
@@ -28,14 +33,6 @@ header_template = """
     </div>
 """
 
-def get_user_details(username):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("SELECT user_group, sub_group, region, zone FROM users WHERE username=?", (username,))
-    user_details = c.fetchone()
-    conn.close()
-    return user_details
-
 # Update the categories to include currency field
 CATEGORIES = {
     "Adult Partner": [
@@ -240,7 +237,96 @@ def create_blank_template():
     
     return wb
 
-def process_uploaded_records(df, selected_zone):
+# Uploaded sheet names mapped to (category, sheet type)
+UPLOAD_SHEETS = {
+    "Adult Partners": ("Adult Partner", "partners"),
+    "Child Partners": ("Child Partner", "partners"),
+    "Teenager Partners": ("Teenager Partner", "partners"),
+    "External Partners": ("External Partner", "partners"),
+    "Category A Churches": ("Category A", "church"),
+    "Category B Churches": ("Category B", "church"),
+    "Churches": ("Church", "church"),
+    "Cell Records": ("Cell", "church"),
+    "ROR Outreaches": (None, "ror")
+}
+
+# Rows read, validated and saved at a time when streaming a large workbook
+UPLOAD_CHUNK_ROWS = 2000
+
+def prepare_sheet(sheet_name, sheet_df, selected_zone, currency):
+    """Add zone, currency, totals and category to a sheet (or a chunk of one) and validate it.
+    
+    Returns the sheet type ('partners', 'church' or 'ror'), or None if the sheet
+    is not part of the template or fails validation.
+    """
+    if sheet_name not in UPLOAD_SHEETS:
+        return None
+    category, sheet_type = UPLOAD_SHEETS[sheet_name]
+    
+    # Add zone and currency to the data
+    sheet_df['Zone'] = selected_zone
+    sheet_df['Currency'] = currency
+    
+    if sheet_type == "partners":
+        # Calculate total amount for partners
+        if category != "External Partner":
+            sheet_df['Total Amount'] = sheet_df[[
+                'Total Amount Given for Wonder Challenge',
+                'Total Amount Given for Rhapsody Languages',
+                'Total Amount Given for Kiddies Products',
+                'Total Amount Given for Teevo',
+                'Total Amount Given for Braille(NOLB)',
+                'Total Amount Given for Youth Aglow',
+                'Total Given for Local Distribution',
+                'Total Given for Subscriptions/Dubais'
+            ]].fillna(0).sum(axis=1)
+        else:
+            sheet_df['Total Amount'] = sheet_df[[
+                'Rhapsody Subscriptions and Dubais',
+                'Sponsorship Through Retail Center',
+                'Translators Network International',
+                'Rhapsody Influencers Network',
+                'RIM'
+            ]].fillna(0).sum(axis=1)
+        required_fields = CATEGORIES[category]
+    elif sheet_type == "church":
+        required_fields = CATEGORIES["Church Sponsorship"]
+    else:
+        required_fields = CATEGORIES["ROR Outreaches"]
+    
+    if not validate_sheet_data(sheet_df, required_fields):
+        return None
+    
+    if category:
+        sheet_df['Category'] = category
+    return sheet_type
+
+# Save functions for each sheet type
+def save_sheet(sheet_type, sheet_df, selected_zone, currency, sheet_rows=None, upload=None):
+    """Save a prepared sheet (or chunk) in one transaction; sheet_rows are its spreadsheet row numbers.
+    
+    With an upload (see uploads.new_upload), rows an earlier submission saved are skipped.
+    """
+    save_functions = {
+        'partners': save_partner_records,
+        'church': save_church_records,
+        'ror': save_ror_records
+    }
+    return save_functions[sheet_type](sheet_df, selected_zone, currency, sheet_rows, upload)
+
+def record_upload(upload, currency, status):
+    """Add a finished upload to the upload ledger"""
+    try:
+        finish_upload(upload, currency, status)
+    except Exception as e:
+        st.error(f"Error recording upload: {e}")
+
+def show_skipped_rows(upload):
+    """Note how many uploaded rows were skipped because they were already saved"""
+    if upload['rows_skipped']:
+        st.info(f"{upload['rows_skipped']} of {upload['rows_read']} rows were already saved and were skipped")
+
+def process_uploaded_records(df, selected_zone, upload=None):
     """Process uploaded records with improved validation"""
     if isinstance(df, dict):  # Excel file with multiple sheets
         # Show preview of data first
@@ -262,128 +348,197 @@ def process_uploaded_records(df, selected_zone):
             key="global_currency"
         )
         
-        valid_sheets = {
-            'partners': [],
-            'church': [],
-            'ror': []
-        }
-        
-        # Process partner sheets with amount calculations
-        partner_sheets = {
-            "Adult Partners": ("Adult Partner", "partners"),
-            "Child Partners": ("Child Partner", "partners"),
-            "Teenager Partners": ("Teenager Partner", "partners"),
-            "External Partners": ("External Partner", "partners")
-        }
-        
-        # Process church sheets
-        church_sheets = {
-            "Category A Churches": ("Category A", "church"),
-            "Category B Churches": ("Category B", "church"),
-            "Churches": ("Church", "church"),
-            "Cell Records": ("Cell", "church")
-        }
-        
         # Process each sheet
         if st.button("Validate and Submit Records"):
+            valid_sheets = []
+            invalid_count = 0
             for sheet_name, sheet_df in df.items():
-                if sheet_df.empty:
+                if sheet_df.empty or sheet_name not in UPLOAD_SHEETS:
                     continue
                 
-                # Add zone and currency to the data
-                sheet_df['Zone'] = selected_zone
-                sheet_df['Currency'] = currency
-                
-                if sheet_name in partner_sheets:
-                    category, sheet_type = partner_sheets[sheet_name]
-                    
-                    # Calculate total amount for partners
-                    if category != "External Partner":
-                        sheet_df['Total Amount'] = sheet_df[[
-                            'Total Amount Given for Wonder Challenge',
-                            'Total Amount Given for Rhapsody Languages',
-                            'Total Amount Given for Kiddies Products',
-                            'Total Amount Given for Teevo',
-                            'Total Amount Given for Braille(NOLB)',
-                            'Total Amount Given for Youth Aglow',
-                            'Total Given for Local Distribution',
-                            'Total Given for Subscriptions/Dubais'
-                        ]].fillna(0).sum(axis=1)
-                    else:
-                        sheet_df['Total Amount'] = sheet_df[[
-                            'Rhapsody Subscriptions and Dubais',
-                            'Sponsorship Through Retail Center',
-                            'Translators Network International',
-                            'Rhapsody Influencers Network',
-                            'RIM'
-                        ]].fillna(0).sum(axis=1)
-
-                    if validate_sheet_data(sheet_df, CATEGORIES[category]):
-                        sheet_df['Category'] = category
-                        valid_sheets[sheet_type].append(sheet_df)
-                        st.success(f"✓ {sheet_name} data validated successfully")
-                    else:
-                        st.error(f"✗ {sheet_name} data validation failed")
-                        
-                elif sheet_name in church_sheets:
-                    category, sheet_type = church_sheets[sheet_name]
-                    if validate_sheet_data(sheet_df, CATEGORIES["Church Sponsorship"]):
-                        sheet_df['Category'] = category
-                        valid_sheets[sheet_type].append(sheet_df)
-                        st.success(f"✓ {sheet_name} data validated successfully")
-                    else:
-                        st.error(f"✗ {sheet_name} data validation failed")
-                        
-                elif sheet_name == "ROR Outreaches":
-                    if validate_sheet_data(sheet_df, CATEGORIES["ROR Outreaches"]):
-                        valid_sheets['ror'].append(sheet_df)
-                        st.success("✓ ROR Outreaches data validated successfully")
-                    else:
-                        st.error("✗ ROR Outreaches data validation failed")
+                sheet_type = prepare_sheet(sheet_name, sheet_df, selected_zone, currency)
+                if sheet_type:
+                    valid_sheets.append((sheet_name, sheet_type, sheet_df))
+                    st.success(f"✓ {sheet_name} data validated successfully")
+                else:
+                    invalid_count += 1
+                    st.error(f"✗ {sheet_name} data validation failed")
+            
+            # Flag partners that look like saved ones or repeat within the upload
+            show_duplicate_partners(flag_duplicate_partners(
+                [(sheet_name, sheet_df) for sheet_name, sheet_type, sheet_df in valid_sheets if sheet_type == 'partners'],
+                selected_zone
+            ))
             
             # Save validated data
             success_count = 0
             error_count = 0
             
-            # Save partner records with calculated totals
-            if valid_sheets['partners']:
-                partner_df = pd.concat(valid_sheets['partners'], ignore_index=True)
-                if save_partner_records(partner_df, selected_zone, currency):
+            # Save each validated sheet in its own transaction
+            for sheet_name, sheet_type, sheet_df in valid_sheets:
+                if save_sheet(sheet_type, sheet_df, selected_zone, currency, upload=upload):
                     success_count += 1
-                    st.success("✓ Partner records saved successfully!")
+                    st.success(f"✓ {sheet_name} saved successfully! ({len(sheet_df)} records)")
                 else:
                     error_count += 1
-                    st.error("✗ Error saving partner records")
-            
-            # Save church records
-            if valid_sheets['church']:
-                church_df = pd.concat(valid_sheets['church'], ignore_index=True)
-                if save_church_records(church_df, selected_zone, currency):
-                    success_count += 1
-                    st.success("✓ Church records saved successfully!")
-                else:
-                    error_count += 1
-                    st.error("✗ Error saving church records")
-            
-            # Save ROR records
-            if valid_sheets['ror']:
-                ror_df = pd.concat(valid_sheets['ror'], ignore_index=True)
-                if save_ror_records(ror_df, selected_zone, currency):
-                    success_count += 1
-                    st.success("✓ ROR records saved successfully!")
-                else:
-                    error_count += 1
-                    st.error("✗ Error saving ROR records")
+                    st.error(f"✗ Error saving {sheet_name}; no records from this sheet were saved")
             
             if error_count == 0 and success_count > 0:
-                st.success(f"All {success_count} record types submitted successfully!")
+                st.success(f"All {success_count} sheets submitted successfully!")
                 if st.button("Upload More Records"):
                     st.experimental_rerun()
             elif error_count > 0:
                 st.warning(f"Completed with {success_count} successes and {error_count} errors.")
+            
+            # A file with a sheet that failed isn't complete, so it can be submitted again
+            if upload:
+                show_skipped_rows(upload)
+                complete = error_count == 0 and invalid_count == 0 and success_count > 0
+                record_upload(upload, currency, UPLOAD_COMPLETE if complete else UPLOAD_FAILED)
     else:
         st.error("Please use the Excel template. CSV uploads are not supported.")
 
+def flag_duplicate_partners(partner_sheets, selected_zone):
+    """Report rows for uploaded partners that likely duplicate saved partners or each other.
+    
+    partner_sheets holds (sheet_name, sheet_df) pairs, or (sheet_name, sheet_df,
+    sheet_rows) for chunks, where sheet_rows are the spreadsheet row numbers.
+    """
+    rows = []
+    partners = []
+    for sheet_name, sheet_df, *sheet_rows in partner_sheets:
+        sheet_rows = sheet_rows[0] if sheet_rows else range(2, len(sheet_df) + 2)
+        fields = text_fields(sheet_df, PARTNER_TEXT_FIELDS)
+        for sheet_row, (first_name, surname, email, phone) in zip(
+                sheet_rows, fields[['first_name', 'surname', 'email', 'kingschat_phone']].itertuples(index=False)):
+            rows.append((sheet_name, sheet_row, f"{first_name} {surname}".strip()))
+            partners.append((selected_zone, first_name, surname, email, phone))
+    
+    return [{
+        'Sheet': rows[flag['row']][0],
+        'Sheet Row': rows[flag['row']][1],
+        'Name': rows[flag['row']][2],
+        'Matches Saved Record IDs': ', '.join(str(record_id) for record_id in flag['existing']),
+        'Repeats': ', '.join(f"{rows[repeat][0]} row {rows[repeat][1]}" for repeat in flag['repeats'])
+    } for flag in find_duplicate_partners(partners)]
+
+def show_duplicate_partners(flagged):
+    """Warn about flag_duplicate_partners() rows; the records are still saved"""
+    if not flagged:
+        return
+    
+    st.warning(f"{len(flagged)} partners look like duplicates of saved records or of other rows in this upload")
+    st.dataframe(pd.DataFrame(flagged), use_container_width=True, hide_index=True)
+
+def iter_sheet_chunks(worksheet, chunk_rows=UPLOAD_CHUNK_ROWS):
+    """Yield (sheet_rows, DataFrame) chunks of a read-only worksheet, using its first row as the header.
+    
+    Only one chunk of rows is held in memory at a time. Blank rows are skipped.
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+    
+    chunk = []
+    sheet_rows = []
+    for row_number, row in enumerate(rows, start=2):
+        if all(value is None for value in row):
+            continue
+        chunk.append(row[:len(columns)])
+        sheet_rows.append(row_number)
+        if len(chunk) >= chunk_rows:
+            yield sheet_rows, pd.DataFrame(chunk, columns=columns)
+            chunk = []
+            sheet_rows = []
+    if chunk:
+        yield sheet_rows, pd.DataFrame(chunk, columns=columns)
+
+def process_uploaded_workbook(uploaded_file, selected_zone, chunk_rows=UPLOAD_CHUNK_ROWS, upload=None):
+    """Stream a large workbook sheet by sheet, validating and saving it chunk by chunk.
+    
+    Each chunk is saved in its own transaction, so memory stays bounded by the
+    chunk size. If a chunk fails, the rest of that sheet is skipped and the rows
+    saved before it are kept; with an upload, submitting the file again saves
+    only the rows that are missing.
+    """
+    wb = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        sheet_names = [name for name in wb.sheetnames if name in UPLOAD_SHEETS]
+        if not sheet_names:
+            st.warning("No template sheets found in the uploaded file.")
+            return
+        
+        # Preview the first rows of each sheet without reading the rest
+        for sheet_name in sheet_names:
+            worksheet = wb[sheet_name]
+            preview = next(iter_sheet_chunks(worksheet, 5), None)
+            if preview is not None:
+                st.subheader(f"Preview of {sheet_name}")
+                if worksheet.max_row:
+                    st.caption(f"About {worksheet.max_row - 1} rows")
+                st.dataframe(preview[1], use_container_width=True)
+        
+        # Single currency selection for all records
+        currency = st.selectbox(
+            "Select Currency for All Records",
+            CURRENCIES,
+            key="global_currency"
+        )
+        
+        if st.button("Validate and Submit Records"):
+            success_count = 0
+            error_count = 0
+            flagged = []
+            for sheet_name in sheet_names:
+                worksheet = wb[sheet_name]
+                total_rows = max((worksheet.max_row or 1) - 1, 1)
+                progress = st.progress(0.0, text=f"{sheet_name}: starting")
+                saved_rows = 0
+                failed = False
+                
+                for sheet_rows, chunk_df in iter_sheet_chunks(worksheet, chunk_rows):
+                    sheet_type = prepare_sheet(sheet_name, chunk_df, selected_zone, currency)
+                    # Earlier chunks are saved by now, so repeats across chunks match them
+                    if sheet_type == 'partners':
+                        flagged.extend(flag_duplicate_partners([(sheet_name, chunk_df, sheet_rows)], selected_zone))
+                    if not sheet_type or not save_sheet(sheet_type, chunk_df, selected_zone, currency, sheet_rows, upload):
+                        failed = True
+                        st.error(f"✗ {sheet_name}: rows from sheet row {sheet_rows[0]} on were not saved")
+                        break
+                    saved_rows += len(chunk_df)
+                    progress.progress(
+                        min(saved_rows / total_rows, 1.0),
+                        text=f"{sheet_name}: {saved_rows} records saved"
+                    )
+                
+                if failed:
+                    error_count += 1
+                    if saved_rows:
+                        st.warning(f"{saved_rows} records from {sheet_name} were saved before the error")
+                elif saved_rows:
+                    success_count += 1
+                    progress.progress(1.0, text=f"{sheet_name}: {saved_rows} records saved")
+                    st.success(f"✓ {sheet_name} saved successfully! ({saved_rows} records)")
+                else:
+                    progress.empty()
+            
+            # Flag partners that look like saved ones or repeat within the upload
+            show_duplicate_partners(flagged)
+            
+            if error_count == 0 and success_count > 0:
+                st.success(f"All {success_count} sheets submitted successfully!")
+            elif error_count > 0:
+                st.warning(f"Completed with {success_count} successes and {error_count} errors.")
+            
+            if upload:
+                show_skipped_rows(upload)
+                complete = error_count == 0 and success_count > 0
+                record_upload(upload, currency, UPLOAD_COMPLETE if complete else UPLOAD_FAILED)
+    finally:
+        wb.close()
+
 def validate_sheet_data(df, required_fields):
     """Validate sheet data against required fields, with more flexible validation"""
     try:
@@ -492,8 +647,7 @@ def record_templates_ui():
     
     if st.session_state.is_super_admin:
         # Load zones data
-        with open('zones_data.json', 'r') as f:
-            zones_data = json.load(f)
+        zones_data = load_zones_data()
         
         # First select region
         regions = list(zones_data.keys())
@@ -541,213 +695,290 @@ def record_templates_ui():
             return
         
         uploaded_file = st.file_uploader("Choose Excel file", type=["xlsx"])
+        large_upload = st.checkbox(
+            "Large file: read and save in chunks",
+            help=f"Streams each sheet {UPLOAD_CHUNK_ROWS} rows at a time to keep memory use low. "
+                 "Each chunk is saved as soon as it is validated."
+        )
         if uploaded_file is not None:
             try:
-                df = pd.read_excel(uploaded_file, sheet_name=None)
-                process_uploaded_records(df, selected_zone)
+                init_upload_ledger()
+                upload = new_upload(uploaded_file.getvalue(), uploaded_file.name, selected_zone,
+                                    st.session_state.get('username'))
+                
+                # An identical file already saved in full is not read again unless asked
+                previous = find_completed_upload(upload['file_hash'], selected_zone)
+                if previous:
+                    st.info(f"This file was already submitted for {selected_zone} on {previous['finished_at']} "
+                            f"({previous['rows_saved']} records saved).")
+                if not previous or st.checkbox("Submit this file again",
+                                               help="Rows that are already saved are skipped"):
+                    if large_upload:
+                        process_uploaded_workbook(uploaded_file, selected_zone, upload=upload)
+                    else:
+                        df = pd.read_excel(uploaded_file, sheet_name=None)
+                        process_uploaded_records(df, selected_zone, upload)
             except Exception as e:
                 st.error(f"Error reading file: {e}")
+        
+        with st.expander("Upload History"):
+            try:
+                init_upload_ledger()
+                st.dataframe(load_upload_ledger(selected_zone), use_container_width=True, hide_index=True)
+            except Exception as e:
+                st.error(f"Error loading upload history: {e}")
 
 # Add these functions after the validate_sheet_data function
 
-def save_partner_records(df, selected_zone, currency):
+# Template columns mapped to the fields they are stored under, per sheet
+PARTNER_TEXT_FIELDS = {
+    'Title': 'title',
+    'First Name': 'first_name',
+    'Surname': 'surname',
+    'KingsChat Phone Number': 'kingschat_phone',
+    'Email Address': 'email'
+}
+
+MEMBER_PARTNER_TEXT_FIELDS = {
+    'Church': 'church',
+    'Group': 'group'
+}
+
+MEMBER_PARTNER_AMOUNT_FIELDS = {
+    'Total Amount Given for Wonder Challenge': 'total_wonder_challenge',
+    'Total Amount Given for Rhapsody Languages': 'total_rhapsody_languages',
+    'Total Amount Given for Kiddies Products': 'total_kiddies_products',
+    'Total Amount Given for Teevo': 'total_teevo',
+    'Total Amount Given for Braille(NOLB)': 'total_braille_nolb',
+    'Total Amount Given for Youth Aglow': 'total_youth_aglow',
+    'Total Given for Local Distribution': 'total_local_distribution',
+    'Total Given for Subscriptions/Dubais': 'total_subscriptions_dubais',
+    'Total Amount': 'total_amount'
+}
+
+EXTERNAL_PARTNER_AMOUNT_FIELDS = {
+    'Rhapsody Subscriptions and Dubais': 'rhapsody_subscriptions_dubais',
+    'Sponsorship Through Retail Center': 'sponsorship_retail_center',
+    'Translators Network International': 'translators_network_international',
+    'Rhapsody Influencers Network': 'rhapsody_influencers_network',
+    'RIM': 'rim',
+    'Total Amount': 'total_amount'
+}
+
+CHURCH_TEXT_FIELDS = {
+    'Group Name': 'group_name',
+    'Church Name': 'church_name',
+    'Church Pastor': 'church_pastor',
+    'KingsChat Phone Number': 'kingschat_phone',
+    'Email Address': 'email'
+}
+
+CHURCH_QUANTITY_FIELDS = {
+    'Kiddies Products': 'kiddies_products',
+    'Teevo': 'teevo',
+    'Braille(NOLB)': 'braille_nolb',
+    'Languages': 'languages',
+    'Youth Aglow': 'youth_aglow'
+}
+
+CELL_TEXT_FIELDS = {
+    'Cell Name': 'cell_name',
+    'Cell Leader': 'cell_leader',
+    'KingsChat Phone Number': 'kingschat_phone',
+    'Email Address': 'email',
+    'Church': 'church',
+    'Group': 'group'
+}
+
+CELL_QUANTITY_FIELDS = {
+    'Total Quantity Sponsored': 'total_quantity',
+    'Kiddies Products': 'kiddies_products',
+    'Teevo': 'teevo',
+    'Braille': 'braille',  # Note: Different field name for cells
+    'Languages': 'languages',
+    'Youth Aglow': 'youth_aglow'
+}
+
+ROR_COUNT_FIELDS = {
+    'Reachout World Programs': 'reachout_world_programs',
+    'Rhapathon with Pastor Chris': 'rhapathon',
+    'Reachout World Nations': 'reachout_world_nations',
+    'Say Yes to Kids': 'say_yes_to_kids',
+    'Teevolution': 'teevolution',
+    'Youth Aglow': 'youth_aglow',
+    'No One Left Behind': 'no_one_left_behind',
+    'Penetrating with Truth': 'penetrating_truth',
+    'Penetrating with Languages': 'penetrating_languages',
+    'Adopt a Street': 'adopt_a_street'
+}
+
+def text_fields(df, field_map):
+    """Template text columns renamed to their fields; missing columns and blanks become ''"""
+    return pd.DataFrame({
+        field: df[column].fillna('').astype(str) if column in df.columns else ''
+        for column, field in field_map.items()
+    }, index=df.index)
+
+def numeric_fields(df, field_map, integer=False):
+    """Template numeric columns renamed to their fields; missing columns and unparsable values become 0"""
+    fields = pd.DataFrame({
+        field: pd.to_numeric(df[column], errors='coerce') if column in df.columns else 0.0
+        for column, field in field_map.items()
+    }, index=df.index).fillna(0)
+    return fields.astype(int) if integer else fields.astype(float)
+
+def show_row_errors(row_errors, sheet_rows):
+    """Show a per-row error report for a rejected sheet, using spreadsheet row numbers"""
+    report = pd.DataFrame(row_errors)
+    report['row'] = [sheet_rows[index] for index in report['row']]
+    st.dataframe(report.rename(columns={'row': 'Sheet Row', 'error': 'Error'}), use_container_width=True)
+
+def save_records_bulk(save_function, records, sheet_rows, upload=None):
+    """Save prepared records of one sheet in a single transaction, reporting failing rows.
+    
+    sheet_rows holds the spreadsheet row number of each record. With an upload,
+    each record is saved with its row hash, so rows already saved are skipped.
+    """
+    row_hashes = record_hashes(upload, records) if upload else None
+    success, message, row_errors, saved = save_function(records, amounts_computed=True, row_hashes=row_hashes)
+    if not success:
+        st.error(message)
+        if row_errors:
+            show_row_errors(row_errors, sheet_rows)
+    elif upload:
+        count_saved_rows(upload, len(records), saved)
+    return success
+
+def save_partner_records(df, selected_zone, currency, sheet_rows=None, upload=None):
     """Save partner records to database with proper amount handling"""
     try:
-        from partner_records import add_partner_record, add_external_partner_record
+        from partner_records import (
+            save_partner_records_bulk, SPONSORSHIP_FIELDS, EXTERNAL_SPONSORSHIP_FIELDS
+        )
+        from church_records import convert_amounts
         
-        for _, row in df.iterrows():
-            # Helper function to safely convert numeric values
-            def safe_float(value, default=0.0):
-                try:
-                    if pd.isna(value):
-                        return default
-                    return float(value)
-                except (ValueError, TypeError):
-                    return default
-
-            partner_data = {}
-            
-            # Basic info
-            partner_data.update({
-                'title': str(row.get('Title', '')),
-                'first_name': str(row.get('First Name', '')),
-                'surname': str(row.get('Surname', '')),
-                'kingschat_phone': str(row.get('KingsChat Phone Number', '')),
-                'email': str(row.get('Email Address', '')),
-                'zone': selected_zone,
-                'currency': currency
-            })
-
-            # Category specific fields
-            if row['Category'] == 'External Partner':
-                partner_data.update({
-                    'rhapsody_subscriptions_dubais': safe_float(row.get('Rhapsody Subscriptions and Dubais')),
-                    'sponsorship_retail_center': safe_float(row.get('Sponsorship Through Retail Center')),
-                    'translators_network_international': safe_float(row.get('Translators Network International')),
-                    'rhapsody_influencers_network': safe_float(row.get('Rhapsody Influencers Network')),
-                    'rim': safe_float(row.get('RIM')),
-                    'total_amount': safe_float(row.get('Total Amount'))
-                })
-                success, message = add_external_partner_record(partner_data)
-            else:
-                # Regular partner fields
-                partner_data.update({
-                    'church': str(row.get('Church', '')),
-                    'group': str(row.get('Group', '')),
-                    'total_wonder_challenge': safe_float(row.get('Total Amount Given for Wonder Challenge')),
-                    'total_rhapsody_languages': safe_float(row.get('Total Amount Given for Rhapsody Languages')),
-                    'total_kiddies_products': safe_float(row.get('Total Amount Given for Kiddies Products')),
-                    'total_teevo': safe_float(row.get('Total Amount Given for Teevo')),
-                    'total_braille_nolb': safe_float(row.get('Total Amount Given for Braille(NOLB)')),
-                    'total_youth_aglow': safe_float(row.get('Total Amount Given for Youth Aglow')),
-                    'total_local_distribution': safe_float(row.get('Total Given for Local Distribution')),
-                    'total_subscriptions_dubais': safe_float(row.get('Total Given for Subscriptions/Dubais')),
-                    'total_amount': safe_float(row.get('Total Amount'))
-                })
-
-                # Add category specific fields
-                if row['Category'] == 'Child Partner':
-                    partner_data['age'] = safe_float(row.get('Age', 0))
-                    partner_data['birthday'] = row.get('Birthdays')
-                elif row['Category'] == 'Teenager Partner':
-                    partner_data['birthdays'] = row.get('Birthdays')
-
-                success, message = add_partner_record(
-                    partner_data,
-                    is_child=(row['Category'] == 'Child Partner'),
-                    is_teenager=(row['Category'] == 'Teenager Partner')
-                )
-
-            if not success:
-                st.error(message)
-                return False
-
-        return True
+        df = df.reset_index(drop=True)
+        categories = df['Category']
+        is_external = categories == 'External Partner'
+        
+        # Build every field as a whole column
+        fields = pd.concat([
+            text_fields(df, PARTNER_TEXT_FIELDS),
+            text_fields(df, MEMBER_PARTNER_TEXT_FIELDS),
+            numeric_fields(df, MEMBER_PARTNER_AMOUNT_FIELDS),
+            numeric_fields(df, EXTERNAL_PARTNER_AMOUNT_FIELDS).drop(columns='total_amount')
+        ], axis=1)
+        fields['zone'] = selected_zone
+        fields['currency'] = currency
+        fields['age'] = numeric_fields(df, {'Age': 'age'})['age']
+        fields['birthday'] = df['Birthdays'] if 'Birthdays' in df.columns else None
+        fields['birthdays'] = fields['birthday']
+        
+        # Original amount is the sum of the category's sponsorship fields
+        fields['original_amount'] = fields[SPONSORSHIP_FIELDS].sum(axis=1).where(
+            ~is_external, fields[EXTERNAL_SPONSORSHIP_FIELDS].sum(axis=1)
+        )
+        fields['grand_total'] = convert_amounts(fields['original_amount'], currency)
+        
+        # Fields stored for each category
+        base_fields = list(PARTNER_TEXT_FIELDS.values()) + ['zone', 'currency']
+        member_fields = base_fields + list(MEMBER_PARTNER_TEXT_FIELDS.values()) + list(MEMBER_PARTNER_AMOUNT_FIELDS.values())
+        category_fields = {
+            'External Partner': base_fields + list(EXTERNAL_PARTNER_AMOUNT_FIELDS.values()),
+            'Child Partner': member_fields + ['age', 'birthday'],
+            'Teenager Partner': member_fields + ['birthdays']
+        }
+        
+        records_by_row = {}
+        for category in categories.unique():
+            mask = categories == category
+            columns = category_fields.get(category, member_fields) + ['original_amount', 'grand_total']
+            records_by_row.update(zip(df.index[mask], fields.loc[mask, columns].to_dict('records')))
+        
+        records = [(category, records_by_row[index]) for index, category in enumerate(categories.tolist())]
+        sheet_rows = sheet_rows or list(range(2, len(df) + 2))
+        
+        # Write the whole sheet in one transaction
+        return save_records_bulk(save_partner_records_bulk, records, sheet_rows, upload)
     except Exception as e:
         st.error(f"Error saving partner records: {e}")
         return False
 
-def save_church_records(df, selected_zone, currency):
+def save_church_records(df, selected_zone, currency, sheet_rows=None, upload=None):
     """Save church records to database"""
     try:
-        from church_records import handle_church_submit, handle_cell_submit
+        from church_records import save_church_partner_records_bulk, convert_amounts
         
-        for _, row in df.iterrows():
-            # Helper function to safely convert to int
-            def safe_int(value, default=0):
-                try:
-                    if pd.isna(value):
-                        return default
-                    return int(float(value))
-                except (ValueError, TypeError):
-                    return default
-            
-            # Calculate total amount from quantities
-            quantities = {
-                'kiddies_products': safe_int(row.get('Kiddies Products')),
-                'teevo': safe_int(row.get('Teevo')),
-                'braille_nolb': safe_int(row.get('Braille(NOLB)')),
-                'languages': safe_int(row.get('Languages')),
-                'youth_aglow': safe_int(row.get('Youth Aglow'))
-            }
-            
-            total_amount = sum(quantities.values())
-            
-            record_data = {
-                'zone_name': selected_zone,
-                'group_name': str(row.get('Group Name', '')),
-                'church_name': str(row.get('Church Name', '')),
-                'church_pastor': str(row.get('Church Pastor', '')),
-                'kingschat_phone': str(row.get('KingsChat Phone Number', '')),
-                'email': str(row.get('Email Address', '')),
-                'total_quantity': safe_int(row.get('Total Quantity Sponsored')),
-                'currency': currency,
-                'total_amount': total_amount,
-                **quantities
-            }
-            
-            if row['Category'] in ['Category A', 'Category B', 'Church']:
-                success, message = handle_church_submit(record_data, row['Category'][-1])
-            elif row['Category'] == 'Cell':
-                # For cell records, calculate received and given amounts
-                cell_quantities = {
-                    'total_quantity': safe_int(row.get('Total Quantity Sponsored')),
-                    'kiddies_products': safe_int(row.get('Kiddies Products')),
-                    'teevo': safe_int(row.get('Teevo')),
-                    'braille': safe_int(row.get('Braille')),  # Note: Different field name for cells
-                    'languages': safe_int(row.get('Languages')),
-                    'youth_aglow': safe_int(row.get('Youth Aglow'))
-                }
-                
-                total_amount = sum(cell_quantities.values())
-                
-                cell_data = {
-                    'zone_name': selected_zone,
-                    'cell_name': str(row.get('Cell Name', '')),
-                    'cell_leader': str(row.get('Cell Leader', '')),
-                    'kingschat_phone': str(row.get('KingsChat Phone Number', '')),
-                    'email': str(row.get('Email Address', '')),
-                    'church': str(row.get('Church', '')),
-                    'group': str(row.get('Group', '')),
-                    'currency': currency,
-                    'total_amount_received': total_amount,
-                    'total_amount_given': total_amount,
-                    **cell_quantities
-                }
-                success, message = handle_cell_submit(cell_data)
-            
-            if not success:
-                st.error(message)
-                return False
+        df = df.reset_index(drop=True)
+        categories = df['Category']
+        is_cell = categories == 'Cell'
         
-        return True
+        # Church sponsorships: total amount is the sum of the quantities
+        church = pd.concat([
+            text_fields(df, CHURCH_TEXT_FIELDS),
+            numeric_fields(df, {'Total Quantity Sponsored': 'total_quantity'}, integer=True),
+            numeric_fields(df, CHURCH_QUANTITY_FIELDS, integer=True)
+        ], axis=1)
+        church['zone_name'] = selected_zone
+        church['currency'] = currency
+        church['total_amount'] = church[list(CHURCH_QUANTITY_FIELDS.values())].sum(axis=1)
+        church['original_amount'] = church['total_amount'].astype(float)
+        church['grand_total'] = convert_amounts(church['original_amount'], currency)
+        
+        # Cells: received and given amounts are the sum of the quantities
+        cell = pd.concat([
+            text_fields(df, CELL_TEXT_FIELDS),
+            numeric_fields(df, CELL_QUANTITY_FIELDS, integer=True)
+        ], axis=1)
+        cell['zone_name'] = selected_zone
+        cell['currency'] = currency
+        cell['total_amount_received'] = cell[list(CELL_QUANTITY_FIELDS.values())].sum(axis=1)
+        cell['total_amount_given'] = cell['total_amount_received']
+        cell['original_amount'] = cell['total_amount_given'].astype(float)
+        cell['grand_total'] = convert_amounts(cell['original_amount'], currency)
+        cell['original_amount_received'] = cell['original_amount']
+        cell['received_total_espees'] = cell['grand_total']
+        
+        records_by_row = {}
+        church_mask = categories.isin(['Category A', 'Category B', 'Church'])
+        records_by_row.update(zip(df.index[church_mask], church[church_mask].to_dict('records')))
+        records_by_row.update(zip(df.index[is_cell], cell[is_cell].to_dict('records')))
+        
+        # Rows of other categories are skipped
+        saved_rows = [index for index in df.index if index in records_by_row]
+        records = [(categories[index], records_by_row[index]) for index in saved_rows]
+        sheet_rows = [(sheet_rows or list(range(2, len(df) + 2)))[index] for index in saved_rows]
+        
+        # Write the whole sheet in one transaction
+        return save_records_bulk(save_church_partner_records_bulk, records, sheet_rows, upload)
     except Exception as e:
         st.error(f"Error saving church records: {e}")
         return False
 
-def save_ror_records(df, selected_zone, currency):
+def save_ror_records(df, selected_zone, currency, sheet_rows=None, upload=None):
     """Save ROR outreach records to database"""
     try:
-        from church_records import handle_ror_outreaches_submit
+        from church_records import save_church_partner_records_bulk, convert_amounts
         
-        for _, row in df.iterrows():
-            record_data = {
-                "zone_name": selected_zone,
-                "group_name": row.get('Group Name', ''),
-                "reachout_world_programs": int(row.get('Reachout World Programs', 0)),
-                "rhapathon": int(row.get('Rhapathon with Pastor Chris', 0)),
-                "reachout_world_nations": int(row.get('Reachout World Nations', 0)),
-                "say_yes_to_kids": int(row.get('Say Yes to Kids', 0)),
-                "teevolution": int(row.get('Teevolution', 0)),
-                "youth_aglow": int(row.get('Youth Aglow', 0)),
-                "no_one_left_behind": int(row.get('No One Left Behind', 0)),
-                "penetrating_truth": int(row.get('Penetrating with Truth', 0)),
-                "penetrating_languages": int(row.get('Penetrating with Languages', 0)),
-                "adopt_a_street": int(row.get('Adopt a Street', 0)),
-                "currency": currency,
-                "total_amount": float(row.get('Total Amount', 0))
-            }
-            
-            # Calculate total outreaches
-            record_data["total_outreaches"] = sum([
-                record_data["reachout_world_programs"],
-                record_data["rhapathon"],
-                record_data["reachout_world_nations"],
-                record_data["say_yes_to_kids"],
-                record_data["teevolution"],
-                record_data["youth_aglow"],
-                record_data["no_one_left_behind"],
-                record_data["penetrating_truth"],
-                record_data["penetrating_languages"],
-                record_data["adopt_a_street"]
-            ])
-            
-            success, message = handle_ror_outreaches_submit(record_data)
-            if not success:
-                st.error(message)
-                return False
+        df = df.reset_index(drop=True)
+        ror = pd.concat([
+            text_fields(df, {'Group Name': 'group_name'}),
+            numeric_fields(df, ROR_COUNT_FIELDS, integer=True)
+        ], axis=1)
+        ror['zone_name'] = selected_zone
+        ror['currency'] = currency
+        ror['total_amount'] = numeric_fields(df, {'Total Amount': 'total_amount'})['total_amount']
         
-        return True
+        # Calculate total outreaches
+        ror['total_outreaches'] = ror[list(ROR_COUNT_FIELDS.values())].sum(axis=1)
+        ror['original_amount'] = ror['total_amount']
+        ror['grand_total'] = convert_amounts(ror['original_amount'], currency)
+        
+        records = [("ROR", record) for record in ror.to_dict('records')]
+        sheet_rows = sheet_rows or list(range(2, len(df) + 2))
+        
+        # Write the whole sheet in one transaction
+        return save_records_bulk(save_church_partner_records_bulk, records, sheet_rows, upload)
     except Exception as e:
         st.error(f"Error saving ROR records: {e}")
         return False
@@ -0,0 +1,173 @@
+import re
+from bisect import bisect_left
+import numpy as np
+import pandas as pd
+from db import get_connection, cached_by_data_version
+
+# Full-text index of each database (see migrations/*_search_index.sql), with the
+# table it indexes and that table's zone column
+SEARCH_INDEXES = {
+    'partner_records': ('partners_search', 'partners', 'zone'),
+    'church_partners': ('church_records_search', 'church_partner_records', 'zone_name')
+}
+
+def fts_query(text):
+    """Turn search box text into an FTS5 MATCH expression, or None when it has no words.
+
+    Every word must match, each as a prefix of an indexed token; words are quoted,
+    so punctuation in emails and phone numbers can't break the expression.
+    """
+    words = [word for word in str(text).split() if any(char.isalnum() for char in word)]
+    if not words:
+        return None
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+
+def match_condition(name, text, id_column='id'):
+    """SQL condition and parameters selecting a database's records that match search text.
+
+    A number also matches the record with that id.
+    """
+    index = SEARCH_INDEXES[name][0]
+    conditions = []
+    params = []
+    if str(text).strip().isdigit():
+        conditions.append(f"{id_column} = ?")
+        params.append(int(text))
+    query = fts_query(text)
+    if query:
+        conditions.append(f"{id_column} IN (SELECT rowid FROM {index} WHERE {index} MATCH ?)")
+        params.append(query)
+    if not conditions:
+        return "0", []
+    return f"({' OR '.join(conditions)})", params
+
+def search_records(query, zone=None, types=None, limit=None):
+    """Search partner, church, cell and ROR records by name, email, phone, church,
+    group, cell, pastor or zone.
+
+    zone narrows to one zone and types to a list of record types. Returns
+    (record_type, id) pairs, best match first: a numeric query's exact id match,
+    then by bm25 rank. Ids are only unique within a record type's database.
+    """
+    fts = fts_query(query)
+    matches = []
+    for name, (index, table, zone_column) in SEARCH_INDEXES.items():
+        filters = ""
+        params = []
+        if zone:
+            filters += f" AND {table}.{zone_column} = ?"
+            params.append(zone)
+        if types:
+            filters += f" AND {table}.record_type IN ({', '.join(['?'] * len(types))})"
+            params.extend(types)
+
+        conn = get_connection(name)
+        if str(query).strip().isdigit():
+            matches.extend(conn.execute(
+                f"SELECT record_type, id, -1e300 FROM {table} WHERE id = ?{filters}",
+                [int(query)] + params
+            ).fetchall())
+        if fts:
+            matches.extend(conn.execute(
+                f"""SELECT {table}.record_type, {table}.id, bm25({index})
+                    FROM {index} JOIN {table} ON {table}.id = {index}.rowid
+                    WHERE {index} MATCH ?{filters}
+                    ORDER BY bm25({index}) LIMIT ?""",
+                [fts] + params + [-1 if limit is None else limit]
+            ).fetchall())
+
+    # bm25 ranks are negative, best first; an exact id match also found by text counts once
+    matches.sort(key=lambda match: match[2])
+    seen = set()
+    ranked = []
+    for record_type, record_id, _ in matches:
+        if (record_type, record_id) not in seen:
+            seen.add((record_type, record_id))
+            ranked.append((record_type, record_id))
+    return ranked if limit is None else ranked[:limit]
+
+# Matches returned by partner_typeahead()
+TYPEAHEAD_LIMIT = 20
+
+# Prefixes of the record ids shown in the edit pickers, e.g. AP_12 (see app.get_unique_record_id)
+RECORD_ID_PREFIXES = {
+    'Adult Partner': 'AP',
+    'Child Partner': 'CP',
+    'Teenager Partner': 'TP',
+    'External Partner': 'EP'
+}
+
+# Text made only of digits and phone punctuation is looked up as a phone number or id
+PHONE_PATTERN = re.compile(r'[\d\s+().-]*\d[\d\s+().-]*')
+
+def typeahead_key(text):
+    """Normalize text for prefix lookups: lowercase, and digits only for phone numbers"""
+    text = ' '.join(str(text).lower().split())
+    if PHONE_PATTERN.fullmatch(text):
+        return re.sub(r'\D', '', text)
+    return text
+
+@cached_by_data_version('partner_records', resource=True)
+def load_partner_prefix_index():
+    """Sorted prefix index over partner names, emails, phone numbers and record ids.
+
+    Record ids are indexed both as they are now and as they were in the old
+    per-type tables (legacy_id), so AP_12-style ids issued before the merge still match.
+
+    Returns (keys, positions, records): keys are typeahead_key() values in sorted
+    order, positions[i] is the row of records that keys[i] belongs to, and records
+    holds (id, record_type, title, first_name, surname, zone) rows.
+    """
+    df = pd.read_sql_query(
+        """SELECT id, record_type, title, first_name, surname, zone, email, kingschat_phone, legacy_id
+           FROM partners ORDER BY id""",
+        get_connection('partner_records')
+    )
+    
+    # Same keys as typeahead_key() gives, built a column at a time since each field's kind is known
+    first_name = df['first_name'].str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
+    surname = df['surname'].str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
+    record_id = df['id'].astype(str)
+    prefixes = df['record_type'].map(RECORD_ID_PREFIXES).fillna('XX').str.lower() + '_'
+    legacy_id = df['legacy_id'].astype('Int64').astype(str).where(df['legacy_id'].notna(), '')
+    keys = pd.concat([
+        first_name, surname, (first_name + ' ' + surname).str.strip(),
+        df['email'].str.strip().str.lower(),
+        df['kingschat_phone'].str.replace(r'\D', '', regex=True),
+        record_id,
+        prefixes + record_id,
+        (prefixes + legacy_id).where(legacy_id != '', '')
+    ], ignore_index=True)
+    positions = np.tile(np.arange(len(df)), 8)
+    
+    keys = keys[keys != '']
+    order = keys.argsort().to_numpy()
+    records = list(zip(*(df[column].tolist() for column in df.columns[:6])))
+    return keys.iloc[order].tolist(), positions[keys.index.to_numpy()[order]].tolist(), records
+
+def partner_typeahead(text, zone=None, limit=TYPEAHEAD_LIMIT):
+    """Partner records whose name, email, phone number or record id starts with text.
+
+    Returns up to limit (id, record_type, title, first_name, surname, zone) rows,
+    in the sort order of their matching key, from the index built once per data version.
+    """
+    prefix = typeahead_key(text)
+    if not prefix:
+        return []
+
+    keys, positions, records = load_partner_prefix_index()
+    matches = []
+    seen = set()
+    for i in range(bisect_left(keys, prefix), len(keys)):
+        if not keys[i].startswith(prefix):
+            break
+        position = positions[i]
+        if position in seen:
+            continue
+        seen.add(position)
+        if zone and records[position][5] != zone:
+            continue
+        matches.append(records[position])
+        if len(matches) == limit:
+            break
+    return matches
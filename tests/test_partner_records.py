@@ -0,0 +1,112 @@
+import shutil
+from pathlib import Path
+import pytest
+import db
+import uploads
+from partner_records import (
+    SPONSORSHIP_FIELDS, init_partner_db, save_partner_records_bulk,
+    update_partner_record, delete_partner_record
+)
+
+REPO = Path(__file__).resolve().parent.parent
+
+def partner(zone, first_name, **amounts):
+    """Adult partner record_data as an upload row would carry it"""
+    record = {'zone': zone, 'currency': 'USD', 'title': 'Bro', 'first_name': first_name,
+              'surname': 'Test', 'email': f'{first_name.lower()}@example.com'}
+    record.update({field: amounts.get(field, 0) for field in SPONSORSHIP_FIELDS})
+    return record
+
+@pytest.fixture
+def partner_db(tmp_path, monkeypatch):
+    """Fresh partner and upload databases in a temporary directory"""
+    shutil.copytree(REPO / 'migrations', tmp_path / 'migrations')
+    shutil.copy(REPO / 'zones_data.json', tmp_path / 'zones_data.json')
+    monkeypatch.chdir(tmp_path)
+    for name in db.DATABASES:
+        db.reset_connections(name)
+    init_partner_db()
+    uploads.init_upload_ledger()
+    yield db.get_connection('partner_records')
+    for name in db.DATABASES:
+        db.reset_connections(name)
+
+def stored_totals(conn):
+    """zone_totals rows, rounded for comparison"""
+    return sorted(
+        (zone, record_type, category, month, count, round(original, 6), round(grand, 6))
+        for zone, record_type, category, month, count, original, grand in conn.execute(
+            """SELECT zone, record_type, category, month, record_count, original_amount, grand_total
+               FROM zone_totals""")
+    )
+
+def live_totals(conn):
+    """The same totals aggregated from the partners table with GROUP BY"""
+    month = "COALESCE(strftime('%Y-%m', submission_date), '')"
+    rows = list(conn.execute(f"""SELECT zone, record_type, 'all', {month}, COUNT(*),
+                                        SUM(original_amount), SUM(grand_total)
+                                 FROM partners GROUP BY zone, record_type, {month}"""))
+    for category in SPONSORSHIP_FIELDS:
+        rows += conn.execute(f"""SELECT zone, record_type, '{category}', {month}, COUNT(*), SUM({category}),
+                                        SUM(COALESCE({category} * grand_total / NULLIF(original_amount, 0), 0))
+                                 FROM partners WHERE {category} != 0
+                                 GROUP BY zone, record_type, {month}""")
+    return sorted(
+        (zone, record_type, category, month, count, round(original, 6), round(grand, 6))
+        for zone, record_type, category, month, count, original, grand in rows
+    )
+
+def test_zone_totals_follow_inserts_updates_and_deletes(partner_db):
+    conn = partner_db
+    records = [
+        ('Adult Partner', partner('Zone A', 'Ada', total_teevo=100, total_youth_aglow=50)),
+        ('Adult Partner', partner('Zone A', 'Ben', total_wonder_challenge=20)),
+        ('Child Partner', partner('Zone B', 'Cal', total_kiddies_products=30)),
+    ]
+    success, message, _, saved = save_partner_records_bulk(records)
+    assert success, message
+    assert saved == 3
+    assert stored_totals(conn) == live_totals(conn)
+
+    # Move a record to another zone and change its amounts
+    ada_id = conn.execute("SELECT id FROM partners WHERE first_name = 'Ada'").fetchone()[0]
+    success, message = update_partner_record(
+        ada_id, 'Adult Partner', partner('Zone B', 'Ada', total_teevo=10, total_braille_nolb=5))
+    assert success, message
+    assert stored_totals(conn) == live_totals(conn)
+
+    ben_id = conn.execute("SELECT id FROM partners WHERE first_name = 'Ben'").fetchone()[0]
+    success, message = delete_partner_record(ben_id, 'Adult Partner')
+    assert success, message
+    assert stored_totals(conn) == live_totals(conn)
+    # Zone A has no records left, so it has no totals either
+    assert not conn.execute("SELECT COUNT(*) FROM zone_totals WHERE zone = 'Zone A'").fetchone()[0]
+
+def test_resubmitting_an_upload_saves_nothing(partner_db):
+    conn = partner_db
+    data = b'workbook bytes'
+    records = [
+        ('Adult Partner', partner('Zone A', 'Ada', total_teevo=100)),
+        ('Adult Partner', partner('Zone A', 'Ada', total_teevo=100)),  # a deliberate repeat
+        ('Teenager Partner', partner('Zone A', 'Dan', total_youth_aglow=40)),
+    ]
+
+    def submit():
+        upload = uploads.new_upload(data, 'partners.xlsx', 'Zone A')
+        batch = [(record_type, dict(record)) for record_type, record in records]
+        success, message, _, saved = save_partner_records_bulk(batch, row_hashes=uploads.record_hashes(upload, batch))
+        assert success, message
+        uploads.count_saved_rows(upload, len(batch), saved)
+        uploads.finish_upload(upload, 'USD', uploads.UPLOAD_COMPLETE)
+        return saved
+
+    assert submit() == 3
+    totals = stored_totals(conn)
+    assert submit() == 0
+    assert conn.execute("SELECT COUNT(*) FROM partners").fetchone()[0] == 3
+    assert stored_totals(conn) == totals
+
+    completed = uploads.find_completed_upload(uploads.file_hash(data), 'Zone A')
+    assert completed['rows_read'] == 3
+    assert completed['rows_saved'] == 0
+    assert completed['rows_skipped'] == 3
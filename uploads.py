@@ -0,0 +1,102 @@
+import hashlib
+import json
+import math
+import time
+from collections import Counter
+from datetime import datetime
+import pandas as pd
+from db import get_connection, transaction, run_migrations
+
+# Fields left out of a row's hash: they follow from the conversion rates in
+# effect when the row is saved, not from the uploaded workbook
+RATE_DEPENDENT_FIELDS = {'grand_total', 'received_total_espees'}
+
+# Upload statuses recorded in the ledger
+UPLOAD_COMPLETE = 'complete'
+UPLOAD_FAILED = 'failed'
+
+def init_upload_ledger():
+    """Create or update the upload ledger table"""
+    return run_migrations('uploads', 'uploads')
+
+def file_hash(data):
+    """SHA-256 hex digest of an uploaded file's bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+def hash_value(value):
+    """Value as it is hashed: NaN becomes None, dates ISO strings, whole floats ints
+    and text has its whitespace collapsed"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return None if pd.isna(value) else value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    return value
+
+def new_upload(data, file_name, zone, uploaded_by=None):
+    """Start tracking the submission of an uploaded file's bytes to a zone, for
+    record_hashes() and finish_upload()"""
+    return {
+        'file_hash': file_hash(data), 'file_name': file_name, 'zone': zone, 'uploaded_by': uploaded_by,
+        'started_at': datetime.now(), 'started': time.perf_counter(),
+        'occurrences': Counter(), 'rows_read': 0, 'rows_saved': 0, 'rows_skipped': 0
+    }
+
+def record_hashes(upload, records):
+    """Row hash of each (record_type, record_data) pair about to be saved from an upload.
+
+    The hash covers the record type and its normalized fields, zone and currency
+    included. Identical rows within one upload are numbered in order, so a
+    deliberate repeat is saved once per copy while re-submitting the file
+    still matches every row.
+    """
+    hashes = []
+    for record_type, record_data in records:
+        fields = {key: hash_value(value) for key, value in record_data.items() if key not in RATE_DEPENDENT_FIELDS}
+        content = hashlib.sha256(
+            json.dumps([record_type, fields], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        upload['occurrences'][content] += 1
+        hashes.append(f"{content}:{upload['occurrences'][content]}")
+    return hashes
+
+def count_saved_rows(upload, rows_read, rows_saved):
+    """Add a saved sheet or chunk to an upload's row counts"""
+    upload['rows_read'] += rows_read
+    upload['rows_saved'] += rows_saved
+    upload['rows_skipped'] += rows_read - rows_saved
+
+def finish_upload(upload, currency, status):
+    """Record a finished upload in the ledger"""
+    with transaction('uploads') as conn:
+        conn.execute("""INSERT INTO upload_ledger
+                        (file_hash, file_name, zone, currency, uploaded_by, status,
+                         rows_read, rows_saved, rows_skipped, started_at, finished_at, seconds)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                     (upload['file_hash'], upload['file_name'], upload['zone'], currency,
+                      upload['uploaded_by'], status, upload['rows_read'], upload['rows_saved'],
+                      upload['rows_skipped'], upload['started_at'].isoformat(timespec='seconds'),
+                      datetime.now().isoformat(timespec='seconds'),
+                      round(time.perf_counter() - upload['started'], 3)))
+
+def find_completed_upload(file_hash, zone):
+    """Latest complete ledger entry for a file submitted to a zone, as a dict, or None"""
+    cursor = get_connection('uploads').execute("""SELECT * FROM upload_ledger
+                                               WHERE file_hash = ? AND zone = ? AND status = ?
+                                               ORDER BY id DESC LIMIT 1""", (file_hash, zone, UPLOAD_COMPLETE))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([column[0] for column in cursor.description], row))
+
+def load_upload_ledger(zone, limit=20):
+    """Most recent ledger entries of a zone, newest first"""
+    return pd.read_sql_query(
+        """SELECT finished_at, file_name, currency, uploaded_by, status,
+                  rows_read, rows_saved, rows_skipped, seconds
+           FROM upload_ledger WHERE zone = ? ORDER BY id DESC LIMIT ?""",
+        get_connection('uploads'), params=(zone, limit)
+    )
@@ -0,0 +1,7 @@
+from db import get_connection
+
+def get_user_details(username):
+    """Return (user_group, sub_group, region, zone) for a user, or None"""
+    c = get_connection('users').cursor()
+    c.execute("SELECT user_group, sub_group, region, zone FROM users WHERE username=?", (username,))
+    return c.fetchone()
@@ -0,0 +1,45 @@
+import json
+import os
+from db import transaction, database_generation
+
+# Region -> zones map shared by the zone selectors and region rollups
+ZONES_FILE = 'zones_data.json'
+
+def load_zones_data(zones_file=ZONES_FILE):
+    """Read the region to zones map from zones_data.json ({} when missing or invalid)"""
+    try:
+        with open(zones_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Database generation and zones_data.json modification time and size each
+# database's zone_regions were last synced from, by name
+_synced_zone_regions = {}
+
+def sync_zone_regions(name, zones_file=ZONES_FILE, force=False):
+    """Replace a database's zone_regions table with the map in zones_data.json.
+    
+    Runs once per process and again only when the file changes or the database
+    file is replaced, unless forced (e.g. after a migration). Returns True when
+    the table was replaced, and False, leaving it as it was, when it is already
+    in sync or the file can't be read.
+    """
+    try:
+        stat = os.stat(zones_file)
+    except OSError:
+        return False
+    source = (database_generation(name), zones_file, stat.st_mtime_ns, stat.st_size)
+    if not force and _synced_zone_regions.get(name) == source:
+        return False
+    
+    zones_data = load_zones_data(zones_file)
+    if not zones_data:
+        return False
+    
+    zone_regions = [(zone, region) for region, zones in zones_data.items() for zone in zones]
+    with transaction(name) as conn:
+        conn.execute("DELETE FROM zone_regions")
+        conn.executemany("INSERT OR REPLACE INTO zone_regions (zone, region) VALUES (?, ?)", zone_regions)
+    _synced_zone_regions[name] = source
+    return True